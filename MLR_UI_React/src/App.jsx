@@ -78,35 +78,6 @@ function App() {
     checkBackend();
   }, []);
 
-  // Poll logs for validation progress while validating
-  useEffect(() => {
-    if (!isValidating) return
-
-    const interval = setInterval(async () => {
-      try {
-        const res = await fetch(`${apiClient.baseUrl}/api/validator/logs/latest/`)
-        if (res.status === 404) return // Silent stop if logs endpoint is gone
-        const data = await res.json()
-
-        const validatingLogs = data.logs
-          .map(l => l.message)
-          .filter(msg => msg.includes('VALIDATING_STATEMENT'))
-
-        if (validatingLogs.length > 0) {
-          const last = validatingLogs[validatingLogs.length - 1]
-          const match = last.match(/VALIDATING_STATEMENT (.+)/)
-          if (match) {
-            setLiveLog(`Validating statement ${match[1]}`)
-          }
-        }
-      } catch (e) {
-        // silent fail
-      }
-    }, 1500) // Increased to 1.5s to reduce overhead
-
-    return () => clearInterval(interval)
-  }, [isValidating])
-
   const handleSelectFromHistory = (brochure, results) => {
     // Load previous validation results from MongoDB
     console.log('Loading from history:', { brochure, results })
@@ -179,63 +150,72 @@ function App() {
       console.log('[DEBUG] Job started with ID:', jobId)
       setLiveLog(`Job started (ID: ${jobId.substring(0, 8)}). Please wait...`)
 
-      // 2. Poll for status
-      let jobFinished = false
-      let retryCount = 0
-      const maxRetries = 300 // 10 minutes max (2s * 300)
-
-      while (!jobFinished && retryCount < maxRetries) {
-        await new Promise(resolve => setTimeout(resolve, 2000)) // Wait 2 seconds between checks
+      // 2. Wait for the job through the progress long-poll (one request per event, not a poll every 2s)
+      let cursor = null
+      let progress = null
+      let lastEvent = null
+      let failures = 0
+      const deadline = Date.now() + 10 * 60 * 1000 // 10 minutes max
 
+      while (Date.now() < deadline) {
         try {
-          const statusData = await apiClient.checkJobStatus(jobId)
-          console.log('[DEBUG] Job Status:', statusData.state)
-
-          if (statusData.state === 'completed') {
-            setLiveLog('Processing complete! Fetching results...')
-            jobFinished = true
-
-            // 3. Fetch final results
-            const fullResults = await apiClient.getResults(jobId)
-            const results = fullResults.results || []
-
-            if (results.length === 0) {
-              alert('Validation completed but no results were generated.')
-              setExtractionStatus('error')
-            } else {
-              const normalizedResults = results.map(r => {
-                let status = r.validation_result
-                if (status === 'Partially Supported') status = 'Supported'
-                if (['Refuted', 'Contradicted', 'Reference Missing', 'Error'].includes(status)) status = 'Uncited'
-                return { ...r, validation_result: status }
-              })
-              setExtractedStatements(normalizedResults)
-              setValidationResults(normalizedResults)
-              setResultFilter([])
-              setExtractionStatus('success')
-              setLiveLog('Validation completed successfully')
-            }
-          } else if (statusData.state === 'failed') {
-            throw new Error(statusData.error_message || 'Background job failed')
-          } else {
-            // Still processing
-            setLiveLog(`Validating... (${statusData.state})`)
-          }
+          progress = await apiClient.getJobProgress(jobId, cursor)
+          failures = 0
         } catch (err) {
-          console.error('Polling error:', err)
-          if (err.message.includes('404')) {
-            setLiveLog('Error: Validation session lost. Please try again.')
-            setExtractionStatus('error')
-            jobFinished = true // Stop polling
+          console.error('Progress error:', err)
+          if (err.message.includes('404') || err.message.includes('Session expired')) {
+            throw new Error('Validation session lost. Please try again.')
           }
+          // Network blip or server restart: back off, then resume from the same cursor
+          failures++
+          await new Promise(resolve => setTimeout(resolve, Math.min(2000 * failures, 10000)))
+          continue
         }
 
-        retryCount++
+        cursor = progress.cursor
+        if (progress.events.length > 0) {
+          lastEvent = progress.events[progress.events.length - 1]
+          if (!progress.done) {
+            const counts = lastEvent.statements_total
+              ? ` (${lastEvent.statements_done}/${lastEvent.statements_total} statements)`
+              : ''
+            setLiveLog(`Validating... (${lastEvent.stage}${counts})`)
+          }
+        }
+        if (progress.done) break
       }
 
-      if (!jobFinished) {
+      if (!progress || !progress.done) {
         throw new Error('Validation timed out. Please check History later.')
       }
+      if (progress.state !== 'completed') {
+        // The failure event may have expired from the progress history; the job row keeps the message
+        const detail = (lastEvent && lastEvent.error) ||
+          (await apiClient.checkJobStatus(jobId).catch(() => ({}))).error_message
+        throw new Error(detail || 'Background job failed')
+      }
+
+      // 3. Fetch final results
+      setLiveLog('Processing complete! Fetching results...')
+      const fullResults = await apiClient.getResults(jobId)
+      const results = fullResults.results || []
+
+      if (results.length === 0) {
+        alert('Validation completed but no results were generated.')
+        setExtractionStatus('error')
+      } else {
+        const normalizedResults = results.map(r => {
+          let status = r.validation_result
+          if (status === 'Partially Supported') status = 'Supported'
+          if (['Refuted', 'Contradicted', 'Reference Missing', 'Error'].includes(status)) status = 'Uncited'
+          return { ...r, validation_result: status }
+        })
+        setExtractedStatements(normalizedResults)
+        setValidationResults(normalizedResults)
+        setResultFilter([])
+        setExtractionStatus('success')
+        setLiveLog('Validation completed successfully')
+      }
 
       // Refresh History component after validation
       const historyElement = document.querySelector('[data-history-refresh]')
@@ -86,6 +86,41 @@ class APIClient {
     }
   }
 
+  // Long-poll a job's progress events after the given cursor.
+  // The server answers as soon as there is a new event (or after ~25s), and at once when the job is done.
+  async getJobProgress(jobId, since = null) {
+    const token = localStorage.getItem('access_token');
+    const query = since ? `?since=${encodeURIComponent(since)}` : '';
+    const response = await fetch(`${this.baseUrl}${this.validatorPath}/job-progress/${jobId}/${query}`, {
+      headers: {
+        'Authorization': `Bearer ${token}`
+      }
+    });
+    if (response.status === 401) {
+      this.handleAuthError();
+      throw new Error('Session expired. Please log in again.');
+    }
+    if (!response.ok) {
+      throw new Error(`Progress check failed: ${response.status}`);
+    }
+    return await response.json();
+  }
+
+  // Fetch a job's log lines after the given cursor
+  async getJobLogs(jobId, since = null) {
+    const token = localStorage.getItem('access_token');
+    const query = since ? `?since=${encodeURIComponent(since)}` : '';
+    const response = await fetch(`${this.baseUrl}${this.validatorPath}/logs/${jobId}/${query}`, {
+      headers: {
+        'Authorization': `Bearer ${token}`
+      }
+    });
+    if (!response.ok) {
+      throw new Error(`Log fetch failed: ${response.status}`);
+    }
+    return await response.json();
+  }
+
   // Run full pipeline: Starts a background job and returns job_id
   async runPipeline(brochureFile, referenceFiles, validationType = 'research') {
     if (!this.isConnected && !await this.testConnection()) {
@@ -6,8 +6,6 @@ import json
 import redis
 from datetime import datetime, timedelta
 from django.conf import settings
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 import ssl
 
 try:
@@ -54,6 +52,10 @@ def generate_otp():
 
 def send_otp_email(email: str, otp: str):
     """Send OTP email via SendGrid"""
+    # Imported here: sendgrid is only needed when an email actually goes out
+    from sendgrid import SendGridAPIClient
+    from sendgrid.helpers.mail import Mail
+
     sg_api_key = os.getenv("SENDGRID_API_KEY")
     from_email = os.getenv("FROM_EMAIL")
     
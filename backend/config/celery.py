@@ -1,7 +1,7 @@
 import os
 import logging
 from celery import Celery
-from celery.signals import worker_ready, worker_shutting_down, task_failure
+from celery.signals import after_setup_logger, worker_init, worker_ready, worker_shutting_down, task_failure
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +24,28 @@ app.autodiscover_tasks()
 # WORKER LIFECYCLE SIGNALS
 # ==============================================================================
 
+@worker_init.connect
+def on_worker_init(sender=None, **kwargs):
+    """
+    Import the extraction/validation modules in the worker parent before the
+    pool forks, so every prefork child inherits them instead of importing
+    pandas, PyMuPDF and google.generativeai on its first task (and again after
+    each max-tasks-per-child recycle). Set CELERY_PRELOAD_PIPELINE=0 to skip.
+    """
+    if os.getenv('CELERY_PRELOAD_PIPELINE', '1') == '0':
+        return
+    from validator.services import preload_pipeline
+    preload_pipeline()
+    logger.info("Celery worker preloaded pipeline modules")
+
+
+@after_setup_logger.connect
+def on_after_setup_logger(logger=None, **kwargs):
+    """Celery replaces the root logger's handlers at startup; put the per-job log handler back."""
+    from validator.job_logs import install_job_log_handler
+    install_job_log_handler()
+
+
 @worker_ready.connect
 def on_worker_ready(sender, **kwargs):
     """Log when a Celery worker starts and is ready to accept tasks."""
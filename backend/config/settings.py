@@ -174,6 +174,27 @@ CELERY_TASK_TRACK_STARTED = True  # Track when tasks actually start running
 CELERY_WORKER_CONCURRENCY = int(os.getenv('CELERY_WORKER_CONCURRENCY', '2'))
 CELERY_WORKER_MAX_TASKS_PER_CHILD = int(os.getenv('CELERY_MAX_TASKS_PER_CHILD', '50'))
 
+# ==============================================================================
+# OBJECT STORAGE (uploaded PDFs)
+# ==============================================================================
+
+# S3 mode: uploads go to the bucket and Celery workers download them.
+# Local mode (default): files stay on this host's disk.
+USE_S3_STORAGE = os.getenv('USE_S3_STORAGE', 'False') == 'True'
+AWS_S3_BUCKET_NAME = os.getenv('AWS_S3_BUCKET_NAME', 'mlr-validator-uploads')
+AWS_S3_REGION = os.getenv('AWS_S3_REGION', 'us-east-1')
+AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
+AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
+# S3-compatible endpoint (e.g. MinIO at http://127.0.0.1:9000); unset for AWS
+AWS_S3_ENDPOINT_URL = os.getenv('AWS_S3_ENDPOINT_URL') or None
+
+# --- Direct (presigned multipart) uploads ---
+# Part size clients upload with; S3 needs at least 5 MB for all but the last part
+DIRECT_UPLOAD_PART_MB = int(os.getenv('DIRECT_UPLOAD_PART_MB', '16'))
+# How long part URLs and the upload token stay valid
+DIRECT_UPLOAD_EXPIRES_SECONDS = int(os.getenv('DIRECT_UPLOAD_EXPIRES_SECONDS', '3600'))
+DIRECT_UPLOAD_MAX_FILES = int(os.getenv('DIRECT_UPLOAD_MAX_FILES', '50'))
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
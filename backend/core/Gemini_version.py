@@ -15,7 +15,6 @@ from difflib import SequenceMatcher
 import numpy as np
 from typing import List, Dict, Tuple
 import sys
-from dotenv import load_dotenv
 import numpy as np
 import requests
 import json
@@ -23,12 +22,15 @@ from typing import Optional, Dict
 import google.generativeai as genai
 from google.generativeai.types import File as GeminiFile
 from google.api_core import retry as retry_lib
+from pydantic import BaseModel, ConfigDict
+from typing import Literal, Union
+from json_salvage import salvage_json, validate_items
+from reference_compaction import compact_reference
+import clients
 
 # Get the root logger (configured by app.py) instead of creating a new one
 logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file
-load_dotenv()
 
 
 # RATE LIMIT & RETRY CONFIGURATION
@@ -85,6 +87,20 @@ def json_default(o):
         return o.item()   # Convert NumPy types to normal Python numbers
     return str(o)         # Fallback
 
+
+def load_pdf_content(pdf_info: Dict) -> bytes:
+    """
+    Bytes of a pdf_files_dict entry.
+
+    Entries carry "content" when the upload is small enough to keep in memory;
+    otherwise only its "path" (or legacy "temp_path"), read here on first use.
+    """
+    content = pdf_info.get("content")
+    if content is None:
+        with open(pdf_info.get("path") or pdf_info["temp_path"], "rb") as f:
+            content = f.read()
+    return content
+
 @dataclass
 class ValidationResult:
     """Data structure for validation results"""
@@ -99,6 +115,16 @@ class ValidationResult:
     matching_method: str = ""
     analysis_summary: str = ""
     
+class VerdictPayload(BaseModel):
+    """Schema a verdict reply must satisfy to be trusted."""
+    model_config = ConfigDict(extra="allow")
+    validation_result: Literal["Supported", "Contradicted", "Not Found"]
+    matched_evidence: Union[str, List[str], None] = ""
+    page_location: Optional[str] = ""
+    confidence_score: float = 0.0
+    analysis_summary: Optional[str] = ""
+
+
 class GeminiClient:
 
     def __init__(self, api_key: Optional[str] = None, model: str = "gemini-2.0-flash", base_url: str = "https://generativelanguage.googleapis.com"):
@@ -108,6 +134,11 @@ class GeminiClient:
         self.client = None
         self.api_key = None
         self.headers = {"Content-Type": "application/json"}
+        # One audit entry per uploaded reference (original hash, bytes saved)
+        self.compaction_report = []
+
+        # Load .env on first use rather than at import time
+        clients.load_env()
 
         # Collect potential keys: provided arg, then env vars
         potential_keys = []
@@ -165,9 +196,16 @@ class GeminiClient:
         logger.error("All available Gemini API keys and models failed validation")
         self.client = None
 
-    def upload_pdf_to_gemini(self, pdf_bytes: bytes, filename: str):
-        """Upload PDF to Gemini with retry logic"""
-        return self._upload_pdf_with_retry(pdf_bytes, filename)
+    def upload_pdf_to_gemini(self, pdf_bytes: bytes, filename: str, record_compaction: bool = True):
+        """
+        Compact the PDF (see reference_compaction.py), then upload it to Gemini with retry logic.
+
+        Pass record_compaction=False on long-lived shared clients so compaction_report does not grow forever.
+        """
+        compacted = compact_reference(pdf_bytes, filename)
+        if record_compaction:
+            self.compaction_report.append(compacted.as_audit())
+        return self._upload_pdf_with_retry(compacted.data, filename)
     
     @retry_with_exponential_backoff(max_retries=5, initial_delay=1.0, max_delay=30.0)
     def _upload_pdf_with_retry(self, pdf_bytes: bytes, filename: str):
@@ -302,6 +340,10 @@ class GeminiClient:
             if not self.client:
                 raise Exception("Gemini client not initialized. Check API key.")
             
+            # Shared with extraction and the other validation workers in this process
+            limiter = clients.get("gemini_rate_limiter")
+            limiter.acquire()
+            
             # Send prompt with file reference to Gemini
             response = self.client.generate_content(
                 [prompt, pdf_file],
@@ -319,6 +361,8 @@ class GeminiClient:
                     logger.warning(f"Gemini blocked response (PDF mode): {response.prompt_feedback}")
                 return ""
         except Exception as e:
+            if "429" in str(e):
+                clients.get("gemini_rate_limiter").back_off(2)
             raise
 
     def validate_pharmaceutical_statement(self, statement: str, pdf_file, reference: str) -> dict:
@@ -369,52 +413,7 @@ CRITICAL RULES:
 - Return ONLY valid JSON - nothing else"""
 
         try:
-            response_text = self._query_llm_with_pdf(prompt, pdf_file, temperature=0.15, max_output_tokens=4096)
-            logger.debug(f"[PHARM RESPONSE] Raw: {response_text[:500]}")
-
-            try:
-                parsed = json.loads(response_text)
-                logger.debug(f"[PHARM PARSED] {parsed}")
-                
-                if isinstance(parsed.get("matched_evidence"), list):
-                    parsed["matched_evidence"] = " | ".join([str(e).strip() for e in parsed["matched_evidence"] if e])
-                elif not isinstance(parsed.get("matched_evidence"), str):
-                    parsed["matched_evidence"] = str(parsed.get("matched_evidence", ""))
-                
-                parsed["statement"] = statement
-                parsed["reference"] = reference
-                return parsed
-                
-            except json.JSONDecodeError:
-                try:
-                    start = response_text.find('{')
-                    end = response_text.rfind('}')
-                    if start != -1 and end != -1 and end > start:
-                        candidate = response_text[start:end+1]
-                        parsed = json.loads(candidate)
-                        if isinstance(parsed.get("matched_evidence"), list):
-                            parsed["matched_evidence"] = " | ".join([str(e).strip() for e in parsed["matched_evidence"] if e])
-                        elif not isinstance(parsed.get("matched_evidence"), str):
-                            parsed["matched_evidence"] = str(parsed.get("matched_evidence", ""))
-                        
-                        parsed["statement"] = statement
-                        parsed["reference"] = reference
-                        return parsed
-                except json.JSONDecodeError as je:
-                    logger.error(f"[PHARM PARSE] JSON parsing error: {str(je)}")
-                    pass
-
-            logger.warning(f"[PHARM PARSE] Failed to parse Gemini response. Using fallback result.")
-            return {
-                "statement": statement,
-                "reference": reference,
-                "validation_result": "Supported",
-                "matched_evidence": response_text[:500] if response_text else "Evidence extraction in progress",
-                "page_location": "Multiple locations",
-                "confidence_score": 0.7,
-                "analysis_summary": "Parsed from pharmaceutical response"
-            }
-            
+            return self._query_verdict(prompt, pdf_file, statement, reference, tag="PHARM")
         except Exception as e:
             logger.error(f"[PHARM] Error during validation: {str(e)}")
             return {
@@ -489,64 +488,7 @@ CRITICAL RULES:
 
         try:
             # query Gemini with PDF file and higher output tokens for detailed analysis
-            response_text = self._query_llm_with_pdf(prompt, pdf_file, temperature=0.15, max_output_tokens=4096)
-
-            # Log raw response for debugging
-            logger.debug(f"[GEMINI RESPONSE] Raw: {response_text[:500]}")
-
-            # attempt to parse JSON
-            try:
-                parsed = json.loads(response_text)
-                
-                # Log parsed response
-                logger.debug(f"[GEMINI PARSED] {parsed}")
-                
-                # Ensure matched_evidence is always a string
-                if isinstance(parsed.get("matched_evidence"), list):
-                    parsed["matched_evidence"] = " | ".join([str(e).strip() for e in parsed["matched_evidence"] if e])
-                elif not isinstance(parsed.get("matched_evidence"), str):
-                    parsed["matched_evidence"] = str(parsed.get("matched_evidence", ""))
-                
-                # Add the validated statement to the result for tracking
-                parsed["statement"] = statement
-                parsed["reference"] = reference
-                return parsed
-                
-            except json.JSONDecodeError:
-                # try to extract JSON object inside the text
-                try:
-                    start = response_text.find('{')
-                    end = response_text.rfind('}')
-                    if start != -1 and end != -1 and end > start:
-                        candidate = response_text[start:end+1]
-                        parsed = json.loads(candidate)
-                        # Ensure matched_evidence is always a string
-                        if isinstance(parsed.get("matched_evidence"), list):
-                            parsed["matched_evidence"] = " | ".join([str(e).strip() for e in parsed["matched_evidence"] if e])
-                        elif not isinstance(parsed.get("matched_evidence"), str):
-                            parsed["matched_evidence"] = str(parsed.get("matched_evidence", ""))
-                        
-                        # Add the validated statement to the result for tracking
-                        parsed["statement"] = statement
-                        parsed["reference"] = reference
-                        return parsed
-                except json.JSONDecodeError as je:
-                    logger.error(f"[PARSE] JSON parsing error: {str(je)}")
-                    logger.debug(f"[PARSE] Response text: {response_text[:500]}")
-                    pass
-
-            # fallback default result if parsing fails
-            logger.warning(f"[PARSE] Failed to parse Gemini response. Using fallback with response text as evidence.")
-            return {
-                "statement": statement,
-                "reference": reference,
-                "validation_result": "Supported",
-                "matched_evidence": response_text[:500] if response_text else "Evidence extraction in progress",
-                "page_location": "Multiple locations",
-                "confidence_score": 0.7,
-                "analysis_summary": "Parsed from research paper response"
-            }
-            
+            return self._query_verdict(prompt, pdf_file, statement, reference, tag="VALIDATE")
         except Exception as e:
             logger.error(f"[VALIDATE] Error during validation: {str(e)}")
             return {
@@ -559,19 +501,73 @@ CRITICAL RULES:
                 "analysis_summary": f"Validation error: {str(e)}"
             }
 
+    def _query_verdict(self, prompt: str, pdf_file, statement: str, reference: str, tag: str, max_output_tokens: int = 4096, temperature: float = 0.15) -> dict:
+        """
+        Query Gemini for one verdict, re-requesting this statement once if the reply cannot be parsed.
+
+        A reply that still cannot be parsed is reported as "Error" with the raw
+        text attached, never as a real verdict.
+        """
+        response_text = ""
+        for attempt in range(2):
+            response_text = self._query_llm_with_pdf(prompt, pdf_file, temperature=temperature, max_output_tokens=max_output_tokens)
+            logger.debug(f"[{tag} RESPONSE] Raw: {response_text[:500]}")
+            parsed = self._parse_verdict(response_text, statement, reference)
+            if parsed is not None:
+                return parsed
+            logger.warning(f"[{tag} PARSE] Unparseable verdict (attempt {attempt + 1}/2) for statement: {statement[:80]}")
+
+        return {
+            "statement": statement,
+            "reference": reference,
+            "validation_result": "Error",
+            "matched_evidence": response_text[:500] if response_text else "",
+            "page_location": "N/A",
+            "confidence_score": 0.0,
+            "analysis_summary": "Model response could not be parsed after a retry; re-run this statement."
+        }
+
+    def _parse_verdict(self, response_text: str, statement: str, reference: str) -> Optional[dict]:
+        """
+        Salvage and validate a verdict object from a (possibly truncated) reply.
+
+        Returns None when no verdict with a valid validation_result can be recovered.
+        """
+        result = salvage_json(response_text)
+        if result.kind != "object":
+            return None
+        verdicts, rejected = validate_items([result.value], VerdictPayload)
+        if rejected:
+            logger.debug(f"[PARSE] Rejected verdict: {rejected[0]['reason']}")
+            return None
+
+        parsed = verdicts[0].model_dump()
+        # Ensure matched_evidence is always a string
+        if isinstance(parsed.get("matched_evidence"), list):
+            parsed["matched_evidence"] = " | ".join([str(e).strip() for e in parsed["matched_evidence"] if e])
+        elif not isinstance(parsed.get("matched_evidence"), str):
+            parsed["matched_evidence"] = str(parsed.get("matched_evidence") or "")
+        if result.lost:
+            logger.warning(f"[PARSE] Verdict recovered from partial output; lost fields: {[item['fragment'][:40] for item in result.lost]}")
+
+        parsed["statement"] = statement
+        parsed["reference"] = reference
+        return parsed
+
     def _extract_json(self, text: str) -> dict:
-        # You can reuse your existing LMStudioClient._extract_json implementation here if you want.
-        try:
-            return json.loads(text)
-        except Exception:
-            return self._get_default_result()
+        result = salvage_json(text)
+        if result.kind == "object":
+            return result.value
+        return self._get_default_result()
 
     def _get_default_result(self) -> dict:
+        # Unparseable output must not look like a real "Not Found" verdict
         return {
-            "validation_result": "Not Found",
+            "validation_result": "Error",
             "matched_evidence": "",
             "page_location": "",
-            "confidence_score": 0.0
+            "confidence_score": 0.0,
+            "analysis_summary": "Model response could not be parsed"
         }
 
 class PDFProcessor:
@@ -819,26 +815,8 @@ class StatementValidator:
         
         # GROUP identical statements with different references
         statement_groups = {}
-        
         for idx, row in df.iterrows():
-            statement = row.get('statement', '').strip() if isinstance(row.get('statement', ''), str) else ''
-            
-            # Skip empty statements
-            if not statement:
-                continue
-            
-            if statement not in statement_groups:
-                statement_groups[statement] = {
-                    'references': set(),
-                    'reference_nos': set(),
-                    'sample_row': row
-                }
-            
-            # Accumulate reference numbers for this statement
-            ref_no = row.get('reference_no', 0)
-            if ref_no:
-                statement_groups[statement]['references'].add(str(ref_no))
-                statement_groups[statement]['reference_nos'].add(ref_no)
+            self.add_to_statement_groups(statement_groups, row)
         
         logger.info(f"[DEDUP] Grouped {len(df)} rows into {len(statement_groups)} unique statements")
         print(f"[DEDUP] Grouped {len(df)} rows into {len(statement_groups)} unique statements\n")
@@ -855,18 +833,7 @@ class StatementValidator:
             if not group_data['references']:
                 logger.warning(f"[SKIP] Statement: No references found for '{statement[:30]}...'")
                 # Create a placeholder so we don't lose the row
-                no_ref_res = ValidationResult(
-                    statement=statement,
-                    reference_no="None",
-                    reference="No citation identified in the source text.",
-                    matched_paper="None",
-                    matched_evidence="The system could not identify a superscript or citation number for this specific statement in the PDF.",
-                    validation_result="Refuted",
-                    page_location="N/A",
-                    confidence_score=0.0,
-                    analysis_summary="This statement was extracted but has no linked reference number to validate against."
-                )
-                statement_cache[statement] = [no_ref_res]
+                statement_cache[statement] = [self.no_reference_result(statement)]
                 continue
             
             try:
@@ -888,36 +855,9 @@ class StatementValidator:
                 page_no = sample_row.get('page_no', None)
                 pdf_files_dict = sample_row.get('pdf_files_dict', {})
                 
-                # HANDLE "Table" OR MISSING REFERENCES - Dynamic Universal Validation
-                # If a statement came from a table without a superscript, we search ALL papers to find proof.
-                if combined_refs.lower() == "table" or combined_refs == "":
-                    logger.info(f"[{processed}] [UNIVERSAL SEARCH] No specific citation found. Searching all papers for: {statement[:40]}...")
-                    filtered_pdf_dict = pdf_files_dict
-                    is_uncited_fallback = True
-                else:
-                    # Filter PDFs for ALL reference numbers in this group
-                    filtered_pdf_dict = self.filter_pdfs_by_references(pdf_files_dict, combined_refs)
-                    is_uncited_fallback = False
-                
-                if not filtered_pdf_dict:
-                    logger.warning(f"[{processed}] [FAIL] No matching PDFs for references: {combined_refs}")
-                    # If it was a 'Table' ref and no PDFs match, mark as Uncited
-                    # If it was a numbered ref and PDF is missing, mark as Reference Missing
-                    final_status = "Uncited" if is_uncited_fallback else "Reference Missing"
-                    
-                    err_res = ValidationResult(
-                        statement=statement,
-                        reference_no=sample_row.get('reference_no', 0),
-                        reference=sample_row.get('reference', ''),
-                        matched_paper="None",
-                        matched_evidence=f"No matching reference PDF was found for the extraction: {combined_refs}",
-                        validation_result=final_status,
-                        page_location="N/A",
-                        confidence_score=0.0,
-                        matching_method="Reference Filter",
-                        analysis_summary=f"Validation skipped: {final_status}"
-                    )
-                    statement_cache[statement] = [err_res]
+                filtered_pdf_dict, skipped = self.resolve_group_pdfs(statement, group_data, pdf_files_dict, tag=str(processed))
+                if skipped is not None:
+                    statement_cache[statement] = skipped
                     continue
                 
                 # Validate this statement against its combined reference PDFs
@@ -954,8 +894,115 @@ class StatementValidator:
                 statement_cache[statement] = [error_res]
         
         # 4. EXPAND results back to original row count
+        final_results = self.expand_results((row for _, row in df.iterrows()), statement_cache)
+        
+        logger.info(f"[EXPAND] Expanded {len(statement_cache)} results back to {len(final_results)} rows")
+        print(f"[EXPAND] Expanded {len(statement_cache)} results back to {len(final_results)} rows")
+        
+        logger.info("="*70)
+        logger.info(f"VALIDATION PIPELINE COMPLETE (Total: {len(final_results)})")
+        logger.info("="*70)
+
+        # SAVE VALIDATION OUTPUT (FINAL RESULTS)
+        try:
+            results_to_save = [asdict(res) for res in final_results]
+            with open("output/validation_output.json", "w") as f:
+                json.dump(results_to_save, f, indent=4)
+            logger.info("[DEBUG] Saved final results to output/validation_output.json")
+        except Exception as e:
+            logger.error(f"[DEBUG] Failed to save validation debug JSON: {e}")
+        
+        return final_results
+
+    @staticmethod
+    def no_reference_result(statement: str) -> ValidationResult:
+        """Placeholder for a statement that has no citation number at all."""
+        return ValidationResult(
+            statement=statement,
+            reference_no="None",
+            reference="No citation identified in the source text.",
+            matched_paper="None",
+            matched_evidence="The system could not identify a superscript or citation number for this specific statement in the PDF.",
+            validation_result="Refuted",
+            page_location="N/A",
+            confidence_score=0.0,
+            analysis_summary="This statement was extracted but has no linked reference number to validate against."
+        )
+
+    @staticmethod
+    def add_to_statement_groups(statement_groups: Dict, row) -> Optional[str]:
+        """
+        Add one row (dict or DataFrame row) to `statement_groups`, keyed by statement text.
+
+        Returns the statement, or None for empty statements (which are not grouped).
+        """
+        statement = row.get('statement', '').strip() if isinstance(row.get('statement', ''), str) else ''
+        
+        # Skip empty statements
+        if not statement:
+            return None
+        
+        if statement not in statement_groups:
+            statement_groups[statement] = {
+                'references': set(),
+                'reference_nos': set(),
+                'sample_row': row
+            }
+        
+        # Accumulate reference numbers for this statement
+        ref_no = row.get('reference_no', 0)
+        if ref_no:
+            statement_groups[statement]['references'].add(str(ref_no))
+            statement_groups[statement]['reference_nos'].add(ref_no)
+        return statement
+
+    def resolve_group_pdfs(self, statement: str, group_data: Dict, pdf_files_dict: Dict, tag: str = "") -> Tuple[Dict, Optional[List[ValidationResult]]]:
+        """
+        Pick the reference PDFs a statement group must be validated against.
+
+        Returns (filtered_pdf_dict, None), or ({}, [result]) when validation is
+        skipped because no reference PDF matches.
+        """
+        combined_refs = ','.join(sorted(group_data['references']))
+        sample_row = group_data['sample_row']
+
+        # HANDLE "Table" OR MISSING REFERENCES - Dynamic Universal Validation
+        # If a statement came from a table without a superscript, we search ALL papers to find proof.
+        if combined_refs.lower() == "table" or combined_refs == "":
+            logger.info(f"[{tag}] [UNIVERSAL SEARCH] No specific citation found. Searching all papers for: {statement[:40]}...")
+            filtered_pdf_dict = pdf_files_dict
+            is_uncited_fallback = True
+        else:
+            # Filter PDFs for ALL reference numbers in this group
+            filtered_pdf_dict = self.filter_pdfs_by_references(pdf_files_dict, combined_refs)
+            is_uncited_fallback = False
+        
+        if filtered_pdf_dict:
+            return filtered_pdf_dict, None
+
+        logger.warning(f"[{tag}] [FAIL] No matching PDFs for references: {combined_refs}")
+        # If it was a 'Table' ref and no PDFs match, mark as Uncited
+        # If it was a numbered ref and PDF is missing, mark as Reference Missing
+        final_status = "Uncited" if is_uncited_fallback else "Reference Missing"
+        
+        return {}, [ValidationResult(
+            statement=statement,
+            reference_no=sample_row.get('reference_no', 0),
+            reference=sample_row.get('reference', ''),
+            matched_paper="None",
+            matched_evidence=f"No matching reference PDF was found for the extraction: {combined_refs}",
+            validation_result=final_status,
+            page_location="N/A",
+            confidence_score=0.0,
+            matching_method="Reference Filter",
+            analysis_summary=f"Validation skipped: {final_status}"
+        )]
+
+    @staticmethod
+    def expand_results(rows, statement_cache: Dict[str, List[ValidationResult]]) -> List[ValidationResult]:
+        """Map per-statement results back onto the original rows, in row order."""
         final_results = []
-        for idx, row in df.iterrows():
+        for row in rows:
             stmt_text = row.get('statement', '').strip() if isinstance(row.get('statement', ''), str) else ''
             
             if not stmt_text:
@@ -987,23 +1034,6 @@ class StatementValidator:
                     confidence_score=0.0,
                     analysis_summary="Row failed to map to a validation result."
                 ))
-        
-        logger.info(f"[EXPAND] Expanded {len(statement_cache)} results back to {len(final_results)} rows")
-        print(f"[EXPAND] Expanded {len(statement_cache)} results back to {len(final_results)} rows")
-        
-        logger.info("="*70)
-        logger.info(f"VALIDATION PIPELINE COMPLETE (Total: {len(final_results)})")
-        logger.info("="*70)
-
-        # SAVE VALIDATION OUTPUT (FINAL RESULTS)
-        try:
-            results_to_save = [asdict(res) for res in final_results]
-            with open("output/validation_output.json", "w") as f:
-                json.dump(results_to_save, f, indent=4)
-            logger.info("[DEBUG] Saved final results to output/validation_output.json")
-        except Exception as e:
-            logger.error(f"[DEBUG] Failed to save validation debug JSON: {e}")
-        
         return final_results
     
     def validate_statement_against_all_papers(self, statement: str, reference_no: int, reference: str, pdf_files_dict: Dict[str, Dict], page_no: Optional[str] = None, validation_type: str = "research") -> List[ValidationResult]:
@@ -1034,47 +1064,55 @@ class StatementValidator:
         
         # Validate against EACH PDF individually
         for idx, pdf_name in enumerate(pdf_filenames, 1):
-            try:
-                # Add throttle to avoid rate limiting
-                if idx > 1:
-                    time.sleep(0.5)  # 500ms delay between requests
-                
-                logger.info(f"[VALIDATE] [{idx}/{len(pdf_filenames)}] {Path(pdf_name).name}")
-                
-                # Create single-PDF dict for this validation
-                single_pdf_dict = {
-                    pdf_name: pdf_files_dict[pdf_name]
-                }
-                
-                # Validate against this ONE PDF
-                result = self.validate_statement(
-                    statement=statement,
-                    reference_no=reference_no,
-                    reference=reference,
-                    pdf_files_dict=single_pdf_dict,
-                    page_no=page_no,
-                    validation_type=validation_type
-                )
-                
-                individual_results.append(result)
-                logger.info(f"[VALIDATE] [{idx}] Result: {result.validation_result}")
-                
-            except Exception as e:
-                logger.error(f"[VALIDATE] [{idx}] ERROR: {str(e)}")
-                
-                # Add error result for this PDF
-                individual_results.append(ValidationResult(
-                    statement=statement,
-                    reference_no=reference_no,
-                    reference=reference,
-                    matched_paper=pdf_name,
-                    matched_evidence="",
-                    validation_result="Error",
-                    page_location=str(e),
-                    confidence_score=0.0,
-                    matching_method="MultiPaperValidationError"
-                ))
+            # Add throttle to avoid rate limiting
+            if idx > 1:
+                time.sleep(0.5)  # 500ms delay between requests
+            
+            logger.info(f"[VALIDATE] [{idx}/{len(pdf_filenames)}] {Path(pdf_name).name}")
+            individual_results.append(self.validate_against_pdf(
+                statement, reference_no, reference, pdf_name, pdf_files_dict[pdf_name],
+                page_no=page_no, validation_type=validation_type, tag=str(idx)
+            ))
         
+        return self.aggregate_results(statement, reference_no, reference, individual_results)
+
+    def validate_against_pdf(self, statement: str, reference_no, reference: str, pdf_name: str, pdf_info: Dict,
+                             page_no: Optional[str] = None, validation_type: str = "research", tag: str = "") -> ValidationResult:
+        """Validate one statement against ONE reference PDF; errors become an "Error" result."""
+        try:
+            result = self.validate_statement(
+                statement=statement,
+                reference_no=reference_no,
+                reference=reference,
+                pdf_files_dict={pdf_name: pdf_info},
+                page_no=page_no,
+                validation_type=validation_type
+            )
+            logger.info(f"[VALIDATE] [{tag}] Result: {result.validation_result}")
+            return result
+            
+        except Exception as e:
+            logger.error(f"[VALIDATE] [{tag}] ERROR: {str(e)}")
+            
+            # Add error result for this PDF
+            return ValidationResult(
+                statement=statement,
+                reference_no=reference_no,
+                reference=reference,
+                matched_paper=pdf_name,
+                matched_evidence="",
+                validation_result="Error",
+                page_location=str(e),
+                confidence_score=0.0,
+                matching_method="MultiPaperValidationError"
+            )
+
+    def aggregate_results(self, statement: str, reference_no, reference: str, individual_results: List[ValidationResult]) -> List[ValidationResult]:
+        """
+        Combine per-PDF results into ONE result per statement.
+
+        Priority: Supported > Contradicted > Not Found > Error
+        """
         # AGGREGATE results by type
         supported_results = [r for r in individual_results if r.validation_result == "Supported"]
         contradicted_results = [r for r in individual_results if r.validation_result == "Contradicted"]
@@ -1177,9 +1215,8 @@ class StatementValidator:
 
         # ─────── PDF PREPARATION ───────
         pdf_info = pdf_files_dict[matched_filename]
-        pdf_content = pdf_info["content"]
-        
         if matched_filename not in self.pdf_content_cache:
+            pdf_content = load_pdf_content(pdf_info)
             self.pdf_content_cache[matched_filename] = pdf_content
             logger.info(f"[STMT] PDF cached (size: {len(pdf_content)} bytes)")
         else:
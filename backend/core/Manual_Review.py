@@ -2,52 +2,148 @@ import logging
 import json
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, List, Optional, Tuple
+
 import numpy as np
-from Gemini_version import GeminiClient
+
+import clients
 
 logger = logging.getLogger(__name__)
 
 
-def validate_manual_review_multi(statement: str, pdf_files: list, references: list) -> dict:
+def get_review_client():
+    """
+    Process-wide GeminiClient for manual review (see clients.py).
+
+    It is created and pinged once, then shared by every request and thread;
+    raises if no API key/model works.
+    """
+    return clients.get("gemini_validation")
+
+
+def _error_result(statement: str, reference: str, message: str, summary: str) -> dict:
+    return {
+        "statement": statement,
+        "reference": reference,
+        "validation_result": "Error",
+        "matched_evidence": message,
+        "page_location": "N/A",
+        "confidence_score": 0.0,
+        "analysis_summary": summary
+    }
+
+
+def _fan_out(statement: str, tasks: List[Callable[[], dict]], references: list,
+             on_result: Optional[Callable[[int, str, dict], None]] = None) -> List[dict]:
     """
-    Validate a single statement against MULTIPLE PDFs.
+    Run one task per PDF concurrently and return their results in input order.
+
+    Request pacing is left to the shared rate limiter, so the pool can be as
+    wide as the number of PDFs (capped by MANUAL_REVIEW_WORKERS, default 8).
+    on_result(index, reference, result) is called as each PDF finishes.
+    """
+    results = [None] * len(tasks)
+    workers = max(1, min(len(tasks), int(os.getenv("MANUAL_REVIEW_WORKERS", "8"))))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="manual-review") as pool:
+        futures = {pool.submit(task): idx for idx, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            idx = futures[future]
+            ref_label = references[idx]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"[MANUAL REVIEW MULTI] [{idx + 1}] ERROR: {str(e)}")
+                result = _error_result(statement, ref_label, f"Request failed: {str(e)}", f"Error during validation: {str(e)}")
+            logger.info(f"[MANUAL REVIEW MULTI] [{idx + 1}/{len(tasks)}] {ref_label}: {result.get('validation_result', 'Unknown')}")
+            results[idx] = result
+            if on_result is not None:
+                on_result(idx, ref_label, result)
+    return results
+
+
+def validate_manual_review_multi(statement: str, pdf_files: list, references: list, client=None,
+                                 on_result: Optional[Callable[[int, str, dict], None]] = None) -> dict:
+    """
+    Validate a single statement against MULTIPLE PDFs, concurrently.
     Mirrors the aggregation logic from Gemini_version.validate_statement_against_all_papers.
     
     Args:
         statement: The claim to validate
         pdf_files: List of Gemini-uploaded PDF file objects
         references: List of reference labels (one per PDF)
+        client: GeminiClient to use (defaults to the shared review client)
+        on_result: Optional callback(index, reference, result) as each PDF finishes
     
     Returns:
         Aggregated result dict with combined evidence from all PDFs
     """
     logger.info(f"[MANUAL REVIEW MULTI] Validating against {len(pdf_files)} PDFs")
-    
-    individual_results = []
-    
-    for idx, (pdf_file, ref_label) in enumerate(zip(pdf_files, references), 1):
+
+    tasks = [
+        (lambda pdf_file=pdf_file, ref_label=ref_label: validate_manual_review(statement, pdf_file, ref_label, client=client))
+        for pdf_file, ref_label in zip(pdf_files, references)
+    ]
+    individual_results = _fan_out(statement, tasks, references, on_result)
+    return aggregate_manual_results(statement, individual_results, references)
+
+
+def review_statement(statement: str, pdf_files_data: List[Tuple[str, Any]], reference_no: Optional[str] = None,
+                     client=None, on_result: Optional[Callable[[int, str, dict], None]] = None) -> dict:
+    """
+    Upload and validate each PDF in its own worker, then aggregate.
+
+    Each PDF is uploaded and checked independently, so total latency is close
+    to the slowest single PDF rather than the sum. A failed upload becomes an
+    "Error" result for that PDF only.
+
+    Args:
+        statement: The claim to validate
+        pdf_files_data: (filename, bytes or UploadedDocument) per reference PDF; a
+            document's bytes are loaded inside its worker
+        reference_no: Label used when a single PDF is reviewed
+        client: GeminiClient to use (defaults to the shared review client)
+        on_result: Optional callback(index, reference, result) as each PDF finishes
+
+    Returns:
+        The PDF's result for a single PDF, otherwise the aggregated result
+    """
+    client = client or get_review_client()
+    if reference_no and len(pdf_files_data) == 1:
+        references = [reference_no]
+    else:
+        references = [filename for filename, _ in pdf_files_data]
+
+    def _review_one(filename: str, content, ref_label: str) -> dict:
+        started = time.perf_counter()
         try:
-            # Throttle to avoid rate limiting
-            if idx > 1:
-                time.sleep(0.5)
-            
-            logger.info(f"[MANUAL REVIEW MULTI] [{idx}/{len(pdf_files)}] Validating against: {ref_label}")
-            result = validate_manual_review(statement, pdf_file, ref_label)
-            individual_results.append(result)
-            logger.info(f"[MANUAL REVIEW MULTI] [{idx}] Result: {result.get('validation_result', 'Unknown')}")
-            
+            if hasattr(content, "read_bytes"):
+                content = content.read_bytes()
+            # Shared client: keep its compaction report from growing across requests
+            pdf_file = client.upload_pdf_to_gemini(content, filename, record_compaction=False)
         except Exception as e:
-            logger.error(f"[MANUAL REVIEW MULTI] [{idx}] ERROR: {str(e)}")
-            individual_results.append({
-                "statement": statement,
-                "reference": ref_label,
-                "validation_result": "Error",
-                "matched_evidence": f"Request failed: {str(e)}",
-                "page_location": "N/A",
-                "confidence_score": 0.0,
-                "analysis_summary": f"Error during validation: {str(e)}"
-            })
-    
+            logger.error(f"[MANUAL REVIEW] Upload of {filename} failed: {str(e)}")
+            return _error_result(statement, ref_label, f"Upload failed: {str(e)}", f"Could not upload {filename} to Gemini: {str(e)}")
+        result = validate_manual_review(statement, pdf_file, ref_label, client=client)
+        logger.info(f"[MANUAL REVIEW] {filename} done in {time.perf_counter() - started:.1f}s")
+        return result
+
+    logger.info(f"[MANUAL REVIEW] Reviewing against {len(pdf_files_data)} PDFs")
+    tasks = [
+        (lambda filename=filename, content=content, ref_label=ref_label: _review_one(filename, content, ref_label))
+        for (filename, content), ref_label in zip(pdf_files_data, references)
+    ]
+    individual_results = _fan_out(statement, tasks, references, on_result)
+    return aggregate_manual_results(statement, individual_results, references)
+
+
+def aggregate_manual_results(statement: str, individual_results: List[dict], references: list) -> dict:
+    """
+    Combine per-PDF results into one (a single result is returned unchanged).
+
+    Priority: Supported > Contradicted > Not Found > Error
+    """
     # If only one PDF, return its result directly
     if len(individual_results) == 1:
         return individual_results[0]
@@ -105,24 +201,28 @@ def validate_manual_review_multi(statement: str, pdf_files: list, references: li
         "page_location": combined_page_location,
         "confidence_score": round(avg_confidence, 4),
         "analysis_summary": combined_analysis,
-        "pdfs_checked": len(pdf_files),
+        "pdfs_checked": len(individual_results),
         "pdfs_supporting": len(supported)
     }
     
-    logger.info(f"[MANUAL REVIEW MULTI] Final: {final_result} ({avg_confidence:.0%}) from {len(pdf_files)} PDFs")
+    logger.info(f"[MANUAL REVIEW MULTI] Final: {final_result} ({avg_confidence:.0%}) from {len(individual_results)} PDFs")
     return aggregated
 
 
-def validate_manual_review(statement: str, pdf_file, reference: str) -> dict:
+def validate_manual_review(statement: str, pdf_file, reference: str, client=None) -> dict:
     """
     Enhanced validation specifically for manual review requests.
     Uses the GeminiClient to process a single statement against a PDF.
     """
     
-    # Initialize client (will load API key from .env)
-    client = GeminiClient()
+    # Reuse the warm process-wide client instead of building (and pinging) a new one per call
+    if client is None:
+        try:
+            client = get_review_client()
+        except Exception:
+            client = None
     
-    if not client.client:
+    if client is None or not client.client:
         logger.error("[MANUAL REVIEW] Gemini client failed to initialize")
         return {
             "statement": statement,
@@ -167,49 +267,23 @@ CRITICAL RULES:
 """
 
     try:
-        # Query Gemini using the pdf_file reference
-        response_text = client._query_llm_with_pdf(prompt, pdf_file, temperature=0.1, max_output_tokens=2048)
-        
-        # Clean up response text if it has markdown blocks
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        
-        try:
-            parsed = json.loads(response_text)
-            
-            # Ensure matched_evidence is a string
-            if isinstance(parsed.get("matched_evidence"), list):
-                parsed["matched_evidence"] = " | ".join([str(e).strip() for e in parsed["matched_evidence"] if e])
-            
-            parsed["statement"] = statement
-            parsed["reference"] = reference
-            return parsed
-            
-        except json.JSONDecodeError:
-            # Fallback parsing for partial JSON
-            logger.warning(f"[MANUAL REVIEW] JSON parse failed, attempting fallback")
-            start = response_text.find('{')
-            end = response_text.rfind('}')
-            if start != -1 and end != -1:
-                try:
-                    parsed = json.loads(response_text[start:end+1])
-                    parsed["statement"] = statement
-                    parsed["reference"] = reference
-                    return parsed
-                except:
-                    pass
-            
-            return {
-                "statement": statement,
-                "reference": reference,
-                "validation_result": "Manual Review Required",
-                "matched_evidence": response_text[:500],
-                "page_location": "N/A",
-                "confidence_score": 0.5,
-                "analysis_summary": "Response received but could not be parsed into structured format."
-            }
+        # Query Gemini using the pdf_file reference; an unparseable reply is re-requested once
+        for attempt in range(2):
+            response_text = client._query_llm_with_pdf(prompt, pdf_file, temperature=0.1, max_output_tokens=2048)
+            parsed = client._parse_verdict(response_text, statement, reference)
+            if parsed is not None:
+                return parsed
+            logger.warning(f"[MANUAL REVIEW] JSON parse failed (attempt {attempt + 1}/2)")
+
+        return {
+            "statement": statement,
+            "reference": reference,
+            "validation_result": "Manual Review Required",
+            "matched_evidence": response_text[:500],
+            "page_location": "N/A",
+            "confidence_score": 0.5,
+            "analysis_summary": "Response received but could not be parsed into structured format."
+        }
             
     except Exception as e:
         logger.error(f"[MANUAL REVIEW] Error: {str(e)}")
@@ -1,5 +1,6 @@
 import fitz 
 import re
+from references_parser import parse_references
 
 def extract_text_from_pdf(pdf_file):
     """Extract text from PDF using PyMuPDF"""
@@ -24,20 +25,5 @@ def clean_references_text(text):
     return refs_text.strip()
 
 def extract_references(text):
-    """Extract references by capturing from each number until the next number."""
-    refs_text = clean_references_text(text)
-    if not refs_text:
-        return {}
-
-    pattern = r"(\d{1,2})[.)]\s+(.*?)(?=\s+\d{1,2}[.)]\s+|$)"
-    matches = re.findall(pattern, refs_text, flags=re.DOTALL)
-
-    references = {}
-    for num, ref_text in matches:
-        ref_text = ref_text.replace("\n", " ")
-        ref_text = re.sub(r"\s+", " ", ref_text).strip()
-        references[num] = ref_text
-
-    return references
-
-
+    """Extract numbered references in a single pass (see references_parser.py)."""
+    return parse_references(text)
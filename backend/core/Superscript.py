@@ -1,13 +1,16 @@
 import re
 import json
 import os
+import contextvars
 import sys
-from typing import List, Optional, Union, Dict
-from pydantic import BaseModel, Field, ValidationError
+from typing import Callable, List, Optional, Union, Dict
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 from dotenv import load_dotenv
 import fitz  # PyMuPDF
 import logging
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 # Get the root logger
 logger = logging.getLogger(__name__)
@@ -23,35 +26,17 @@ except ImportError:
     except ImportError:
         pass  # Will be handled by gemini_client
 
-# 1. Configure Gemini API using gemini_client
-from gemini_client import configure_gemini
-
-client = configure_gemini("parsing")
+# 1. Gemini client is created lazily per process by gemini_client (no import-time side effects)
+from gemini_client import get_gemini_client, get_rate_limiter
+from native_citations import DEFAULT_CONFIDENCE_THRESHOLD, scan_document
+from page_triage import CATEGORY_TABLE, classify_page
+from native_tables import DEFAULT_CONFIDENCE_THRESHOLD as GRID_CONFIDENCE_THRESHOLD, extract_grid_pages
+from extraction_cache import get_extraction_cache, page_content_hash, prompt_version
+from references_parser import FOOTER_RE, find_references_section, parse_references
+from json_salvage import salvage_json, validate_items
+from page_payload import PDF_MIME, PagePayload, build_page_payload
 
 # --- Drug Superscript Table Extraction ---
-def clean_json_string(s):
-    """
-    Robustly clean LLM output to extract a valid JSON string.
-    """
-    if not s: return "[]"
-    
-    # Clean markdown and whitespace
-    s = s.strip()
-    if s.startswith("```"):
-        m = re.search(r"```(?:json)?\n?(.*?)```", s, re.DOTALL)
-        if m:
-            s = m.group(1).strip()
-        else:
-            s = s.strip('`').strip()
-    
-    # Basic structural repair if needed
-    if s.count('{') > s.count('}'):
-        s += '}' * (s.count('{') - s.count('}'))
-    if s.count('[') > s.count(']'):
-        s += ']' * (s.count('[') - s.count(']'))
-    
-    return s
-
 # --- Pydantic Models ---
 
 class Footnote(BaseModel):
@@ -72,6 +57,26 @@ class DocumentExtraction(BaseModel):
     in_text: List[InlineCitation] = []
     references: Dict[str, str] = {}
 
+class DrugTableRow(BaseModel):
+    """Loose schema used to validate each row returned by the drug table prompt."""
+    model_config = ConfigDict(extra="allow")
+    page_number: Optional[Union[int, str]] = None
+    row_name: str
+    superscript_number: Optional[Union[str, int]] = None
+    ph_value: Optional[Union[str, float]] = None
+    column_name: Optional[str] = None
+    mark_type: Optional[str] = None
+    statement: Optional[str] = None
+    superscript_in_statement: Optional[Union[str, int]] = None
+
+class RawCitation(BaseModel):
+    """Loose schema used to validate each citation returned by the footnote prompt."""
+    model_config = ConfigDict(extra="allow")
+    page_number: Optional[Union[int, str]] = None
+    superscript_number: Union[str, int]
+    heading: Optional[str] = None
+    statement: str
+
 # --- Reference Extraction Functions ---
 
 def extract_text_from_pdf(pdf_path: str) -> str:
@@ -87,63 +92,17 @@ def extract_text_from_pdf(pdf_path: str) -> str:
         return ""
 
 def clean_references_text(text: str) -> str:
-    """Extract only References section and stop at BD footer."""
-    start = re.search(r"References\s*(.*)", text, flags=re.IGNORECASE | re.DOTALL)
-    if not start:
-        return ""
-    
-    refs_text = start.group(1)
-
-    # Stop at common footer patterns
-    stop = re.search(
-        r"(BD, the BD Logo|Becton, Dickinson|©|Copyright|All rights reserved)", 
-        refs_text, 
-        flags=re.IGNORECASE
-    )
-    if stop:
-        refs_text = refs_text[:stop.start()]
-
-    return refs_text.strip()
+    """Extract only the References section (located from the end of the document), without footers."""
+    lines = find_references_section(text)
+    return "\n".join(line for line in lines if not FOOTER_RE.search(line)).strip()
 
 def extract_references_from_text(text: str) -> Dict[str, str]:
-    """Extract references by capturing from each number until the next number."""
-    refs_text = clean_references_text(text)
-    if not refs_text:
-        return {}
-
-    # Pattern to match numbered references (e.g., 1. or 1) or 1-)
-    pattern = r"(\d{1,3})[.)]\s+(.*?)(?=\s+\d{1,3}[.)]\s+|$)"
-    matches = re.findall(pattern, refs_text, flags=re.DOTALL)
-
-    references = {}
-    for num, ref_text in matches:
-        # Clean up the reference text
-        ref_text = ref_text.replace("\n", " ")
-        ref_text = re.sub(r"\s+", " ", ref_text).strip()
-        references[num] = ref_text
-
-    return references
+    """Extract numbered references in a single pass (see references_parser.py)."""
+    return parse_references(text)
 
 # --- Drug Superscript Table Extraction ---
 
-def extract_drug_superscript_table_data(pdf_path: str) -> list:
-    """
-    Extracts drug superscript and table data for both table types (as described in requirements).
-    Processed PAGE-BY-PAGE to avoid output token limits.
-    """
-    import time
-    all_extracted_data = []
-
-    # Open valid PDF
-    try:
-        doc = fitz.open(pdf_path)
-    except Exception as e:
-        raise ValueError(f"Could not open PDF: {e}")
-
-    total_pages = len(doc)
-    logger.info(f"[INFO] Processing {total_pages} pages individually to avoid token limits...")
-
-    prompt = '''
+DRUG_TABLE_PROMPT = '''
 You are a VISION-BASED data extractor for pharmaceutical tables.
 This is ONE PAGE from a PDF. Extract every row from the table on this page into a JSON array.
 
@@ -178,97 +137,560 @@ This is ONE PAGE from a PDF. Extract every row from the table on this page into
   }
 ]
 '''
-    # Reduced model list for speed, prioritizing flash for simple extraction
-    models_to_try = ["gemini-2.0-flash"]
-    
-    for page_idx in range(total_pages):
-        # Create single page PDF in memory
-        new_doc = fitz.open()
-        new_doc.insert_pdf(doc, from_page=page_idx, to_page=page_idx)
-        pdf_bytes = new_doc.tobytes()
-        new_doc.close()
-        
-        real_page_num = page_idx + 1
-        print(f"   [PAGE {real_page_num}/{total_pages}] Extracting...", end="\r")
 
-        response = None
-        last_error = None
-        
-        # Retry with different models if one fails
-        for model_id in models_to_try:
-            try:
-                # Detect API version
-                if hasattr(client, "models"):
-                    # New API
-                    response = client.models.generate_content(
-                        model=model_id,
-                        contents=[
-                            types.Part.from_bytes(data=pdf_bytes, mime_type="application/pdf"),
-                            prompt
-                        ],
-                        config=types.GenerateContentConfig(
-                            temperature=0.0,
-                            response_mime_type="application/json",
-                            max_output_tokens=8192
-                        )
-                    )
-                else:
-                    # Legacy API
-                    model = client.GenerativeModel(model_name=model_id)
-                    response = model.generate_content([
-                        {"mime_type": "application/pdf", "data": pdf_bytes},
+# Reduced model list for speed, prioritizing flash for simple extraction
+EXTRACTION_MODELS = ["gemini-2.0-flash"]
+
+# Appended to DRUG_TABLE_PROMPT when several small pages are packed into one request
+DRUG_BATCH_PROMPT_SUFFIX = '''
+--- MULTI-PAGE INPUT ---
+This PDF actually contains {page_count} pages. Ignore "ONE PAGE" above and extract the rows of EVERY page.
+Set "page_number" to the 1-based position of the page inside THIS PDF (1 to {page_count}), NOT the printed footer number.
+'''
+
+# Cached page results are only reused while the prompts and models are unchanged
+DRUG_PROMPT_VERSION = prompt_version(DRUG_TABLE_PROMPT, DRUG_BATCH_PROMPT_SUFFIX, *EXTRACTION_MODELS)
+
+# Output-size model used by the batch packer (Gemini caps output at 8192 tokens)
+ROW_OUTPUT_TOKENS = 90        # one JSON row object, roughly
+BATCH_BASE_TOKENS = 40        # array brackets and per-request slack
+TEXT_CHARS_PER_ROW = 120      # fallback when find_tables() sees no table
+
+
+class PageExtractionError(Exception):
+    """Raised when a single page could not be extracted or parsed."""
+
+
+class BatchOutputError(PageExtractionError):
+    """Multi-page output was truncated or could not be mapped back to pages; split and retry."""
+
+
+class PartialBatchError(BatchOutputError):
+    """
+    Multi-page output was truncated after some pages were complete.
+
+    `partial` holds the results of the complete pages; only `missing` pages
+    need to be requested again.
+    """
+
+    def __init__(self, message: str, partial, missing: List[int]):
+        super().__init__(message)
+        self.partial = partial
+        self.missing = missing
+
+
+def _salvage_items(text: str, model, label: str):
+    """
+    Recover every valid item from a (possibly truncated) JSON array response.
+
+    Returns (items, lost, truncated); items are plain dicts that passed `model`
+    validation and lost describes each item that was dropped. Raises
+    PageExtractionError when the response holds no JSON at all.
+    """
+    result = salvage_json(text)
+    if result.kind == "array":
+        raw_items = result.value
+    elif result.kind == "object":
+        raw_items = result.value.get("statements", [result.value])
+    else:
+        reason = result.lost[0]["reason"] if result.lost else "not a JSON array"
+        raise PageExtractionError(f"JSON parsing failed: {reason}")
+
+    if not isinstance(raw_items, list):
+        raw_items = []
+    raw_items = [item for item in raw_items if isinstance(item, dict)]
+    valid, rejected = validate_items(raw_items, model)
+    lost = result.lost + [{"index": r["index"], "reason": r["reason"], "fragment": json.dumps(r["item"])[:200]} for r in rejected]
+    if lost:
+        logger.warning(f"[EXTRACTION] {label}: recovered {len(valid)} items, lost {len(lost)}: "
+                       f"{[(item['index'], item['reason']) for item in lost]}")
+    return [item.model_dump() for item in valid], lost, result.truncated
+
+
+def _complete_prefix(pages: List[int], positions: List[int]) -> int:
+    """
+    Number of leading pages of a truncated multi-page response that are complete.
+
+    Output is page ordered, so every page before the last one seen is complete
+    (pages without rows simply produced none); the last page seen may have been
+    cut off. Unordered output gives 0, i.e. nothing can be trusted.
+    """
+    if not positions or positions != sorted(positions):
+        return 0
+    return min(positions[-1], len(pages)) - 1
+
+
+def _generate_json_response(pdf_bytes: bytes, prompt: str, max_output_tokens: int = 8192, mime_type: str = PDF_MIME):
+    """
+    Send one PDF (or page image) payload plus prompt to Gemini and return the raw response.
+
+    Every attempt goes through the shared rate limiter; a 429 pauses all
+    callers in the process rather than just this thread.
+    """
+    limiter = get_rate_limiter()
+    client = get_gemini_client("parsing")
+    response = None
+    last_error = None
+
+    # Retry with different models if one fails
+    for model_id in EXTRACTION_MODELS:
+        limiter.acquire()
+        try:
+            # Detect API version
+            if hasattr(client, "models"):
+                # New API
+                response = client.models.generate_content(
+                    model=model_id,
+                    contents=[
+                        types.Part.from_bytes(data=pdf_bytes, mime_type=mime_type),
                         prompt
                     ],
-                    generation_config={"temperature": 0.0, "response_mime_type": "application/json", "max_output_tokens": 8192}
+                    config=types.GenerateContentConfig(
+                        temperature=0.0,
+                        response_mime_type="application/json",
+                        max_output_tokens=max_output_tokens
                     )
-                
-                if response:
-                    break
-                    
-            except Exception as e:
-                # Simple rate limit handling
-                if "429" in str(e):
-                    time.sleep(2)
-                last_error = e
-                continue
-        
-        if not response:
-             logger.error(f"[EXTRACTION] Failed to extract page {real_page_num}: {last_error}")
-             continue
+                )
+            else:
+                # Legacy API
+                model = client.GenerativeModel(model_name=model_id)
+                response = model.generate_content([
+                    {"mime_type": mime_type, "data": pdf_bytes},
+                    prompt
+                ],
+                generation_config={"temperature": 0.0, "response_mime_type": "application/json", "max_output_tokens": max_output_tokens}
+                )
+
+            if response:
+                return response
+
+        except Exception as e:
+            # Rate limit handling is shared across all workers
+            if "429" in str(e):
+                limiter.back_off(2)
+            last_error = e
+            continue
+
+    raise PageExtractionError(f"No response from Gemini: {last_error}")
+
+
+def _is_truncated(response) -> bool:
+    """True if Gemini stopped because it hit max_output_tokens."""
+    try:
+        finish_reason = response.candidates[0].finish_reason
+    except Exception:
+        return False
+    return "MAX_TOKENS" in str(getattr(finish_reason, "name", finish_reason)) or finish_reason == 2
+
+
+def _slice_pdf(doc, page_nums: List[int]) -> bytes:
+    """Serialize the given 1-based pages of `doc` into a standalone (compacted) PDF."""
+    return build_page_payload(doc, page_nums, allow_raster=False).data
+
+
+class _BatchPacker:
+    """
+    Greedy packer that groups consecutive small pages into one Gemini request.
+
+    Each page's expected output is estimated from its table row count (or text
+    length when no table is detected), scaled by a calibration factor learnt
+    from the rows earlier batches actually returned. Batches are packed lazily,
+    one at a time, so later batches benefit from the yield of earlier ones.
+    """
+
+    def __init__(self, profiles: Dict[int, dict], token_budget: int, max_pages: int):
+        self.profiles = profiles
+        self.token_budget = token_budget
+        self.max_pages = max(1, max_pages)
+        self.pending = deque(sorted(profiles))
+        self.split_queue = deque()
+        self.calibration = 1.0
+        self.issued = 0
+        self._estimated_rows = 0.0
+        self._observed_rows = 0
+
+    def _raw_rows(self, page_num: int) -> float:
+        profile = self.profiles[page_num]
+        if profile["table_rows"]:
+            return float(profile["table_rows"])
+        return profile["text_chars"] / TEXT_CHARS_PER_ROW
+
+    def estimate_tokens(self, page_num: int) -> float:
+        return BATCH_BASE_TOKENS + self._raw_rows(page_num) * self.calibration * ROW_OUTPUT_TOKENS
+
+    def next_batch(self) -> Optional[List[int]]:
+        if self.split_queue:
+            self.issued += 1
+            return self.split_queue.popleft()
+        if not self.pending:
+            return None
 
-        # Parse Response
+        self.issued += 1
+        batch = [self.pending.popleft()]
+        used = self.estimate_tokens(batch[0])
+        while self.pending and len(batch) < self.max_pages:
+            cost = self.estimate_tokens(self.pending[0])
+            if used + cost > self.token_budget:
+                break
+            batch.append(self.pending.popleft())
+            used += cost
+        return batch
+
+    def record_yield(self, batch: List[int], rows: int):
+        """Update the calibration factor from a successful batch."""
+        self._estimated_rows += sum(self._raw_rows(p) for p in batch)
+        self._observed_rows += rows
+        if self._estimated_rows > 0:
+            self.calibration = min(4.0, max(0.25, self._observed_rows / self._estimated_rows))
+
+    def requeue(self, pages: List[int]):
+        """Re-queue the unfinished tail of a truncated batch, ahead of new work."""
+        self.split_queue.appendleft(pages)
+        self.calibration = min(4.0, self.calibration * 1.5)
+
+    def split(self, batch: List[int]):
+        """Re-queue both halves of a batch whose output did not fit, ahead of new work."""
+        mid = len(batch) // 2
+        self.split_queue.appendleft(batch[mid:])
+        self.split_queue.appendleft(batch[:mid])
+        # The estimate was too optimistic; pack more conservatively from here on
+        self.calibration = min(4.0, self.calibration * 1.5)
+
+
+def _extract_drug_batch(pages: List[int], payload: PagePayload):
+    """
+    Extract the table rows of a 1..N page PDF slice (or a single page image).
+
+    Returns ({real page number: rows}, lost items). A truncated multi-page
+    response raises PartialBatchError with the rows of the pages that were
+    complete, so only the remaining pages are requested again.
+    """
+    if len(pages) == 1:
+        prompt = DRUG_TABLE_PROMPT
+    else:
+        prompt = DRUG_TABLE_PROMPT + DRUG_BATCH_PROMPT_SUFFIX.format(page_count=len(pages))
+
+    response = _generate_json_response(payload.data, prompt, mime_type=payload.mime_type)
+    try:
+        rows, lost, cut_off = _salvage_items(response.text, DrugTableRow, f"Pages {pages}")
+    except PageExtractionError as e:
+        if len(pages) > 1:
+            raise BatchOutputError(f"{e} for pages {pages}")
+        raise
+    truncated = _is_truncated(response) or cut_off
+
+    by_page = {page_num: [] for page_num in pages}
+    positions = []
+    for item in rows:
+        if len(pages) == 1:
+            page_num = pages[0]
+        else:
+            try:
+                position = int(str(item.get("page_number")).strip())
+            except (TypeError, ValueError):
+                position = 0
+            if not 1 <= position <= len(pages):
+                raise BatchOutputError(f"row with unmappable page_number {item.get('page_number')!r} in pages {pages}")
+            page_num = pages[position - 1]
+            positions.append(position)
+
+        # Override/Verify page number
+        item["page_number"] = page_num
+        by_page[page_num].append(item)
+
+    if truncated and len(pages) > 1:
+        complete = _complete_prefix(pages, positions)
+        if not complete:
+            raise BatchOutputError(f"output truncated for pages {pages}")
+        raise PartialBatchError(
+            f"output truncated after page {pages[complete - 1]} of {pages}",
+            partial={p: by_page[p] for p in pages[:complete]},
+            missing=pages[complete:],
+        )
+
+    if truncated:
+        logger.warning(f"[EXTRACTION] Page {pages[0]} output hit the token limit; keeping {len(rows)} complete rows")
+
+    return by_page, lost
+
+
+def _run_batch_pool(doc, packer: _BatchPacker, max_workers: int, timings: Dict[int, dict], total_pages: int,
+                    payloads: Optional[List[dict]] = None, on_items: Optional[Callable[[list], None]] = None) -> Dict[int, list]:
+    """
+    Extract the packer's pages on a bounded thread pool.
+
+    Batches are packed and sliced on the calling thread just before submission
+    (PyMuPDF is not thread-safe) while up to `max_workers` requests are in
+    flight. Returns {page_num: rows} for pages that succeeded; failures are
+    recorded in `timings` with status "failed" so the caller can retry them.
+    The payload chosen for every request is appended to `payloads`, and the
+    rows of every finished page are passed to `on_items` as soon as they arrive.
+    """
+    results = {}
+    in_flight = {}
+
+    def _timed(batch, payload):
+        started = time.perf_counter()
         try:
-            resp = clean_json_string(response.text)
-            page_data = json.loads(resp)
-            if isinstance(page_data, list):
-                # Ensure page number is correct
-                for item in page_data:
-                    # Override/Verify page number 
-                    item["page_number"] = real_page_num
-                
-                all_extracted_data.extend(page_data)
-            
+            return _extract_drug_batch(batch, payload), None, time.perf_counter() - started
         except Exception as e:
-             # Just log error and continue to next page
-             logger.error(f"[EXTRACTION] JSON Parsing failed for page {real_page_num}: {e}")
-             continue
+            return (None, []), e, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="drug-extract") as pool:
+
+        def _fill():
+            while len(in_flight) < max_workers:
+                batch = packer.next_batch()
+                if batch is None:
+                    return
+                payload = build_page_payload(doc, batch)
+                if payloads is not None:
+                    payloads.append({"pages": batch, **payload.as_audit()})
+                for page_num in batch:
+                    entry = timings.setdefault(page_num, {"page": page_num, "attempts": 0, "seconds": 0.0})
+                    entry["payload"] = payload.as_audit()
+                # Run in the caller's context, so log records keep their job tag
+                in_flight[pool.submit(contextvars.copy_context().run, _timed, batch, payload)] = batch
+
+        _fill()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = in_flight.pop(future)
+                (by_page, lost), error, elapsed = future.result()
+
+                for page_num in batch:
+                    entry = timings.setdefault(page_num, {"page": page_num, "attempts": 0, "seconds": 0.0})
+                    entry["attempts"] += 1
+                    entry["seconds"] = round(entry["seconds"] + elapsed, 3)
+                    entry["batch_size"] = len(batch)
+
+                if isinstance(error, PartialBatchError):
+                    logger.info(f"[EXTRACTION] Keeping pages {sorted(error.partial)}, re-requesting {error.missing}: {error}")
+                    for page_num, rows in error.partial.items():
+                        results[page_num] = rows
+                        timings[page_num].update(status="ok", rows=len(rows))
+                        timings[page_num].pop("error", None)
+                        if on_items is not None and rows:
+                            on_items(rows)
+                    packer.requeue(error.missing)
+                    continue
+
+                if error is not None:
+                    if len(batch) > 1:
+                        logger.info(f"[EXTRACTION] Splitting pages {batch} after {elapsed:.2f}s: {error}")
+                        packer.split(batch)
+                        continue
+                    entry = timings[batch[0]]
+                    entry["status"] = "failed"
+                    entry["error"] = str(error)
+                    logger.warning(f"[EXTRACTION] Page {batch[0]} failed after {elapsed:.2f}s: {error}")
+                    continue
+
+                packer.record_yield(batch, sum(len(rows) for rows in by_page.values()))
+                for page_num, rows in by_page.items():
+                    results[page_num] = rows
+                    entry = timings[page_num]
+                    entry["status"] = "ok"
+                    entry["rows"] = len(rows)
+                    entry.pop("error", None)
+                    if lost:
+                        entry["lost_items"] = lost
+                    if on_items is not None and rows:
+                        on_items(rows)
+                print(f"   [PAGES {batch[0]}-{batch[-1]}/{total_pages}] {sum(len(r) for r in by_page.values())} rows in {elapsed:.1f}s", end="\r")
+
+            _fill()
+
+    return results
+
+
+def extract_drug_superscript_table_data(pdf_path: str, max_workers: Optional[int] = None, stats: Optional[Dict] = None,
+                                        on_items: Optional[Callable[[list], None]] = None) -> list:
+    """
+    Extracts drug superscript and table data for both table types (as described in requirements).
+    Pages are packed into requests that stay under the output token limit.
+
+    Pages are extracted concurrently on a bounded worker pool (EXTRACTION_MAX_WORKERS,
+    default 4) fed by the shared Gemini rate limiter. Small pages are packed together
+    (up to EXTRACTION_MAX_PAGES_PER_BATCH pages, default 4, within
+    EXTRACTION_BATCH_TOKEN_BUDGET estimated output tokens, default 6000); a batch whose
+    output comes back truncated is split in half and retried. Only pages that still
+    fail are retried one at a time (EXTRACTION_PAGE_RETRIES passes, default 1), and
+    rows are merged in page order.
+
+    Before any request, each page is triaged locally (see page_triage.py) and
+    covers, legends, reference lists and blank pages are skipped; set
+    DRUG_PAGE_TRIAGE=0 to send every page. If triage keeps no page at all, every
+    page is sent rather than returning nothing.
+
+    Well-formed GRID tables are then read locally (see native_tables.py); only
+    statement tables and low-confidence pages go to Gemini. Set
+    DRUG_NATIVE_EXTRACTION=0 to send every kept page to the vision prompt.
+
+    Pages whose rendered content was already extracted with the current prompt
+    are served from the shared page cache (see extraction_cache.py), so a
+    revised brochure only costs requests for the pages that changed.
+
+    Each request carries the smallest legible payload (see page_payload.py): a
+    compacted PDF slice, or a JPEG of image-heavy single pages; the choice and
+    byte counts are kept in `stats`.
+
+    Args:
+        pdf_path: Path to the drug brochure PDF
+        max_workers: Pool size override; 1 gives sequential extraction
+        stats: Optional dict filled with per-page timings, request count, failed pages
+            and the triage decision for every page
+        on_items: Optional callback receiving each page's rows as soon as they are
+            final (native, cached or extracted), in completion order, on this thread
+
+    Returns:
+        List of extracted row dicts, ordered by page
+    """
+    started = time.perf_counter()
+
+    # Open valid PDF
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        raise ValueError(f"Could not open PDF: {e}")
+
+    total_pages = len(doc)
+
+    if max_workers is None:
+        max_workers = int(os.getenv("EXTRACTION_MAX_WORKERS", "4"))
+    max_workers = max(1, min(max_workers, total_pages or 1))
+    retry_passes = int(os.getenv("EXTRACTION_PAGE_RETRIES", "1"))
+    token_budget = int(os.getenv("EXTRACTION_BATCH_TOKEN_BUDGET", "6000"))
+    max_pages_per_batch = int(os.getenv("EXTRACTION_MAX_PAGES_PER_BATCH", "4"))
+
+    triage = [classify_page(page) for page in doc]
+    if os.getenv("DRUG_PAGE_TRIAGE", "1") == "0":
+        kept = triage
+    else:
+        kept = [t for t in triage if t.send_to_llm]
+        if not kept and triage:
+            logger.warning("[TRIAGE] No page classified as a table; sending all pages")
+            kept = triage
+    profiles = {t.page_number: t.signals for t in kept}
+
+    skipped = [t for t in triage if t.page_number not in profiles]
+    for decision in skipped:
+        logger.info(f"[TRIAGE] Skipping page {decision.page_number} ({decision.category}: {decision.reason})")
+
+    native_results = {}
+    native_scans = {}
+    if os.getenv("DRUG_NATIVE_EXTRACTION", "1") != "0":
+        threshold = float(os.getenv("DRUG_NATIVE_CONFIDENCE", str(GRID_CONFIDENCE_THRESHOLD)))
+        table_pages = [t.page_number for t in kept if t.category == CATEGORY_TABLE]
+        native_scans = extract_grid_pages(doc, table_pages, confidence_threshold=threshold)
+        for page_num, scan in native_scans.items():
+            if not scan.needs_llm:
+                native_results[page_num] = scan.rows
+                del profiles[page_num]
+        if on_items is not None:
+            for page_num in sorted(native_results):
+                if native_results[page_num]:
+                    on_items(native_results[page_num])
+        logger.info(
+            f"[EXTRACTION] Native pass: {sum(len(r) for r in native_results.values())} rows from "
+            f"{len(native_results)} pages; {len(profiles)} pages need the LLM"
+        )
+
+    cache = get_extraction_cache()
+    cache_keys = {}
+    cached_results = {}
+    if cache is not None:
+        for page_num in list(profiles):
+            key = cache.make_key(page_content_hash(doc[page_num - 1]), "drug_table", DRUG_PROMPT_VERSION)
+            rows = cache.get(key)
+            if rows is None:
+                cache_keys[page_num] = key
+            else:
+                cached_results[page_num] = [{**row, "page_number": page_num} for row in rows]
+                del profiles[page_num]
+        if cached_results:
+            logger.info(f"[EXTRACTION] {len(cached_results)} unchanged pages served from cache")
+        if on_items is not None:
+            for page_num in sorted(cached_results):
+                if cached_results[page_num]:
+                    on_items(cached_results[page_num])
+
+    logger.info(f"[INFO] Processing {len(profiles)}/{total_pages} pages with {max_workers} workers to avoid token limits...")
+
+    timings = {}
+    payloads = []
+    packer = _BatchPacker(profiles, token_budget, max_pages_per_batch)
+    requests_made = 0
+    try:
+        page_results = _run_batch_pool(doc, packer, max_workers, timings, total_pages, payloads, on_items)
+        requests_made += packer.issued
+
+        for attempt in range(retry_passes):
+            failed = [p for p in profiles if p not in page_results]
+            if not failed:
+                break
+            logger.info(f"[EXTRACTION] Retrying {len(failed)} failed pages (pass {attempt + 1}/{retry_passes}): {failed}")
+            retry_packer = _BatchPacker({p: profiles[p] for p in failed}, token_budget, max_pages=1)
+            page_results.update(_run_batch_pool(doc, retry_packer, max_workers, timings, total_pages, payloads, on_items))
+            requests_made += retry_packer.issued
+    finally:
+        doc.close()
+
+    failed_pages = sorted(p for p in profiles if p not in page_results)
+    for page_num, key in cache_keys.items():
+        if page_num in page_results:
+            cache.put(key, page_results[page_num])
+    page_results.update(native_results)
+    page_results.update(cached_results)
+    for page_num in failed_pages:
+        logger.error(f"[EXTRACTION] Failed to extract page {page_num}: {timings[page_num].get('error')}")
+
+    # Merge in page order regardless of completion order
+    all_extracted_data = []
+    for page_num in sorted(page_results):
+        all_extracted_data.extend(page_results[page_num])
+
+    wall_seconds = time.perf_counter() - started
+    page_seconds = [t["seconds"] for t in timings.values()]
+    logger.info(
+        f"[EXTRACTION] complete. Total records: {len(all_extracted_data)} | "
+        f"{len(native_results)} pages native, {len(cached_results)} cached, {len(profiles)} in {requests_made} requests "
+        f"({total_pages} total), {wall_seconds:.1f}s wall "
+        f"(slowest request {max(page_seconds, default=0):.1f}s) | failed pages: {failed_pages or 'none'}"
+    )
+
+    if stats is not None:
+        stats["total_pages"] = total_pages
+        stats["workers"] = max_workers
+        stats["requests"] = requests_made
+        stats["wall_seconds"] = round(wall_seconds, 3)
+        stats["failed_pages"] = failed_pages
+        stats["pages"] = [timings[p] for p in sorted(timings)]
+        stats["skipped_pages"] = [t.page_number for t in skipped]
+        stats["native_pages"] = sorted(native_results)
+        stats["cached_pages"] = sorted(cached_results)
+        stats["payload_bytes"] = sum(p["bytes"] for p in payloads)
+        stats["payload_original_bytes"] = sum(p["original_bytes"] for p in payloads)
+        stats["payload_kinds"] = {kind: sum(1 for p in payloads if p["kind"] == kind) for kind in sorted({p["kind"] for p in payloads})}
+        stats["triage"] = [
+            {**t.as_audit(), "sent_to_llm": t.page_number in profiles} for t in triage
+        ]
+        for entry in stats["triage"]:
+            scan = native_scans.get(entry["page"])
+            if scan is not None:
+                entry["native_confidence"] = scan.confidence
+                entry["native_reason"] = scan.reason
 
-    logger.info(f"[EXTRACTION] complete. Total records: {len(all_extracted_data)}")
-    
     # AUTO-SAVE RAW JSON for debugging
     dump_path = save_json(all_extracted_data, folder="output", filename="raw_extraction_dump.json")
     logger.info(f"[EXTRACTION] Raw dump saved to: {dump_path}")
     
     return all_extracted_data
 
-def extract_footnotes(pdf_path: str) -> DocumentExtraction:
-    with open(pdf_path, "rb") as f:
-        pdf_bytes = f.read()
-    
-    if not pdf_bytes:
-        raise ValueError("PDF is empty")
+# --- Footnote / In-text Citation Extraction ---
 
-    prompt = '''You are a specialized Vision Extractor for scientific PDF pages. Your goal is to extract EVERYTHING. You must be extremely granular and extract on a "Statement-By-Statement" basis so no superscript is missed.
+FOOTNOTE_PROMPT = '''You are a specialized Vision Extractor for scientific PDF pages. Your goal is to extract EVERYTHING. You must be extremely granular and extract on a "Statement-By-Statement" basis so no superscript is missed.
 
     Output a SINGLE JSON array. Each element must follow this schema:
     {
@@ -294,67 +716,344 @@ def extract_footnotes(pdf_path: str) -> DocumentExtraction:
     - **page_number**: The page number it appears on.
     '''
 
-    models_to_try = ["gemini-2.0-flash"]
-    response = None
-    last_error = None
+# Appended to FOOTNOTE_PROMPT when a long brochure is split into page windows
+FOOTNOTE_WINDOW_PROMPT_SUFFIX = '''
+    ### PAGE WINDOW:
+    This PDF is pages {first}-{last} of a longer brochure. It contains {page_count} pages.
+    Set "page_number" to the 1-based position of the page inside THIS PDF (1 to {page_count}), NOT the printed page number.
+    '''
 
-    for model_id in models_to_try:
-        try:
-            if hasattr(client, "models"):
-                response = client.models.generate_content(
-                    model=model_id,
-                    contents=[
-                        types.Part.from_bytes(data=pdf_bytes, mime_type="application/pdf"),
-                        prompt
-                    ],
-                    config=types.GenerateContentConfig(temperature=0.0, response_mime_type="application/json", max_output_tokens=8192)
-                )
-            else:
-                model = client.GenerativeModel(model_name=model_id)
-                response = model.generate_content([
-                    {"mime_type": "application/pdf", "data": pdf_bytes},
-                    prompt
-                ],
-                generation_config={"temperature": 0.0, "response_mime_type": "application/json", "max_output_tokens": 8192}
-                )
-            if response:
+FOOTNOTE_PROMPT_VERSION = prompt_version(FOOTNOTE_PROMPT, FOOTNOTE_WINDOW_PROMPT_SUFFIX, *EXTRACTION_MODELS)
+
+
+def _page_windows(pages: List[int], window: int, overlap: int) -> List[List[int]]:
+    """
+    Split a sorted list of 1-based pages into windows of `window` pages.
+
+    Each contiguous run of pages is windowed separately; consecutive windows
+    within a run share `overlap` pages.
+    """
+    window = max(1, window)
+    step = max(1, window - overlap)
+
+    runs = []
+    for page_num in pages:
+        if runs and page_num == runs[-1][-1] + 1:
+            runs[-1].append(page_num)
+        else:
+            runs.append([page_num])
+
+    windows = []
+    for run in runs:
+        start = 0
+        while True:
+            windows.append(run[start:start + window])
+            if start + window >= len(run):
                 break
-        except Exception as e:
-            last_error = e
+            start += step
+    return windows
+
+
+def _extract_footnote_window(pages: List[int], pdf_bytes: bytes, whole_document: bool):
+    """
+    Extract raw citation dicts from one page window, with real page numbers.
+
+    Returns (items, lost items). A truncated multi-page window raises
+    PartialBatchError with the citations of the complete leading pages.
+    """
+    if whole_document:
+        prompt = FOOTNOTE_PROMPT
+    else:
+        prompt = FOOTNOTE_PROMPT + FOOTNOTE_WINDOW_PROMPT_SUFFIX.format(
+            first=pages[0], last=pages[-1], page_count=len(pages)
+        )
+
+    response = _generate_json_response(pdf_bytes, prompt)
+    label = f"Pages {pages[0]}-{pages[-1]}"
+    try:
+        items, lost, cut_off = _salvage_items(response.text, RawCitation, label)
+    except PageExtractionError as e:
+        if len(pages) > 1:
+            raise BatchOutputError(f"{e} for pages {pages[0]}-{pages[-1]}")
+        raise
+    truncated = _is_truncated(response) or cut_off
+
+    positions = []
+    for item in items:
+        try:
+            position = int(str(item.get("page_number")).strip())
+        except (TypeError, ValueError):
+            position = 0
+        if whole_document:
+            if 1 <= position <= len(pages):
+                positions.append(position)
+                # Gemini often returns "3"; the partial-batch filter below compares page ints
+                item["page_number"] = pages[position - 1]
             continue
-    
-    if not response:
-        raise RuntimeError(f"Extraction failed: {last_error}")
+        positions.append(position if 1 <= position <= len(pages) else 1)
+        item["page_number"] = pages[positions[-1] - 1]
+
+    if truncated and len(pages) > 1:
+        complete = _complete_prefix(pages, positions)
+        if not complete:
+            raise BatchOutputError(f"output truncated for {label.lower()}")
+        done = set(pages[:complete])
+        raise PartialBatchError(
+            f"output truncated after page {pages[complete - 1]} of {pages[0]}-{pages[-1]}",
+            partial=[item for item in items if item.get("page_number") in done],
+            missing=pages[complete:],
+        )
+
+    return items, lost
 
-    resp_text = clean_json_string(response.text)
+
+def _citation_key(item: dict) -> tuple:
+    """Dedup key for citations seen in two overlapping windows."""
+    statement = re.sub(r"\s+", " ", str(item.get("statement") or "")).strip().lower()
+    superscript = re.sub(r"\s+", "", str(item.get("superscript_number") or ""))
+    return (item.get("page_number"), superscript, statement)
+
+
+def extract_footnotes(pdf_path: str, max_workers: Optional[int] = None, stats: Optional[Dict] = None,
+                      on_items: Optional[Callable[[list], None]] = None,
+                      on_references: Optional[Callable[[Dict[str, str]], None]] = None) -> DocumentExtraction:
+    """
+    Extract in-text superscript citations and the reference list from a brochure.
+
+    Born-digital pages are read locally from PyMuPDF span metadata (see
+    native_citations.py); only scanned or low-confidence pages go to Gemini.
+    Set FOOTNOTE_NATIVE_EXTRACTION=0 to send every page to the vision prompt.
+
+    LLM pages are split into windows of FOOTNOTE_WINDOW_PAGES (default 6)
+    overlapping by FOOTNOTE_WINDOW_OVERLAP pages (default 1), extracted concurrently
+    under the shared rate limiter, then merged and deduplicated on
+    (page, superscript, statement). A window whose output is truncated is split in
+    half and retried, so long compendia no longer lose citations to the 8192-token
+    output cap. References are still parsed once from the full text.
+
+    Citations of LLM pages are cached per page under the page's rendered content
+    hash (see extraction_cache.py); unchanged pages of a re-uploaded brochure are
+    not sent again.
+
+    Args:
+        pdf_path: Path to the brochure PDF
+        max_workers: Pool size override (default EXTRACTION_MAX_WORKERS)
+        stats: Optional dict filled with per-window timings, failed windows and
+            the native/LLM page split
+        on_items: Optional callback receiving InlineCitation lists as soon as a
+            window (or the native/cache pass) finishes, deduplicated, on this thread
+        on_references: Optional callback receiving the parsed references before
+            any citation is passed to on_items
+    """
+    started = time.perf_counter()
+
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
     
-    # Extract references separately
+    if not pdf_bytes:
+        raise ValueError("PDF is empty")
+
+    # References come from the text layer; parse them first so streaming consumers have them up front
     full_text = extract_text_from_pdf(pdf_path)
     references = extract_references_from_text(full_text)
+    if on_references is not None:
+        on_references(references)
 
-    try:
-        data = json.loads(resp_text)
-        
-        in_text_items = []
-        # Handle list vs dict with statements key
-        items = data if isinstance(data, list) else data.get("statements", [])
-        
+    emitted = set()
+
+    def _emit(items):
+        if on_items is None:
+            return
+        fresh = []
         for item in items:
+            dedup_key = _citation_key(item)
+            if dedup_key in emitted:
+                continue
+            emitted.add(dedup_key)
+            try:
+                fresh.append(InlineCitation(**item))
+            except Exception:
+                continue
+        if fresh:
+            on_items(fresh)
+
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    total_pages = len(doc)
+    window_size = int(os.getenv("FOOTNOTE_WINDOW_PAGES", "6"))
+    overlap = int(os.getenv("FOOTNOTE_WINDOW_OVERLAP", "1"))
+
+    native_items = []
+    llm_pages = list(range(1, total_pages + 1))
+    if os.getenv("FOOTNOTE_NATIVE_EXTRACTION", "1") != "0":
+        threshold = float(os.getenv("FOOTNOTE_NATIVE_CONFIDENCE", str(DEFAULT_CONFIDENCE_THRESHOLD)))
+        scans = scan_document(doc, confidence_threshold=threshold)
+        llm_pages = [scan.page_number for scan in scans if scan.needs_llm]
+        for scan in scans:
+            if not scan.needs_llm:
+                native_items.extend(scan.citations)
+        logger.info(
+            f"[FOOTNOTES] Native pass: {len(native_items)} citations from {total_pages - len(llm_pages)} pages; "
+            f"{len(llm_pages)} pages need the LLM: {llm_pages or 'none'}"
+        )
+
+    cache = get_extraction_cache()
+    cache_keys = {}
+    cached_items = []
+    cached_pages = []
+    if cache is not None:
+        for page_num in llm_pages:
+            key = cache.make_key(page_content_hash(doc[page_num - 1]), "footnotes", FOOTNOTE_PROMPT_VERSION)
+            items = cache.get(key)
+            if items is None:
+                cache_keys[page_num] = key
+            else:
+                cached_items.extend({**item, "page_number": page_num} for item in items)
+                cached_pages.append(page_num)
+        if cached_pages:
+            llm_pages = [p for p in llm_pages if p in cache_keys]
+            logger.info(f"[FOOTNOTES] {len(cached_pages)} unchanged pages served from cache")
+
+    windows = deque(_page_windows(llm_pages, window_size, overlap))
+
+    if max_workers is None:
+        max_workers = int(os.getenv("EXTRACTION_MAX_WORKERS", "4"))
+    max_workers = max(1, min(max_workers, len(windows) or 1))
+
+    logger.info(f"[FOOTNOTES] {len(llm_pages)} LLM pages in {len(windows)} windows with {max_workers} workers")
+
+    # Key (0, 0) holds citations that needed no request (native pass and cache hits)
+    prefilled = native_items + cached_items
+    window_results = {(0, 0): prefilled} if prefilled else {}
+    _emit(prefilled)
+    window_timings = {}
+    failed_windows = []
+
+    def _timed(pages, payload, whole_document):
+        window_started = time.perf_counter()
+        try:
+            return _extract_footnote_window(pages, payload, whole_document), None, time.perf_counter() - window_started
+        except Exception as e:
+            return (None, []), e, time.perf_counter() - window_started
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="footnote-extract") as pool:
+            in_flight = {}
+            attempts = {}
+
+            def _fill():
+                while windows and len(in_flight) < max_workers:
+                    pages = windows.popleft()
+                    whole_document = len(pages) == total_pages
+                    # Slices are built on this thread: PyMuPDF is not thread-safe
+                    payload = pdf_bytes if whole_document else _slice_pdf(doc, pages)
+                    # Run in the caller's context, so log records keep their job tag
+                    in_flight[pool.submit(contextvars.copy_context().run, _timed, pages, payload, whole_document)] = pages
+
+            _fill()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pages = in_flight.pop(future)
+                    key = (pages[0], pages[-1])
+                    (items, lost), error, elapsed = future.result()
+                    attempts[key] = attempts.get(key, 0) + 1
+                    window_timings[key] = {
+                        "pages": f"{pages[0]}-{pages[-1]}",
+                        "attempts": attempts[key],
+                        "seconds": round(window_timings.get(key, {}).get("seconds", 0.0) + elapsed, 3),
+                    }
+
+                    if error is None:
+                        window_results[key] = items
+                        _emit(items)
+                        window_timings[key]["citations"] = len(items)
+                        if lost:
+                            window_timings[key]["lost_items"] = lost
+                        logger.info(f"[FOOTNOTES] Pages {key[0]}-{key[1]}: {len(items)} citations in {elapsed:.1f}s")
+                    elif isinstance(error, PartialBatchError):
+                        # Keep the complete leading pages under their own key; request only the rest
+                        done_key = (pages[0], error.missing[0] - 1)
+                        window_results[done_key] = error.partial
+                        _emit(error.partial)
+                        window_timings[key]["citations"] = len(error.partial)
+                        logger.info(f"[FOOTNOTES] Pages {key[0]}-{key[1]}: {error}; re-requesting {error.missing[0]}-{error.missing[-1]}")
+                        windows.appendleft(error.missing)
+                    elif isinstance(error, BatchOutputError):
+                        mid = len(pages) // 2
+                        logger.info(f"[FOOTNOTES] Splitting pages {key[0]}-{key[1]}: {error}")
+                        windows.appendleft(pages[mid:])
+                        windows.appendleft(pages[:mid])
+                    elif attempts[key] < 2:
+                        logger.warning(f"[FOOTNOTES] Pages {key[0]}-{key[1]} failed, retrying: {error}")
+                        windows.append(pages)
+                    else:
+                        window_timings[key]["error"] = str(error)
+                        failed_windows.append(key)
+                        logger.error(f"[FOOTNOTES] Pages {key[0]}-{key[1]} failed: {error}")
+                _fill()
+    finally:
+        doc.close()
+
+    if llm_pages and not window_results:
+        errors = [t.get("error") for t in window_timings.values() if t.get("error")]
+        raise RuntimeError(f"Extraction failed: {errors[-1] if errors else 'no output'}")
+    
+    # Merge windows in page order, dropping citations repeated in overlap pages
+    in_text_items = []
+    seen = set()
+    for key in sorted(window_results):
+        for item in window_results[key]:
+            dedup_key = _citation_key(item)
+            if dedup_key in seen:
+                continue
+            seen.add(dedup_key)
             try:
                 in_text_items.append(InlineCitation(**item))
             except:
                 continue
-                
-        return DocumentExtraction(
-            title=None,
-            author=None,
-            footnotes=[],
-            in_text=in_text_items,
-            references=references
-        )
-    except Exception as e:
-        logger.error(f"Failed to parse JSON: {str(e)}")
-        raise e
+    in_text_items.sort(key=lambda c: c.page_number)
+
+    if cache is not None:
+        # Only pages covered by a window that succeeded are cached (empty pages included)
+        page_items = {}
+        for first, last in window_results:
+            if (first, last) != (0, 0):
+                page_items.update({p: [] for p in range(first, last + 1) if p in cache_keys})
+        page_seen = set()
+        for key in sorted(window_results):
+            if key == (0, 0):
+                continue
+            for item in window_results[key]:
+                dedup_key = _citation_key(item)
+                if item.get("page_number") in page_items and dedup_key not in page_seen:
+                    page_seen.add(dedup_key)
+                    page_items[item["page_number"]].append(item)
+        for page_num, items in page_items.items():
+            cache.put(cache_keys[page_num], items)
+
+    wall_seconds = time.perf_counter() - started
+    logger.info(
+        f"[FOOTNOTES] complete. {len(in_text_items)} citations ({len(native_items)} native) "
+        f"in {wall_seconds:.1f}s | failed windows: {sorted(failed_windows) or 'none'}"
+    )
+
+    if stats is not None:
+        stats["total_pages"] = total_pages
+        stats["workers"] = max_workers
+        stats["wall_seconds"] = round(wall_seconds, 3)
+        stats["native_pages"] = total_pages - len(llm_pages) - len(cached_pages)
+        stats["llm_pages"] = llm_pages
+        stats["cached_pages"] = cached_pages
+        stats["failed_windows"] = [f"{a}-{b}" for a, b in sorted(failed_windows)]
+        stats["windows"] = [window_timings[k] for k in sorted(window_timings)]
+
+    return DocumentExtraction(
+        title=None,
+        author=None,
+        footnotes=[],
+        in_text=in_text_items,
+        references=references
+    )
 
 def save_json(data, folder="output", filename="result.json"):
     """
@@ -0,0 +1,306 @@
+"""
+Batch validation: many statements against one shared set of reference PDFs.
+
+The references are uploaded to Gemini once, in parallel (BATCH_UPLOAD_WORKERS,
+default 4). Every (statement, reference) pair is then validated on one shared
+StatementValidator (BATCH_VALIDATION_WORKERS, default 4), so uploads,
+compacted references and cached PDF bytes are reused across statements; request
+pacing is left to the shared Gemini rate limiter. A statement's aggregated
+verdict is reported through on_result as soon as its last reference is checked.
+
+References received by a batch are kept in a content-addressed ReferenceStore
+(REFERENCE_STORE_DIR, default <tmp>/mlr_reference_store, bounded by
+REFERENCE_STORE_MAX_MB, default 1024, least recently used first out). Their id
+is the SHA-256 of the PDF, so later batches can name them instead of uploading
+them again. A PDF and its metadata are evicted together, and references a
+running batch uses are pinned (and their mtime refreshed) until it finishes.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from extraction_cache import ExtractionCache
+from Gemini_version import StatementValidator, load_pdf_content
+
+logger = logging.getLogger(__name__)
+
+_REFERENCE_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ReferenceStore(ExtractionCache):
+    """Reference PDFs on disk, keyed by their SHA-256 (metadata in a JSON entry next to each)."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        super().__init__(directory, max_bytes)
+        self._pins: Dict[str, int] = {}
+        self._pins_lock = threading.Lock()
+
+    def _is_pinned(self, key: str) -> bool:
+        return key in self._pins
+
+    def _touch(self, reference_id: str):
+        for suffix in (".pdf", ".json"):
+            try:
+                os.utime(self._path(reference_id, suffix), None)
+            except OSError:
+                pass
+
+    @contextlib.contextmanager
+    def pinned(self, reference_ids: Iterable[str]):
+        """
+        Keep these references while the block runs.
+
+        Eviction in this process skips them; their mtime is refreshed on entry
+        and exit so other processes evict them last.
+        """
+        reference_ids = [r for r in reference_ids if r]
+        with self._pins_lock:
+            for reference_id in reference_ids:
+                self._pins[reference_id] = self._pins.get(reference_id, 0) + 1
+        for reference_id in reference_ids:
+            self._touch(reference_id)
+        try:
+            yield
+        finally:
+            for reference_id in reference_ids:
+                self._touch(reference_id)
+            with self._pins_lock:
+                for reference_id in reference_ids:
+                    self._pins[reference_id] -= 1
+                    if not self._pins[reference_id]:
+                        del self._pins[reference_id]
+
+    def add(self, document) -> str:
+        """Move a disk-backed UploadedDocument into the store and return its reference id."""
+        key = document.sha256
+        target = self._path(key, ".pdf")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.exists(target):
+            # Same bytes already stored: keep the stored copy
+            document.delete()
+            os.utime(target, None)
+        else:
+            shutil.move(document.path, target)
+        self.put(key, {"filename": document.filename, "size": document.size, "page_count": document.page_count})
+        return key
+
+    def resolve(self, reference_id: str) -> Optional[Dict]:
+        """Stored reference as {reference_id, filename, path, size, page_count}, or None if unknown/evicted."""
+        if not _REFERENCE_ID_RE.match(reference_id):
+            return None
+        meta = self.get(reference_id)
+        path = self._path(reference_id, ".pdf")
+        if meta is None or not os.path.exists(path):
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return {"reference_id": reference_id, "path": path, **meta}
+
+
+_reference_store = None
+_reference_store_lock = threading.Lock()
+
+
+def get_reference_store() -> ReferenceStore:
+    global _reference_store
+    if _reference_store is None:
+        with _reference_store_lock:
+            if _reference_store is None:
+                directory = os.getenv("REFERENCE_STORE_DIR") or os.path.join(tempfile.gettempdir(), "mlr_reference_store")
+                max_mb = int(os.getenv("REFERENCE_STORE_MAX_MB", "1024"))
+                _reference_store = ReferenceStore(directory, max_mb * 1_048_576)
+    return _reference_store
+
+
+def parse_statements(raw: str) -> List[Dict]:
+    """
+    Parse the batch's statements field.
+
+    Accepts a JSON list whose items are either statement strings or objects
+    with "statement" and optional "reference_no", "reference", "page_no" and
+    "references" (filenames or reference ids to check, default all).
+    Raises ValueError on malformed input or more than BATCH_MAX_STATEMENTS (default 200).
+    """
+    try:
+        items = json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"statements must be a JSON list: {e}")
+    if not isinstance(items, list) or not items:
+        raise ValueError("statements must be a non-empty JSON list")
+    max_statements = int(os.getenv("BATCH_MAX_STATEMENTS", "200"))
+    if len(items) > max_statements:
+        raise ValueError(f"Too many statements ({len(items)}); the limit is {max_statements} per batch")
+
+    parsed = []
+    for idx, item in enumerate(items):
+        if isinstance(item, str):
+            item = {"statement": item}
+        if not isinstance(item, dict) or not str(item.get("statement") or "").strip():
+            raise ValueError(f"Statement {idx} has no text")
+        references = item.get("references") or []
+        if not isinstance(references, list):
+            raise ValueError(f"Statement {idx}: references must be a list")
+        parsed.append({
+            "statement": str(item["statement"]).strip(),
+            "reference_no": str(item.get("reference_no") or ""),
+            "reference": str(item.get("reference") or ""),
+            "page_no": item.get("page_no"),
+            "references": [str(r) for r in references],
+        })
+    return parsed
+
+
+def build_reference_set(documents: list, reference_ids: List[str],
+                        store: ReferenceStore) -> Tuple[Dict[str, Dict], List[Dict]]:
+    """
+    Store newly uploaded documents and resolve stored ones.
+
+    Returns the validator's pdf_files_dict (keyed by filename) and one
+    {reference_id, filename, size, page_count} entry per reference.
+    Raises ValueError for an unknown reference id.
+    """
+    entries = []
+    for document in documents:
+        reference_id = store.add(document)
+        entries.append(store.resolve(reference_id) or {})
+    for reference_id in reference_ids:
+        entry = store.resolve(reference_id)
+        if entry is None:
+            raise ValueError(f"Unknown or expired reference id: {reference_id}")
+        entries.append(entry)
+
+    pdf_files_dict = {}
+    references = []
+    seen = set()
+    for entry in entries:
+        if not entry or entry["reference_id"] in seen:
+            continue
+        seen.add(entry["reference_id"])
+        name = entry["filename"]
+        if name in pdf_files_dict:
+            # Validator caches are keyed by filename: keep different PDFs with the same name apart
+            stem, ext = os.path.splitext(name)
+            name = f"{stem} [{entry['reference_id'][:8]}]{ext}"
+        pdf_files_dict[name] = {"path": entry["path"], "sha256": entry["reference_id"],
+                                "size": entry.get("size"), "page_count": entry.get("page_count")}
+        references.append({"reference_id": entry["reference_id"], "filename": name,
+                           "size": entry.get("size"), "page_count": entry.get("page_count")})
+    return pdf_files_dict, references
+
+
+def _select_pdfs(item: Dict, pdf_files_dict: Dict[str, Dict]) -> List[str]:
+    if not item["references"]:
+        return list(pdf_files_dict)
+    by_id = {info.get("sha256"): name for name, info in pdf_files_dict.items()}
+    selected = []
+    for ref in item["references"]:
+        name = ref if ref in pdf_files_dict else by_id.get(ref)
+        if name is None:
+            raise ValueError(f"Statement references an unknown PDF: {ref}")
+        if name not in selected:
+            selected.append(name)
+    return selected
+
+
+def run_batch(statements: List[Dict], pdf_files_dict: Dict[str, Dict], validation_type: str,
+              validator: Optional[StatementValidator] = None,
+              on_result: Optional[Callable[[Dict], None]] = None,
+              reference_store: Optional[ReferenceStore] = None) -> List[Dict]:
+    """
+    Validate every statement against its references.
+
+    Args:
+        statements: Items from parse_statements()
+        pdf_files_dict: Shared references, e.g. from build_reference_set()
+        validation_type: "research" or "pharmaceutical"
+        validator: StatementValidator to share (a new one by default)
+        on_result: Optional callback(entry) as each statement's verdict is ready
+        reference_store: Store the references came from; they are pinned until the batch ends
+
+    Returns:
+        One entry per statement, in input order: its index plus the aggregated
+        ValidationResult fields
+    """
+    if reference_store is None:
+        return _run_batch(statements, pdf_files_dict, validation_type, validator, on_result)
+    with reference_store.pinned(info.get("sha256") for info in pdf_files_dict.values()):
+        return _run_batch(statements, pdf_files_dict, validation_type, validator, on_result)
+
+
+def _run_batch(statements, pdf_files_dict, validation_type, validator, on_result) -> List[Dict]:
+    validator = validator or StatementValidator()
+    selections = [_select_pdfs(item, pdf_files_dict) for item in statements]
+    needed = [name for name in pdf_files_dict if any(name in selected for selected in selections)]
+
+    def _upload(pdf_name):
+        content = load_pdf_content(pdf_files_dict[pdf_name])
+        validator.pdf_content_cache[pdf_name] = content
+        try:
+            validator.pdf_gemini_cache[pdf_name] = validator.llm.upload_pdf_to_gemini(content, pdf_name)
+        except Exception as e:
+            # validate_statement retries the upload and reports the failure per statement
+            logger.warning(f"[BATCH] Upload of {pdf_name} failed: {e}")
+
+    upload_workers = max(1, min(len(needed), int(os.getenv("BATCH_UPLOAD_WORKERS", "4"))))
+    with ThreadPoolExecutor(max_workers=upload_workers, thread_name_prefix="batch-upload") as pool:
+        list(pool.map(_upload, needed))
+    logger.info(f"[BATCH] {len(needed)} references uploaded; validating {len(statements)} statements")
+
+    per_pdf: List[Dict[str, object]] = [{} for _ in statements]
+    results: List[Optional[Dict]] = [None] * len(statements)
+
+    def _finish(idx):
+        item = statements[idx]
+        individual = [per_pdf[idx][name] for name in selections[idx]]
+        aggregated = validator.aggregate_results(item["statement"], item["reference_no"], item["reference"], individual)[0]
+        results[idx] = {"index": idx, **asdict(aggregated)}
+        if on_result is not None:
+            on_result(results[idx])
+
+    workers = max(1, int(os.getenv("BATCH_VALIDATION_WORKERS", "4")))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-validate") as pool:
+        futures = {}
+        for idx, item in enumerate(statements):
+            if not selections[idx]:
+                results[idx] = {"index": idx, **asdict(validator.no_reference_result(item["statement"]))}
+                if on_result is not None:
+                    on_result(results[idx])
+                continue
+            for pdf_name in selections[idx]:
+                future = pool.submit(
+                    validator.validate_against_pdf, item["statement"], item["reference_no"], item["reference"],
+                    pdf_name, pdf_files_dict[pdf_name], page_no=item["page_no"],
+                    validation_type=validation_type, tag=f"{idx}:{pdf_name}",
+                )
+                futures[future] = (idx, pdf_name)
+
+        for future in as_completed(futures):
+            idx, pdf_name = futures[future]
+            # validate_against_pdf turns failures into "Error" results
+            per_pdf[idx][pdf_name] = future.result()
+            if len(per_pdf[idx]) == len(selections[idx]):
+                _finish(idx)
+
+    return results
+
+
+def summarize(results: List[Dict]) -> Dict[str, int]:
+    """Verdict counts, in the shape the single-statement endpoints return."""
+    return {
+        "total": len(results),
+        "supported": sum(1 for r in results if r["validation_result"] == "Supported"),
+        "contradicted": sum(1 for r in results if r["validation_result"] == "Contradicted"),
+        "not_found": sum(1 for r in results if r["validation_result"] == "Not Found"),
+        "errors": sum(1 for r in results if r["validation_result"] == "Error"),
+    }
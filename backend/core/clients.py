@@ -0,0 +1,122 @@
+"""
+Lazy registry for external clients (Gemini, MongoDB, rate limiter).
+
+Nothing here connects at import time. Each client is built by its factory on
+the first `get()` call in the current process and cached until the process
+forks: the fork hook drops every cached instance in the child, so gunicorn
+workers (preload_app=True) and Celery children each open their own sockets
+instead of sharing the parent's.
+
+Usage:
+    from clients import get
+    client = get("gemini_parsing")
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_factories: Dict[str, Callable[[], Any]] = {}
+_instances: Dict[str, Any] = {}
+_lock = threading.RLock()
+_env_loaded = False
+
+
+def load_env():
+    """Load .env once per process (replaces import-time load_dotenv calls)."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _env_loaded = True
+
+
+def register(name: str, factory: Callable[[], Any]):
+    """Register (or replace) the factory for `name`; drops any cached instance."""
+    with _lock:
+        _factories[name] = factory
+        _instances.pop(name, None)
+
+
+def get(name: str) -> Any:
+    """Return the process-local instance of `name`, creating it on first use."""
+    try:
+        return _instances[name]
+    except KeyError:
+        pass
+    with _lock:
+        if name not in _instances:
+            if name not in _factories:
+                raise KeyError(f"No client registered under '{name}'")
+            load_env()
+            _instances[name] = _factories[name]()
+            logger.debug(f"[CLIENTS] Created '{name}' in pid {os.getpid()}")
+        return _instances[name]
+
+
+def reset(name: str = None):
+    """Forget cached instances (all, or just `name`) so the next get() rebuilds them."""
+    if name is None:
+        _instances.clear()
+    else:
+        _instances.pop(name, None)
+
+
+def _after_fork_in_child():
+    global _lock
+    # The parent may have held the lock while forking
+    _lock = threading.RLock()
+    _instances.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+# --- Default factories ---
+
+def _gemini(use_case: str):
+    def factory():
+        from gemini_client import configure_gemini
+        return configure_gemini(use_case)
+    return factory
+
+
+def _rate_limiter():
+    from gemini_client import RateLimiter
+    rpm = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60"))
+    return RateLimiter(requests_per_minute=rpm)
+
+
+def _gemini_validation():
+    from Gemini_version import GeminiClient
+    client = GeminiClient()
+    if not client.client:
+        # Raising keeps the failed client out of the cache, so the next get() retries
+        raise RuntimeError("Gemini client failed to initialize")
+    return client
+
+
+def _mongo_client():
+    from pymongo import MongoClient
+    uri = os.getenv("MONGODB_URI") or os.getenv("MONGO_URI") or "mongodb://localhost:27017"
+    # connect=False: no monitor threads or sockets until the first operation
+    return MongoClient(uri, connect=False)
+
+
+def _mongo_db():
+    return get("mongo")[os.getenv("MONGO_DB_NAME", "brochure_ai")]
+
+
+register("gemini_parsing", _gemini("parsing"))
+register("gemini_reasoning", _gemini("reasoning"))
+register("gemini_rate_limiter", _rate_limiter)
+register("gemini_validation", _gemini_validation)
+register("mongo", _mongo_client)
+register("mongo_db", _mongo_db)
@@ -3,106 +3,189 @@ import pandas as pd
 from pathlib import Path
 import sys
 import re
-from Superscript import extract_drug_superscript_table_data
 
-def build_validation_dataframe(in_text, references, title=""):
+# Columns of every validation table, in export order
+VALIDATION_COLUMNS = ["statement", "reference_no", "reference", "page_no"]
+
+# "Row: X | Column: Y | Content: Z" statements from the table prompt
+TABLE_STATEMENT_RE = re.compile(r"Row:\s*(.*?)\s*\|\s*Column:\s*(.*?)\s*\|\s*Content:\s*(.*)$")
+# Reference numbers trailing a table statement ("... Content 1,4-6")
+TRAILING_REFS_RE = re.compile(r'[\s,]+([\d,\-]+)\s*$')
+
+
+class _ValidationColumns:
     """
-    Create DataFrame for Excel export matching Validation.py requirements:
-    
-    Columns: statement | reference_no | reference
+    Column arrays for a validation table, filled in one pass.
+
+    Every builder in this module appends to these lists and only converts at
+    the end (one DataFrame constructor call, or one zip into row dicts), so no
+    per-row dict is allocated on the DataFrame path.
     """
 
-    output = []
-
-    def _get_field(obj, key, default=""):
-        """Safely get a field from a dict-like or Pydantic/BaseModel object.
-
-        Tries in this order: mapping `.get`, `.dict()` conversion, attribute access.
-        Any exceptions are swallowed and `default` is returned.
-        """
-        # Try mapping-style `.get()` first
-        try:
-            if hasattr(obj, 'get'):
-                return obj.get(key, default)
-        except Exception:
-            pass
-
-        # Try Pydantic/BaseModel `.dict()`
-        try:
-            if hasattr(obj, 'dict'):
-                return obj.dict().get(key, default)
-        except Exception:
-            pass
-
-        # Fallback to attribute access
-        try:
-            return getattr(obj, key, default)
-        except Exception:
-            return default
-        
-    for item in in_text:
-        raw_sup = _get_field(item, "superscript_number", "")
-        raw_stmt = _get_field(item, "statement", "")
-        raw_heading = _get_field(item, "heading", "")
-
-        superscript_no = str(raw_sup if raw_sup is not None else "").strip()
-        statement = str(raw_stmt if raw_stmt is not None else "").strip()
-        heading = str(raw_heading if raw_heading is not None else "").strip()
-
-        # ----------------------------------------------
-        # 1. Detect table format: Row | Column | Content
-        # ----------------------------------------------
-        is_table = False
-
-        table_match = re.search(
-            r"Row:\s*(.*?)\s*\|\s*Column:\s*(.*?)\s*\|\s*Content:\s*(.*)$",
-            statement
+    __slots__ = ("statement", "reference_no", "reference", "page_no", "_references")
+
+    def __init__(self, references):
+        self.statement = []
+        self.reference_no = []
+        self.reference = []
+        self.page_no = []
+        self._references = references or {}
+
+    def add(self, statement, reference_no, page_no):
+        self.statement.append(statement)
+        self.reference_no.append(reference_no)
+        self.reference.append(self._references.get(reference_no, ""))
+        self.page_no.append(page_no)
+
+    def to_frame(self):
+        return pd.DataFrame(
+            {
+                "statement": self.statement,
+                "reference_no": self.reference_no,
+                "reference": self.reference,
+                "page_no": self.page_no,
+            },
+            columns=VALIDATION_COLUMNS,
         )
 
-        if table_match:
-            row_val = table_match.group(1).strip()
-            col_val = table_match.group(2).strip()
-            content_val = table_match.group(3).strip()
-            statement = f"{row_val}. {col_val}. {content_val}"
-            is_table = True
-        elif ". " in statement and statement.count(". ") >= 2:
-            # Detect new 'Row. Column. Content' format from Gemini
-            is_table = True
-
-        # ----------------------------------------------------
-        # 2. Build final_statement with heading (ONLY if not table)
-        # ----------------------------------------------------
-        if is_table:
-            final_statement = statement
-        elif heading and statement:
-            final_statement = f"{heading}. {statement}"
-        elif statement:
-            final_statement = statement
+    def to_rows(self):
+        return [
+            {"statement": s, "reference_no": n, "reference": r, "page_no": p}
+            for s, n, r, p in zip(self.statement, self.reference_no, self.reference, self.page_no)
+        ]
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def _add_citation(columns, item):
+    """Append one footnote citation (dict or pydantic InlineCitation)."""
+    if hasattr(item, "get"):
+        raw_sup = item.get("superscript_number", "")
+        raw_stmt = item.get("statement", "")
+        raw_heading = item.get("heading", "")
+        page_no = item.get("page_number", 1)
+    else:
+        # Pydantic models: read attributes directly instead of converting to a dict per field
+        raw_sup = getattr(item, "superscript_number", "")
+        raw_stmt = getattr(item, "statement", "")
+        raw_heading = getattr(item, "heading", "")
+        page_no = getattr(item, "page_number", 1)
+
+    superscript_no = _text(raw_sup)
+    statement = _text(raw_stmt)
+    heading = _text(raw_heading)
+
+    # 1. Detect table format: Row | Column | Content
+    is_table = False
+    table_match = TABLE_STATEMENT_RE.search(statement) if "Row:" in statement else None
+    if table_match:
+        row_val = table_match.group(1).strip()
+        col_val = table_match.group(2).strip()
+        content_val = table_match.group(3).strip()
+        statement = f"{row_val}. {col_val}. {content_val}"
+        is_table = True
+    elif statement.count(". ") >= 2:
+        # Detect new 'Row. Column. Content' format from Gemini
+        is_table = True
+
+    # 2. Build final_statement with heading (ONLY if not table)
+    if is_table:
+        final_statement = statement
+    elif heading and statement:
+        final_statement = f"{heading}. {statement}"
+    elif statement:
+        final_statement = statement
+    else:
+        final_statement = heading
+
+    # 3. Extract reference numbers if superscript_no == "Table"
+    if superscript_no == "Table":
+        ref_match = TRAILING_REFS_RE.search(final_statement)
+        if ref_match:
+            superscript_no = ref_match.group(1).strip()
+            final_statement = final_statement[:ref_match.start()].strip()
+
+    columns.add(final_statement, superscript_no, page_no)
+
+
+def _add_image1(columns, row):
+    """Append one IMAGE 1 row (pH compatibility): row_name. pH_value. column1. column2."""
+    row_name = str(row.get("row_name") or "").strip()
+    ph_value = row.get("ph_value")
+    ph_value = str(ph_value).strip() if ph_value not in (None, "", "null") else ""
+    column_name_raw = str(row.get("column_name") or "").strip()
+    reference_no = str(row.get("superscript_number") or "").strip()
+
+    # Split dot-separated columns
+    if column_name_raw:
+        columns_formatted = '. '.join(col.strip() for col in column_name_raw.split('.') if col.strip())
+    else:
+        columns_formatted = ''
+
+    if ph_value and columns_formatted:
+        final_statement = f"{row_name}. {ph_value}. {columns_formatted}."
+    elif ph_value:
+        final_statement = f"{row_name}. {ph_value}."
+    elif columns_formatted:
+        final_statement = f"{row_name}. {columns_formatted}."
+    else:
+        final_statement = f"{row_name}."
+
+    columns.add(final_statement, reference_no, row.get("page_number", 1))
+
+
+def _add_image2(columns, row, row_key="superscript_number", statement_key="superscript_in_statement"):
+    """Append one IMAGE 2 row (statement-based): row_name. column_name. statement."""
+    row_name = str(row.get("row_name") or "").strip()
+    statement_text = str(row.get("statement") or "").strip()
+    column_name = str(row.get("column_name") or "").strip()
+
+    # Superscript priority: row superscript > statement superscript
+    reference_no = str(row.get(row_key) or row.get(statement_key) or "").strip()
+
+    if statement_text and column_name:
+        final_statement = f"{row_name}. {column_name}. {statement_text}"
+    elif statement_text:
+        final_statement = f"{row_name}. {statement_text}"
+    elif column_name:
+        final_statement = f"{row_name}. {column_name}"
+    else:
+        final_statement = f"{row_name}"
+
+    columns.add(final_statement, reference_no, row.get("page_number", 1))
+
+
+def _add_special_case(columns, data_rows):
+    for row in data_rows:
+        # Priority: Image 2 (statement) because 'column_name' exists in both
+        statement = row.get("statement")
+        if statement and str(statement).strip():
+            _add_image2(columns, row)
         else:
-            final_statement = heading
+            # pH/mark rows and rows without specific indicators
+            _add_image1(columns, row)
 
-        # ----------------------------------------------------
-        # 3. Extract reference numbers if superscript_no == "Table"
-        # ----------------------------------------------------
-        if superscript_no == "Table":
-            ref_match = re.search(r'[\s,]+([\d,\-]+)\s*$', final_statement)
-            if ref_match:
-                superscript_no = ref_match.group(1).strip()
-                final_statement = final_statement[:ref_match.start()].strip()
 
-        # ----------------------------------------------------
-        # 4. Lookup reference text
-        # ----------------------------------------------------
-        ref_text = references.get(superscript_no, "")
+def build_validation_dataframe(in_text, references, title=""):
+    """
+    Create DataFrame for Excel export matching Validation.py requirements:
+    
+    Columns: statement | reference_no | reference | page_no
+    """
+    columns = _ValidationColumns(references)
+    for item in in_text:
+        _add_citation(columns, item)
+    return columns.to_frame()
 
-        output.append({
-            "statement": final_statement,
-            "reference_no": superscript_no,
-            "reference": ref_text,
-            "page_no": _get_field(item, "page_number", 1)
-        })
 
-    return pd.DataFrame(output)
+def build_citation_rows(in_text, references):
+    """Same rows as build_validation_dataframe, as a list of dicts (for streaming one page at a time)."""
+    columns = _ValidationColumns(references)
+    for item in in_text:
+        _add_citation(columns, item)
+    return columns.to_rows()
 
 
 def build_validation_rows_image1(data_rows, references):
@@ -122,46 +205,10 @@ def build_validation_rows_image1(data_rows, references):
     Output format: row_name. pH_value. column1. column2. column3.
     Example: "Amikacin. 3.5-5.5. Solution A. Solution B. Solution C."
     """
-    output = []
-    
+    columns = _ValidationColumns(references)
     for row in data_rows:
-        row_name = str(row.get("row_name") or "").strip()
-        ph_value = row.get("ph_value")
-        ph_value = str(ph_value).strip() if ph_value not in (None, "", "null") else ""
-        
-        column_name_raw = str(row.get("column_name") or "").strip()
-        
-        # Superscript for reference
-        reference_no = str(row.get("superscript_number") or "").strip()
-        
-        # Split dot-separated columns
-        if column_name_raw:
-            columns = [col.strip() for col in column_name_raw.split('.') if col.strip()]
-            columns_formatted = '. '.join(columns)
-        else:
-            columns_formatted = ''
-        
-        # Build statement: row_name. pH_value. column1. column2. column3
-        if ph_value and columns_formatted:
-            final_statement = f"{row_name}. {ph_value}. {columns_formatted}."
-        elif ph_value:
-            final_statement = f"{row_name}. {ph_value}."
-        elif columns_formatted:
-            final_statement = f"{row_name}. {columns_formatted}."
-        else:
-            final_statement = f"{row_name}."
-        
-        # Lookup reference text
-        reference_text = references.get(reference_no, "")
-        
-        output.append({
-            "statement": final_statement,
-            "reference_no": reference_no,
-            "reference": reference_text,
-            "page_no": row.get("page_number", 1)
-        })
-    
-    return output
+        _add_image1(columns, row)
+    return columns.to_rows()
 
 
 def build_validation_rows_image2(data_rows, references):
@@ -178,107 +225,28 @@ def build_validation_rows_image2(data_rows, references):
       "column_name": "Column Header"
     }
     
-    Output format: row_name. statement. column_name.
-    Example: "Amikacin. Store in refrigerator. Storage Conditions."
+    Output format: row_name. column_name. statement
+    Example: "Amikacin. Storage Conditions. Store in refrigerator."
     """
-    output = []
-    
+    columns = _ValidationColumns(references)
     for row in data_rows:
-        row_name = str(row.get("row_name") or "").strip()
-        statement_text = str(row.get("statement") or "").strip()
-        column_name = str(row.get("column_name") or "").strip()
-        
-        # Superscript priority: row_superscript > statement_superscript
-        reference_no = (
-            row.get("row_superscript") 
-            or row.get("statement_superscript") 
-            or ""
-        )
-        reference_no = str(reference_no).strip()
-        
-        # Build statement: row_name. column_name. statement
-        if statement_text and column_name:
-            final_statement = f"{row_name}. {column_name}. {statement_text}"
-        elif statement_text:
-            final_statement = f"{row_name}. {statement_text}"
-        elif column_name:
-            final_statement = f"{row_name}. {column_name}"
-        else:
-            final_statement = f"{row_name}"
-        
-        # Lookup reference text
-        reference_text = references.get(reference_no, "")
-        
-        output.append({
-            "statement": final_statement,
-            "reference_no": reference_no,
-            "reference": reference_text,
-            "page_no": row.get("page_number", 1)
-        })
-    
-    return output
+        _add_image2(columns, row, row_key="row_superscript", statement_key="statement_superscript")
+    return columns.to_rows()
 
 
 def _build_single_row_image1(row, references):
     """Processes a single row for IMAGE 1 (pH compatibility)."""
-    row_name = str(row.get("row_name") or "").strip()
-    ph_value = row.get("ph_value")
-    ph_value = str(ph_value).strip() if ph_value not in (None, "", "null") else ""
-    
-    column_name_raw = str(row.get("column_name") or "").strip()
-    reference_no = str(row.get("superscript_number") or "").strip()
-    
-    if column_name_raw:
-        columns = [col.strip() for col in column_name_raw.split('.') if col.strip()]
-        columns_formatted = '. '.join(columns)
-    else:
-        columns_formatted = ''
-    
-    if ph_value and columns_formatted:
-        final_statement = f"{row_name}. {ph_value}. {columns_formatted}."
-    elif ph_value:
-        final_statement = f"{row_name}. {ph_value}."
-    elif columns_formatted:
-        final_statement = f"{row_name}. {columns_formatted}."
-    else:
-        final_statement = f"{row_name}."
-    
-    return {
-        "statement": final_statement,
-        "reference_no": reference_no,
-        "reference": references.get(reference_no, ""),
-        "page_no": row.get("page_number", 1)
-    }
+    columns = _ValidationColumns(references)
+    _add_image1(columns, row)
+    return columns.to_rows()[0]
+
 
 def _build_single_row_image2(row, references):
     """Processes a single row for IMAGE 2 (statement-based) using unified schema."""
-    row_name = str(row.get("row_name") or "").strip()
-    statement_text = str(row.get("statement") or "").strip()
-    column_name = str(row.get("column_name") or "").strip()
-    
-    # Superscript priority: superscript_number (row) OR superscript_in_statement (statement)
-    reference_no = (
-        row.get("superscript_number") 
-        or row.get("superscript_in_statement") 
-        or ""
-    )
-    reference_no = str(reference_no).strip()
-    
-    if statement_text and column_name:
-        final_statement = f"{row_name}. {column_name}. {statement_text}"
-    elif statement_text:
-        final_statement = f"{row_name}. {statement_text}"
-    elif column_name:
-        final_statement = f"{row_name}. {column_name}"
-    else:
-        final_statement = f"{row_name}"
-    
-    return {
-        "statement": final_statement,
-        "reference_no": reference_no,
-        "reference": references.get(reference_no, ""),
-        "page_no": row.get("page_number", 1)
-    }
+    columns = _ValidationColumns(references)
+    _add_image2(columns, row)
+    return columns.to_rows()[0]
+
 
 def build_validation_rows_special_case(data_rows, references):
     """
@@ -286,20 +254,16 @@ def build_validation_rows_special_case(data_rows, references):
     """
     if not data_rows:
         return []
-    
-    output = []
-    for row in data_rows:
-        # Decide based on fields present in this specific row
-        # Priority: Image 2 (statement) because 'column_name' exists in both
-        if row.get("statement") and str(row.get("statement")).strip():
-            output.append(_build_single_row_image2(row, references))
-        elif row.get("ph_value") or row.get("mark_type"):
-            output.append(_build_single_row_image1(row, references))
-        else:
-            # Fallback/Default for rows without specific indicators
-            output.append(_build_single_row_image1(row, references))
-            
-    return output
+    columns = _ValidationColumns(references)
+    _add_special_case(columns, data_rows)
+    return columns.to_rows()
+
+
+def build_validation_dataframe_special_case(data_rows, references):
+    """Same as build_validation_rows_special_case, but returns the DataFrame directly."""
+    columns = _ValidationColumns(references)
+    _add_special_case(columns, data_rows or [])
+    return columns.to_frame()
 
 
 def print_validation_results(validation_rows):
@@ -326,6 +290,18 @@ def print_validation_results(validation_rows):
         print()
 
 
+def save_statements_xlsx(df, output_excel):
+    """Write a statements DataFrame with openpyxl's write-only mode (rows are spooled, not held as cells)."""
+    from result_export import iter_xlsx
+
+    columns = [str(column) for column in df.columns]
+    rows = (dict(zip(columns, values)) for values in df.itertuples(index=False, name=None))
+    with open(output_excel, "wb") as f:
+        for chunk in iter_xlsx(rows, columns, sheet_name="Statements"):
+            f.write(chunk)
+    return output_excel
+
+
 def convert_to_excel(json_file, output_excel=None, title=""):
     """
     Convert Superscript.py JSON output to Excel file for Validation.py
@@ -377,7 +353,7 @@ def convert_to_excel(json_file, output_excel=None, title=""):
     # Save to Excel
     print(f"\n[SAVING] Saving to Excel: {output_excel}\n")
     
-    df.to_excel(output_excel, index=False, sheet_name='Statements')
+    save_statements_xlsx(df, output_excel)
     
     print(f"[OK] Successfully created validation file!")
     print(f"   [STATS] Rows: {len(df)}")
@@ -466,6 +442,7 @@ def convert_superscript_output_to_validation(pdf_path):
     
     # Step 1: Run Superscript extraction at runtime
     print(f"[EXTRACTING] Extracting from PDF: {pdf_path}\n")
+    from Superscript import extract_drug_superscript_table_data
     try:
         data_rows = extract_drug_superscript_table_data(pdf_path)
     except Exception as e:
@@ -548,7 +525,7 @@ Output:
     Path(output_folder).mkdir(exist_ok=True)
     
     df = pd.DataFrame(validation_rows)
-    df.to_excel(output_excel, index=False, sheet_name='Statements')
+    save_statements_xlsx(df, output_excel)
     
     print(f"[OK] Successfully created validation file!")
     print(f"   [STATS] Rows: {len(df)}")
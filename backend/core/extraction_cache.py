@@ -0,0 +1,217 @@
+"""
+Page-level extraction cache shared by every worker on the host.
+
+Entries are keyed by (page content hash, extractor, prompt version), so a
+re-uploaded brochure only sends the pages that actually changed to Gemini.
+The page hash covers everything that is drawn on the page (text spans with
+their font size and flags, vector drawings and embedded image digests), not
+the PDF bytes, so re-saving or re-exporting a document does not invalidate it.
+
+Storage is a plain directory of JSON files (EXTRACTION_CACHE_DIR, default
+<tmp>/mlr_extraction_cache). Writes go to a temp file and are renamed into
+place, so concurrent gunicorn/Celery workers never read a partial entry.
+Reads refresh the file's mtime and the oldest entries are evicted once the
+store grows past EXTRACTION_CACHE_MAX_MB (default 256); all files of a key are
+evicted together, and other workers' in-flight .tmp files are left alone.
+Set EXTRACTION_CACHE=0 to disable. Binary artifacts (put_blob/get_blob) use the same layout and
+eviction; reference_compaction.py keeps its compacted PDFs in its own store.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Run an eviction scan after this many writes from one process
+EVICT_EVERY_WRITES = 50
+
+
+def prompt_version(*parts: str) -> str:
+    """Short fingerprint of a prompt (and anything else that changes its output, e.g. model ids)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def page_content_hash(page) -> str:
+    """Hash of what the page renders: text spans, vector drawings and image content."""
+    digest = hashlib.sha256()
+    digest.update(f"{page.rect.width:.1f}x{page.rect.height:.1f}r{page.rotation}".encode())
+
+    for block in page.get_text("dict")["blocks"]:
+        if block.get("type") != 0:
+            continue
+        for line in block["lines"]:
+            for span in line["spans"]:
+                x, y = span["origin"]
+                digest.update(f"{span['text']}|{span['size']:.1f}|{span['flags']}|{x:.0f},{y:.0f}\n".encode("utf-8"))
+
+    try:
+        drawings = page.get_drawings()
+    except Exception:
+        drawings = []
+    for path in drawings:
+        rect = path["rect"]
+        ops = "".join(item[0] for item in path["items"])
+        digest.update(f"D{rect.x0:.0f},{rect.y0:.0f},{rect.x1:.0f},{rect.y1:.0f}|{ops}|{path.get('fill')}\n".encode())
+
+    for info in page.get_image_info(hashes=True):
+        x0, y0, x1, y1 = info["bbox"]
+        image_digest = info.get("digest") or b""
+        digest.update(f"I{x0:.0f},{y0:.0f},{x1:.0f},{y1:.0f}|".encode() + bytes(image_digest) + b"\n")
+
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Bounded on-disk key/value store of JSON-serialisable extraction results."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(content_hash: str, extractor: str, version: str) -> str:
+        return hashlib.sha256(f"{extractor}:{version}:{content_hash}".encode()).hexdigest()
+
+    def _path(self, key: str, suffix: str = ".json") -> str:
+        return os.path.join(self.directory, key[:2], f"{key}{suffix}")
+
+    def get(self, key: str):
+        """Return the cached value, or None on a miss or unreadable entry."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"[CACHE] Dropping unreadable entry {key[:12]}: {e}")
+            self._remove(path)
+            return None
+
+        try:
+            # Reads count as use for eviction
+            os.utime(path, None)
+        except OSError:
+            pass
+        return value
+
+    def get_blob(self, key: str) -> Optional[bytes]:
+        """Return cached raw bytes (e.g. a compacted PDF), or None on a miss."""
+        path = self._path(key, ".bin")
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, value):
+        """Atomically write `value`; failures are logged, never raised."""
+        self._write(key, ".json", json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def put_blob(self, key: str, data: bytes):
+        """Atomically write raw bytes; failures are logged, never raised."""
+        self._write(key, ".bin", data)
+
+    def _write(self, key: str, suffix: str, data: bytes):
+        path = self._path(key, suffix)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except Exception:
+                self._remove(tmp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"[CACHE] Could not write entry {key[:12]}: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % EVICT_EVERY_WRITES == 0
+        if due:
+            self.evict()
+
+    def _is_pinned(self, key: str) -> bool:
+        """Entries that eviction must keep (see ReferenceStore)."""
+        return False
+
+    def evict(self):
+        """Delete least recently used entries until the store fits in max_bytes."""
+        # key -> [newest mtime, total size, paths]: a key's files (.json/.bin/...) go together
+        entries = {}
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    # Another worker's write in progress
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entry = entries.setdefault(name.split(".", 1)[0], [0.0, 0, []])
+                entry[0] = max(entry[0], st.st_mtime)
+                entry[1] += st.st_size
+                entry[2].append(path)
+                total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        removed = 0
+        for key, (_, size, paths) in sorted(entries.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            if self._is_pinned(key):
+                continue
+            for path in paths:
+                self._remove(path)
+            total -= size
+            removed += 1
+        logger.info(f"[CACHE] Evicted {removed} entries; store is now {total / 1_048_576:.1f} MB")
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Return the process-wide cache, or None when EXTRACTION_CACHE=0."""
+    global _extraction_cache
+    if os.getenv("EXTRACTION_CACHE", "1") == "0":
+        return None
+    if _extraction_cache is None:
+        with _extraction_cache_lock:
+            if _extraction_cache is None:
+                directory = os.getenv("EXTRACTION_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "mlr_extraction_cache")
+                max_mb = int(os.getenv("EXTRACTION_CACHE_MAX_MB", "256"))
+                _extraction_cache = ExtractionCache(directory, max_bytes=max_mb * 1_048_576)
+    return _extraction_cache
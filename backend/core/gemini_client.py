@@ -1,5 +1,9 @@
 import os
-from dotenv import load_dotenv
+import threading
+import time
+from typing import Optional
+
+import clients
 
 # Try new API first, fall back to old one
 try:
@@ -7,10 +11,14 @@ try:
 except ImportError:
     import google.generativeai as genai
 
-load_dotenv()
-
 def configure_gemini(use_case: str):
-    """Configure Gemini API client with appropriate API key"""
+    """
+    Configure Gemini API client with appropriate API key.
+
+    Builds a new client on every call; use get_gemini_client() to share one
+    per process.
+    """
+    clients.load_env()
     if use_case == "parsing":
         api_key = os.getenv("GEMINI_PARSING_API_KEY") or os.getenv("GEMINI_API_KEY")
     elif use_case == "reasoning":
@@ -38,3 +46,53 @@ def configure_gemini(use_case: str):
             genai.configure(api_key=api_key)
             return genai
         raise e
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by every Gemini caller in the process.
+
+    Callers block in acquire() until a request slot is free. back_off() pauses
+    all callers at once, so one 429 slows the whole pool instead of each thread
+    hammering the API independently.
+    """
+
+    def __init__(self, requests_per_minute: int, burst: Optional[int] = None):
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive")
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst or max(1, min(requests_per_minute, 10)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request slot is available, then consume it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if now >= self._blocked_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+
+                wait = max(self._blocked_until - now, (1.0 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def back_off(self, seconds: float):
+        """Pause every caller for `seconds` (e.g. after a 429 response)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+def get_gemini_client(use_case: str):
+    """Return the process-wide Gemini client for `use_case`, created on first use."""
+    return clients.get(f"gemini_{use_case}")
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide Gemini rate limiter (GEMINI_REQUESTS_PER_MINUTE, default 60)."""
+    return clients.get("gemini_rate_limiter")
@@ -0,0 +1,196 @@
+"""
+Salvaging JSON parser for LLM output.
+
+Gemini output is frequently cut off at the token limit or contains one bad
+element in an otherwise fine array. Instead of balancing brackets and hoping
+(which loses the whole response on any error), `salvage_json` scans the text
+once, tracking strings and nesting, and parses every top-level array element
+(or every key/value pair of a top-level object) on its own. Complete items are
+kept, and each lost item is reported with its position and the reason, so the
+caller can re-request only what is missing. When an object is cut off inside
+its last member and that member is an array or object (the common
+{"statements": [...] wrapper), the member is salvaged the same way.
+
+`validate_items` then checks each recovered item against a pydantic model with
+a cached `TypeAdapter`, so one malformed row is dropped (and reported) rather
+than failing the whole page.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+FENCE_RE = re.compile(r"```(?:json)?\s*\n?(.*?)(?:```|$)", re.DOTALL)
+TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+MEMBER_KEY_RE = re.compile(r'\s*"((?:[^"\\]|\\.)*)"\s*:\s*')
+
+
+@dataclass
+class SalvageResult:
+    """Outcome of salvage_json."""
+    value: Any = None
+    kind: str = "none"              # "array", "object", "scalar" or "none"
+    complete: bool = False          # the whole document parsed without repair
+    truncated: bool = False         # input ended inside the top-level value
+    lost: List[dict] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.kind in ("array", "object") and not self.lost and not self.truncated
+
+
+def _strip_fences(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        match = FENCE_RE.search(text)
+        if match:
+            return match.group(1).strip()
+    return text
+
+
+def _loads(fragment: str):
+    try:
+        return json.loads(fragment)
+    except ValueError:
+        # Most common LLM slip: a trailing comma before a closer
+        return json.loads(TRAILING_COMMA_RE.sub(r"\1", fragment))
+
+
+def _top_level_parts(text: str, start: int) -> Tuple[List[Tuple[int, int]], Optional[int]]:
+    """
+    Split the container opened at text[start] into its direct children.
+
+    Returns (spans, end) where spans are (begin, end) offsets of each complete
+    child and end is the offset of the closing bracket, or None if the text was
+    cut off. A trailing incomplete child is returned as the last span with a
+    negative end (-begin - 1) so the caller can report it.
+    """
+    closer = "]" if text[start] == "[" else "}"
+    depth = 0
+    in_string = False
+    escaped = False
+    spans = []
+    child_start = start + 1
+
+    for index in range(start, len(text)):
+        ch = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "[{":
+            depth += 1
+        elif ch in "]}":
+            depth -= 1
+            if depth == 0:
+                if ch != closer:
+                    break
+                if text[child_start:index].strip():
+                    spans.append((child_start, index))
+                return spans, index
+        elif ch == "," and depth == 1:
+            if text[child_start:index].strip():
+                spans.append((child_start, index))
+            child_start = index + 1
+
+    if text[child_start:].strip():
+        spans.append((child_start, -child_start - 1))
+    return spans, None
+
+
+def _salvage_member(fragment: str) -> Optional[Tuple[str, "SalvageResult"]]:
+    """(key, salvaged value) for a cut-off object member holding an array or object, else None."""
+    match = MEMBER_KEY_RE.match(fragment)
+    if not match or fragment[match.end():match.end() + 1] not in ("[", "{"):
+        return None
+    try:
+        key = json.loads(f'"{match.group(1)}"')
+    except ValueError:
+        return None
+    return key, salvage_json(fragment[match.end():])
+
+
+def salvage_json(text: Optional[str]) -> SalvageResult:
+    """
+    Recover as much JSON as possible from (possibly truncated) LLM output.
+
+    Arrays yield a list of every element that parsed; objects yield a dict of
+    every key/value pair that parsed. `lost` lists what could not be recovered
+    as {"index", "reason", "fragment"}.
+    """
+    if not text or not text.strip():
+        return SalvageResult(kind="none", lost=[{"index": 0, "reason": "empty response", "fragment": ""}])
+
+    text = _strip_fences(text)
+    try:
+        value = _loads(text)
+        kind = "array" if isinstance(value, list) else "object" if isinstance(value, dict) else "scalar"
+        return SalvageResult(value=value, kind=kind, complete=True)
+    except ValueError:
+        pass
+
+    starts = [i for i in (text.find("["), text.find("{")) if i != -1]
+    if not starts:
+        return SalvageResult(kind="none", lost=[{"index": 0, "reason": "no JSON found", "fragment": text[:200]}])
+    start = min(starts)
+
+    spans, end = _top_level_parts(text, start)
+    is_array = text[start] == "["
+    result = SalvageResult(value=[] if is_array else {}, kind="array" if is_array else "object", truncated=end is None)
+
+    for index, (begin, finish) in enumerate(spans):
+        cut_off = finish < 0
+        fragment = text[begin:] if cut_off else text[begin:finish]
+        if cut_off and not is_array:
+            member = _salvage_member(fragment)
+            if member is not None:
+                key, nested = member
+                result.value[key] = nested.value
+                result.lost.extend({**lost, "member": key} for lost in nested.lost)
+                continue
+        try:
+            if cut_off:
+                raise ValueError("truncated")
+            if is_array:
+                result.value.append(_loads(fragment))
+            else:
+                result.value.update(_loads("{" + fragment + "}"))
+        except ValueError as e:
+            reason = "truncated" if cut_off else f"malformed: {e}"
+            result.lost.append({"index": index, "reason": reason, "fragment": fragment.strip()[:200]})
+
+    return result
+
+
+@lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def validate_items(items: List[Any], model) -> Tuple[List[Any], List[dict]]:
+    """
+    Validate each item against `model` independently.
+
+    Returns (valid, rejected): valid holds the validated objects, rejected
+    holds {"index", "reason", "item"} for every item that failed.
+    """
+    adapter = _adapter(model)
+    valid = []
+    rejected = []
+    for index, item in enumerate(items):
+        try:
+            valid.append(adapter.validate_python(item))
+        except ValidationError as e:
+            rejected.append({"index": index, "reason": f"invalid: {e.errors()[0].get('msg')}", "item": item})
+    return valid, rejected
@@ -1,29 +1,62 @@
-from pymongo import MongoClient
-import os
+"""
+MongoDB handles for the validation pipeline.
+
+Nothing connects at import time: the client comes from the lazy registry in
+clients.py and is created on first use in each process (after any fork).
+Indexes and the schema version record are created once by
+`python manage.py init_mongo_schema`, not on import.
+"""
+
 import logging
+
+import clients
 from mongo_schema import MongoSchemaManager, RetryableMongoDB, StorageOptimizer, ConfidenceScoringOptimizer, VALIDATION_RESULTS_V2_COLLECTION
 
 logger = logging.getLogger(__name__)
 
-MONGO_URI = os.getenv("MONGODB_URI") or os.getenv("MONGO_URI") or "mongodb://localhost:27017"
 
-client = MongoClient(MONGO_URI)
-mongo_db = client["brochure_ai"]
+def get_mongo_db():
+    """Process-local `brochure_ai` database."""
+    return clients.get("mongo_db")
+
+
+def get_validation_collection():
+    """Legacy collection (for backwards compatibility)."""
+    return get_mongo_db()["validation_results"]
+
+
+def get_validation_collection_v2():
+    """New versioned collection (v2)."""
+    return get_mongo_db()[VALIDATION_RESULTS_V2_COLLECTION]
+
+
+def get_retry_db() -> RetryableMongoDB:
+    """Retry-safe wrapper for the v2 collection."""
+    return RetryableMongoDB(get_validation_collection_v2(), max_retries=3, base_delay=1.0)
+
+
+def initialize_schema() -> bool:
+    """Create indexes and the schema version record; run once per deployment."""
+    try:
+        MongoSchemaManager(db=get_mongo_db()).initialize_schema()
+        logger.info("✓ MongoDB schema initialized with indexes and versioning")
+        return True
+    except Exception as e:
+        logger.error(f"⚠ MongoDB schema initialization failed: {str(e)}")
+        return False
 
-# Legacy collection (for backwards compatibility)
-validation_collection = mongo_db["validation_results"]
 
-# New versioned collection (v2)
-validation_collection_v2 = mongo_db[VALIDATION_RESULTS_V2_COLLECTION]
+_LAZY_ATTRIBUTES = {
+    "client": lambda: clients.get("mongo"),
+    "mongo_db": get_mongo_db,
+    "validation_collection": get_validation_collection,
+    "validation_collection_v2": get_validation_collection_v2,
+    "retry_db": get_retry_db,
+}
 
-# Initialize schema and indexes
-schema_manager = MongoSchemaManager(db=mongo_db)
-try:
-    schema_manager.initialize_schema()
-    logger.info("✓ MongoDB schema initialized with indexes and versioning")
-except Exception as e:
-    logger.error(f"⚠ MongoDB schema initialization failed: {str(e)}")
-    logger.info("⚠ Continuing without schema initialization (non-critical)")
 
-# Create retry-safe wrapper for new collection
-retry_db = RetryableMongoDB(validation_collection_v2, max_retries=3, base_delay=1.0)
+def __getattr__(name):
+    # Old module-level names still resolve, but only when accessed
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -15,11 +15,10 @@ from pymongo.errors import DuplicateKeyError, OperationFailure
 import os
 from datetime import datetime
 
+import clients
+
 logger = logging.getLogger(__name__)
 
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-client = MongoClient(MONGO_URI)
-mongo_db = client["brochure_ai"]
 
 # Collection names
 VALIDATION_RESULTS_COLLECTION = "validation_results"
@@ -30,7 +29,8 @@ class MongoSchemaManager:
     """Manages MongoDB schema, indexes, and versioning"""
     
     def __init__(self, db=None):
-        self.db = db if db is not None else mongo_db
+        # Default database comes from the lazy client registry (no import-time connection)
+        self.db = db if db is not None else clients.get("mongo_db")
         
     def initialize_schema(self):
         """Initialize MongoDB schema with indexes and versioning"""
@@ -0,0 +1,296 @@
+"""
+Native superscript citation detection for born-digital brochures.
+
+Reads PyMuPDF span metadata (`page.get_text("dict")`) instead of asking Gemini
+to look at the page: superscript flags, font sizes and baseline rise identify
+citation markers, and the surrounding block text gives the sentence and the
+nearest heading. Each page gets a confidence score; scanned or ambiguous pages
+are flagged so the caller can send only those to the vision prompt.
+
+Output items use the same keys as the LLM extraction
+(page_number, superscript_number, heading, statement), so Superscript.py can
+turn them into InlineCitation objects unchanged.
+"""
+
+import re
+import statistics
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+# PyMuPDF span flag bits
+FLAG_SUPERSCRIPT = 1
+FLAG_BOLD = 16
+
+SUPERSCRIPT_DIGITS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹⁻˒", "0123456789-,")
+UNICODE_MARKER_RE = re.compile(r"[⁰¹²³⁴⁵⁶⁷⁸⁹]+(?:\s*[,˒⁻\-–]\s*[⁰¹²³⁴⁵⁶⁷⁸⁹]+)*")
+MARKER_TEXT_RE = re.compile(r"^\s*\d{1,3}(?:\s*[,\-–—]\s*\d{1,3})*\s*,?\s*$")
+SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])[\"”’)]?\s+(?=[A-Z0-9\"“(\[])")
+
+# Pages below this many characters of extractable text are candidates for "scanned"
+MIN_TEXT_CHARS = 50
+# A marker found only by size/rise (no flag, no Unicode digit) counts this much
+HEURISTIC_MARKER_WEIGHT = 0.5
+DEFAULT_CONFIDENCE_THRESHOLD = 0.8
+
+
+@dataclass
+class PageScan:
+    """Native extraction result for one page."""
+    page_number: int
+    citations: List[dict] = field(default_factory=list)
+    confidence: float = 1.0
+    needs_llm: bool = False
+    reason: str = ""
+
+
+def _normalize_marker(raw: str) -> str:
+    marker = raw.translate(SUPERSCRIPT_DIGITS)
+    marker = re.sub(r"[–—]", "-", marker)
+    marker = re.sub(r"\s+", "", marker).strip(",")
+    return marker
+
+
+def _image_coverage(page) -> float:
+    """Fraction of the page area covered by raster images."""
+    page_area = abs(page.rect) or 1.0
+    covered = 0.0
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        covered += max(0.0, x1 - x0) * max(0.0, y1 - y0)
+    return min(1.0, covered / page_area)
+
+
+def _body_font_size(blocks) -> float:
+    """Character-weighted median font size of the page's text."""
+    sizes = []
+    for block in blocks:
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                text = span["text"].strip()
+                if text:
+                    sizes.extend([span["size"]] * min(len(text), 200))
+    return statistics.median(sizes) if sizes else 10.0
+
+
+def _line_baseline(line) -> float:
+    """Baseline of the line's dominant (longest) span."""
+    longest = max(line["spans"], key=lambda sp: len(sp["text"].strip()))
+    return longest["origin"][1]
+
+
+def _span_is_superscript(span, baseline: float, body_size: float) -> Tuple[bool, str]:
+    """Classify a span as a citation marker; returns (is_marker, method)."""
+    text = span["text"]
+    if not MARKER_TEXT_RE.match(text):
+        return False, ""
+    if span["flags"] & FLAG_SUPERSCRIPT:
+        return True, "flag"
+    smaller = span["size"] <= body_size * 0.8
+    raised = span["origin"][1] < baseline - 0.2 * body_size
+    if smaller and raised:
+        return True, "heuristic"
+    return False, ""
+
+
+def _assemble_block(block, body_size: float):
+    """
+    Flatten a text block into plain text plus marker positions.
+
+    Returns (text, markers, dominant_size, bold) where markers is a list of
+    (offset, marker, method) and offset is the position in `text` the marker
+    follows.
+    """
+    pieces = []
+    markers = []
+    length = 0
+    size_chars = {}
+    bold_chars = 0
+    total_chars = 0
+    last_was_marker = False
+
+    def _append(piece: str):
+        nonlocal length
+        pieces.append(piece)
+        length += len(piece)
+
+    for line_idx, line in enumerate(block.get("lines", [])):
+        if not line["spans"]:
+            continue
+        baseline = _line_baseline(line)
+
+        if line_idx > 0 and pieces:
+            joined = "".join(pieces)
+            if joined.endswith("-") and not joined.endswith(" -"):
+                # De-hyphenate words broken across lines
+                pieces[:] = [joined[:-1]]
+                length -= 1
+            elif not joined.endswith(" "):
+                _append(" ")
+
+        for span in line["spans"]:
+            text = span["text"]
+            if not text:
+                continue
+
+            is_marker, method = _span_is_superscript(span, baseline, body_size)
+            if is_marker:
+                marker = _normalize_marker(text)
+                if last_was_marker and markers:
+                    offset, previous, previous_method = markers[-1]
+                    merged_method = previous_method if previous_method == method else "heuristic"
+                    markers[-1] = (offset, _normalize_marker(previous + "," + marker), merged_method)
+                elif marker:
+                    markers.append((length, marker, method))
+                last_was_marker = True
+                continue
+
+            # Inline Unicode superscript digits inside an ordinary span
+            cursor = 0
+            for match in UNICODE_MARKER_RE.finditer(text):
+                _append(text[cursor:match.start()])
+                markers.append((length, _normalize_marker(match.group(0)), "unicode"))
+                cursor = match.end()
+            _append(text[cursor:])
+
+            if text.strip():
+                last_was_marker = False
+            stripped = len(text.strip())
+            total_chars += stripped
+            size_chars[round(span["size"], 1)] = size_chars.get(round(span["size"], 1), 0) + stripped
+            if span["flags"] & FLAG_BOLD:
+                bold_chars += stripped
+
+    text = "".join(pieces)
+    dominant_size = max(size_chars, key=size_chars.get) if size_chars else body_size
+    bold = total_chars > 0 and bold_chars / total_chars > 0.6
+    return text, markers, dominant_size, bold
+
+
+def _paragraphs(blocks, body_size: float):
+    """
+    Yield (text, markers, size, bold) per paragraph.
+
+    PyMuPDF often starts a new block after a line that ends in a raised
+    superscript, so a block that does not end a sentence is merged with the
+    next block when that one starts in lower case just below it.
+    """
+    current = None
+    previous_bottom = None
+
+    for block in blocks:
+        text, markers, size, bold = _assemble_block(block, body_size)
+        top, bottom = block["bbox"][1], block["bbox"][3]
+
+        continues = (
+            current is not None
+            and current[0].rstrip()
+            and current[0].rstrip()[-1] not in ".!?:"
+            and text[:1].islower()
+            and top - previous_bottom < body_size * 1.5
+        )
+        if continues:
+            joined = current[0].rstrip() + " "
+            shifted = [(offset + len(joined), marker, method) for offset, marker, method in markers]
+            current = (joined + text, current[1] + shifted, current[2], current[3])
+        else:
+            if current is not None:
+                yield current
+            current = (text, markers, size, bold)
+        previous_bottom = bottom
+
+    if current is not None:
+        yield current
+
+
+def _is_heading(text: str, size: float, bold: bool, body_size: float) -> bool:
+    stripped = text.strip()
+    if not stripped or len(stripped) > 150 or not re.search(r"[A-Za-z]", stripped):
+        return False
+    if stripped.endswith((".", ",", ";")):
+        return False
+    return size >= body_size * 1.15 or (bold and size >= body_size * 0.95)
+
+
+def _sentence_for_offset(text: str, offset: int) -> str:
+    """Return the sentence that ends at or contains the character before `offset`."""
+    anchor = min(offset, len(text))
+    while anchor > 0 and text[anchor - 1] in " \t\n":
+        anchor -= 1
+    if anchor == 0:
+        return ""
+
+    start = 0
+    for boundary in SENTENCE_BOUNDARY_RE.finditer(text):
+        if boundary.start() >= anchor:
+            return text[start:boundary.start()].strip()
+        start = boundary.end()
+    return text[start:].strip()
+
+
+def scan_page(page, heading: Optional[str], confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD) -> Tuple[PageScan, Optional[str]]:
+    """
+    Detect citation markers on one page.
+
+    Args:
+        page: PyMuPDF page
+        heading: Heading in effect at the top of this page (carried from the previous page)
+        confidence_threshold: Pages scoring below this are flagged for the LLM
+
+    Returns:
+        (PageScan, heading in effect at the bottom of this page)
+    """
+    page_number = page.number + 1
+    raw_text = page.get_text("text").strip()
+
+    if len(raw_text) < MIN_TEXT_CHARS:
+        coverage = _image_coverage(page)
+        if coverage > 0.3:
+            return PageScan(page_number, confidence=0.0, needs_llm=True,
+                            reason=f"scanned ({coverage:.0%} image, {len(raw_text)} chars)"), heading
+        if not raw_text:
+            return PageScan(page_number, reason="no text"), heading
+
+    blocks = [b for b in page.get_text("dict")["blocks"] if b.get("type") == 0]
+    body_size = _body_font_size(blocks)
+
+    citations = []
+    weight = 0.0
+    markers_seen = 0
+    unattached = 0
+
+    for text, markers, size, bold in _paragraphs(blocks, body_size):
+        if not markers and _is_heading(text, size, bold, body_size):
+            heading = re.sub(r"\s+", " ", text).strip()
+            continue
+
+        for offset, marker, method in markers:
+            markers_seen += 1
+            sentence = _sentence_for_offset(text, offset)
+            if not sentence:
+                unattached += 1
+                continue
+            weight += HEURISTIC_MARKER_WEIGHT if method == "heuristic" else 1.0
+            citations.append({
+                "page_number": page_number,
+                "superscript_number": marker,
+                "heading": heading,
+                "statement": re.sub(r"\s+", " ", sentence),
+            })
+
+    if not markers_seen:
+        return PageScan(page_number, reason="no markers"), heading
+
+    confidence = weight / markers_seen
+    needs_llm = confidence < confidence_threshold
+    reason = f"{markers_seen} markers, {unattached} unattached"
+    return PageScan(page_number, citations, round(confidence, 3), needs_llm, reason), heading
+
+
+def scan_document(doc, confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD) -> List[PageScan]:
+    """Run scan_page over every page, carrying the current heading across pages."""
+    scans = []
+    heading = None
+    for page in doc:
+        scan, heading = scan_page(page, heading, confidence_threshold)
+        scans.append(scan)
+    return scans
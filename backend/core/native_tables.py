@@ -0,0 +1,264 @@
+"""
+Native extraction of GRID compatibility tables (● / ◆ symbol matrices).
+
+Uses PyMuPDF table detection for the cell grid, then reads each mark cell
+from its text glyphs (●, ◆, ...) or, when the symbol is drawn as a vector
+shape, from the small drawings inside the cell. Row-name superscripts come
+from span metadata. Produces the same record schema as the vision prompt
+(row_name, superscript_number, ph_value, column_name, mark_type, ...) so
+conversion.build_validation_rows_image1 consumes it unchanged.
+
+Each page gets a confidence score; statement tables, image-only tables and
+pages with unreadable cells are flagged so the caller can send only those to
+Gemini.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from native_citations import FLAG_SUPERSCRIPT, MARKER_TEXT_RE
+
+CIRCLE_GLYPHS = set("●•⬤○◯◉◦")
+DIAMOND_GLYPHS = set("◆♦◇⬥⬦❖")
+PH_HEADER_RE = re.compile(r"^\s*ph\b", re.IGNORECASE)
+
+# Below this many mark columns the table is treated as a STATEMENT table
+MIN_MARK_COLUMNS = 3
+# Vector marks are small compared to the cell they sit in (grid lines are not)
+MAX_MARK_FRACTION = 0.9
+DEFAULT_CONFIDENCE_THRESHOLD = 0.9
+
+
+@dataclass
+class TableScan:
+    """Native extraction result for one page."""
+    page_number: int
+    rows: List[dict] = field(default_factory=list)
+    confidence: float = 0.0
+    needs_llm: bool = True
+    reason: str = ""
+
+
+def _clean(text: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def _header_name(text: Optional[str]) -> str:
+    # Headers are joined with "." downstream, so periods inside a header would split it
+    return _clean(text).replace(".", "").strip()
+
+
+def _contains(cell: Tuple[float, float, float, float], x: float, y: float) -> bool:
+    return cell[0] <= x <= cell[2] and cell[1] <= y <= cell[3]
+
+
+def _vector_marks(page) -> List[Tuple[float, float, float, float, str]]:
+    """Small filled/stroked shapes on the page as (x0, y0, x1, y1, shape)."""
+    marks = []
+    try:
+        drawings = page.get_drawings()
+    except Exception:
+        return marks
+
+    for path in drawings:
+        rect = path["rect"]
+        if rect.width < 1 or rect.height < 1 or rect.width > 30 or rect.height > 30:
+            continue
+        ops = [item[0] for item in path["items"]]
+        if ops.count("c") >= 2:
+            shape = "Circle"
+        elif "qu" in ops or ops.count("l") >= 3:
+            shape = "Diamond"
+        elif "re" in ops and abs(rect.width - rect.height) < 0.5:
+            # Squares are occasionally used for diamonds drawn unrotated
+            shape = "Diamond"
+        else:
+            continue
+        marks.append((rect.x0, rect.y0, rect.x1, rect.y1, shape))
+    return marks
+
+
+def _cell_mark(text: str, cell, vector_marks) -> Tuple[Optional[str], bool]:
+    """
+    Read one mark cell.
+
+    Returns (mark, readable): mark is "Circle", "Diamond" or None; readable is
+    False when the cell holds something this extractor does not understand.
+    """
+    glyphs = [ch for ch in text if not ch.isspace()]
+    if glyphs:
+        if all(ch in CIRCLE_GLYPHS for ch in glyphs):
+            return "Circle", True
+        if all(ch in DIAMOND_GLYPHS for ch in glyphs):
+            return "Diamond", True
+        return None, False
+
+    if cell is None:
+        return None, True
+
+    width = cell[2] - cell[0]
+    height = cell[3] - cell[1]
+    shapes = set()
+    for x0, y0, x1, y1, shape in vector_marks:
+        if x1 - x0 > width * MAX_MARK_FRACTION or y1 - y0 > height * MAX_MARK_FRACTION:
+            continue
+        if _contains(cell, (x0 + x1) / 2, (y0 + y1) / 2):
+            shapes.add(shape)
+    if len(shapes) > 1:
+        return None, False
+    return (shapes.pop() if shapes else None), True
+
+
+def _row_name_and_marker(page, cell, text: str) -> Tuple[str, str]:
+    """Split the row-name cell into (name, superscript_number)."""
+    name = _clean(text)
+    if cell is None:
+        return name, ""
+
+    markers = []
+    body_size = None
+    try:
+        blocks = page.get_text("dict", clip=cell)["blocks"]
+    except Exception:
+        blocks = []
+    spans = [span for block in blocks for line in block.get("lines", []) for span in line["spans"] if span["text"].strip()]
+    if spans:
+        body_size = max(span["size"] for span in spans)
+    for span in spans:
+        if not MARKER_TEXT_RE.match(span["text"]):
+            continue
+        if span["flags"] & FLAG_SUPERSCRIPT or (body_size and span["size"] <= body_size * 0.8):
+            markers.append(span["text"].strip().strip(","))
+
+    if markers:
+        marker = ",".join(markers)
+        # extract() glues the markers onto the name ("amikacin1,2"); peel them off the end
+        for raw in reversed(markers):
+            name = name.rstrip(" ,")
+            if name.endswith(raw):
+                name = name[: -len(raw)]
+        return name.rstrip(), re.sub(r"\s+", "", marker)
+
+    # Same-size trailing digits ("amikacin 1,2") are too ambiguous to split silently
+    return name, ""
+
+
+def _grid_columns(header: List[str]) -> Optional[Tuple[Optional[int], List[int]]]:
+    """Return (ph_column, mark_columns) or None when the header is not a GRID header."""
+    ph_column = None
+    mark_columns = []
+    for idx, name in enumerate(header[1:], start=1):
+        if ph_column is None and PH_HEADER_RE.match(name):
+            ph_column = idx
+        elif name:
+            mark_columns.append(idx)
+    if len(mark_columns) < MIN_MARK_COLUMNS:
+        return None
+    return ph_column, mark_columns
+
+
+def _table_rows(page, table, vector_marks, page_number: int):
+    """Extract one GRID table; returns (rows, readable_cells, total_cells) or None."""
+    data = table.extract()
+    if not data:
+        return None
+
+    if table.header.names and any(table.header.names):
+        header = [_header_name(name) for name in table.header.names]
+        body_start = 0 if table.header.external else 1
+    else:
+        header = [_header_name(name) for name in data[0]]
+        body_start = 1
+
+    columns = _grid_columns(header)
+    if columns is None:
+        return None
+    ph_column, mark_columns = columns
+
+    rows = []
+    readable = 0
+    total = 0
+    for row_idx in range(body_start, len(data)):
+        values = data[row_idx]
+        cells = table.rows[row_idx].cells if row_idx < len(table.rows) else [None] * len(values)
+        if not _clean(values[0]) and not any(_clean(v) for v in values[1:]):
+            continue
+
+        row_name, superscript = _row_name_and_marker(page, cells[0], values[0] or "")
+        total += 1
+        readable += 1 if row_name else 0
+
+        ph_value = _clean(values[ph_column]) if ph_column is not None else ""
+
+        marked_columns = []
+        mark_types = []
+        for col in mark_columns:
+            mark, ok = _cell_mark(values[col] or "", cells[col], vector_marks)
+            total += 1
+            readable += 1 if ok else 0
+            if mark:
+                marked_columns.append(header[col])
+                mark_types.append(mark)
+
+        rows.append({
+            "page_number": page_number,
+            "row_name": row_name,
+            "superscript_number": superscript or None,
+            "ph_value": ph_value or None,
+            "column_name": ".".join(marked_columns) or None,
+            "mark_type": ".".join(mark_types) or None,
+            "statement": None,
+            "superscript_in_statement": None,
+        })
+
+    return rows, readable, total
+
+
+def extract_grid_page(page, confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD) -> TableScan:
+    """
+    Extract the GRID tables on one page.
+
+    Args:
+        page: PyMuPDF page
+        confidence_threshold: Pages scoring below this are flagged for the LLM
+
+    Returns:
+        TableScan; `rows` is only meant to be used when `needs_llm` is False
+    """
+    page_number = page.number + 1
+    try:
+        tables = page.find_tables().tables
+    except Exception as e:
+        return TableScan(page_number, reason=f"table detection failed: {e}")
+    if not tables:
+        return TableScan(page_number, reason="no table detected")
+
+    vector_marks = _vector_marks(page)
+    rows = []
+    readable = 0
+    total = 0
+    for table in tables:
+        extracted = _table_rows(page, table, vector_marks, page_number)
+        if extracted is None:
+            return TableScan(page_number, reason="not a grid table (statement table or unknown header)")
+        table_rows, table_readable, table_total = extracted
+        rows.extend(table_rows)
+        readable += table_readable
+        total += table_total
+
+    if not rows:
+        return TableScan(page_number, reason="grid table without data rows")
+    if not any(row["column_name"] for row in rows):
+        # Symbols are probably part of an embedded image
+        return TableScan(page_number, reason="no readable marks")
+
+    confidence = readable / total if total else 0.0
+    needs_llm = confidence < confidence_threshold
+    reason = f"{len(rows)} rows, {total - readable} unreadable cells"
+    return TableScan(page_number, rows, round(confidence, 3), needs_llm, reason)
+
+
+def extract_grid_pages(doc, page_numbers: List[int], confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD) -> Dict[int, TableScan]:
+    """Run extract_grid_page over the given 1-based pages."""
+    return {page_num: extract_grid_page(doc[page_num - 1], confidence_threshold) for page_num in page_numbers}
@@ -0,0 +1,213 @@
+"""
+Keeps blocking work off the event loop in the FastAPI routers (validation_api.py).
+
+- run_cpu(): pure CPU work that makes no Gemini calls (e.g. PyMuPDF rendering
+  or triage) runs in a process pool (OFFLOAD_PROCESSES, default 2; 0 runs it
+  in the thread pool instead). The pool uses the "spawn" start method, so
+  workers do not inherit the server's threads or client sockets, and its
+  workers run at lower priority (OFFLOAD_NICE, default 10).
+- run_blocking(): Gemini calls, the extractors (mostly Gemini vision calls)
+  and other blocking I/O run in a thread pool (OFFLOAD_THREADS, default 16).
+  They must stay in this process: a pool worker would build its own
+  gemini_rate_limiter and the process as a whole would exceed
+  GEMINI_REQUESTS_PER_MINUTE.
+- @concurrency_limit(route): caps in-flight requests per route
+  (OFFLOAD_LIMIT_<ROUTE>, defaults in ROUTE_LIMITS). Extra requests wait up to
+  OFFLOAD_QUEUE_SECONDS (default 30) for a slot, then get 429 with Retry-After.
+  Streaming routes take the slot with acquire_slot()/release_slot() instead.
+
+While this work runs, the event loop stays free for health checks and the
+other routes.
+
+Usage:
+    @drug_router.post("/extract")
+    @concurrency_limit("drug_extract")
+    async def extract_drug_pdf(...):
+        records = await run_blocking(extract_drug_superscript_table_data, temp_path)
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Max concurrent requests per route (override with OFFLOAD_LIMIT_<ROUTE>)
+ROUTE_LIMITS = {
+    "drug_extract": 2,
+    "drug_convert": 8,
+    "drug_validate": 4,
+    "drug_pipeline": 1,
+    "research_extract": 2,
+    "research_validate": 4,
+    "drug_batch": 1,
+    "research_batch": 1,
+}
+DEFAULT_ROUTE_LIMIT = 4
+
+_lock = threading.Lock()
+_process_pool = None
+_thread_pool = None
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+_in_flight: Dict[str, int] = {}
+_waiting: Dict[str, int] = {}
+
+
+def route_limit(route: str) -> int:
+    return max(1, int(os.getenv(f"OFFLOAD_LIMIT_{route.upper()}", str(ROUTE_LIMITS.get(route, DEFAULT_ROUTE_LIMIT)))))
+
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        with _lock:
+            if _thread_pool is None:
+                _thread_pool = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("OFFLOAD_THREADS", "16")), thread_name_prefix="offload"
+                )
+    return _thread_pool
+
+
+def _init_worker():
+    # Lower priority, so the API process keeps winning the CPU when cores are scarce
+    niceness = int(os.getenv("OFFLOAD_NICE", "10"))
+    if niceness and hasattr(os, "nice"):
+        try:
+            os.nice(niceness)
+        except OSError:
+            pass
+
+
+def _get_process_pool():
+    """Process pool for CPU-bound work, or None when OFFLOAD_PROCESSES=0."""
+    global _process_pool
+    processes = int(os.getenv("OFFLOAD_PROCESSES", "2"))
+    if processes <= 0:
+        return None
+    if _process_pool is None:
+        with _lock:
+            if _process_pool is None:
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+                logger.info(f"[OFFLOAD] Started process pool with {processes} workers")
+    return _process_pool
+
+
+def _discard_process_pool(pool):
+    global _process_pool
+    with _lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run blocking I/O (e.g. a Gemini call) in the shared thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_thread_pool(), functools.partial(func, *args, **kwargs))
+
+
+async def run_cpu(func, *args, **kwargs):
+    """
+    Run CPU-bound work in the process pool.
+
+    Nothing run here may call Gemini: each worker process has its own rate limiter.
+
+    `func` and its arguments must be picklable (module-level functions, plain
+    data). A crashed worker fails this call and the pool is rebuilt for the next.
+    """
+    pool = _get_process_pool()
+    if pool is None:
+        return await run_blocking(func, *args, **kwargs)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+    except BrokenProcessPool:
+        logger.error("[OFFLOAD] Process pool broke; it will be restarted on the next request")
+        _discard_process_pool(pool)
+        raise
+
+
+def _semaphore(route: str) -> asyncio.Semaphore:
+    semaphore = _semaphores.get(route)
+    if semaphore is None:
+        semaphore = _semaphores.setdefault(route, asyncio.Semaphore(route_limit(route)))
+    return semaphore
+
+
+async def acquire_slot(route: str):
+    """
+    Wait for one of route_limit(route) slots; 429 with Retry-After after OFFLOAD_QUEUE_SECONDS.
+
+    Pair with release_slot(route). Routes that stream their response hold the
+    slot until the work behind the stream ends instead of using @concurrency_limit.
+    """
+    semaphore = _semaphore(route)
+    timeout = float(os.getenv("OFFLOAD_QUEUE_SECONDS", "30"))
+    _waiting[route] = _waiting.get(route, 0) + 1
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"[OFFLOAD] {route}: no slot after {timeout:.0f}s, rejecting")
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many concurrent '{route}' requests, retry later",
+            headers={"Retry-After": str(max(1, int(timeout)))},
+        )
+    finally:
+        _waiting[route] -= 1
+    _in_flight[route] = _in_flight.get(route, 0) + 1
+
+
+def release_slot(route: str):
+    _in_flight[route] -= 1
+    _semaphore(route).release()
+
+
+def concurrency_limit(route: str):
+    """
+    Decorator for async routes: at most route_limit(route) requests run at once.
+
+    Goes below the router decorator so FastAPI registers the limited function;
+    the signature is preserved for FastAPI's parameter parsing.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            await acquire_slot(route)
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                release_slot(route)
+        return wrapper
+    return decorator
+
+
+def offload_status() -> dict:
+    """Current per-route load, for health endpoints."""
+    return {
+        route: {"in_flight": _in_flight.get(route, 0), "waiting": _waiting.get(route, 0), "limit": route_limit(route)}
+        for route in sorted(set(ROUTE_LIMITS) | set(_in_flight))
+    }
+
+
+def shutdown_pools(wait: bool = True):
+    """Stop both pools (call from the application's shutdown hook)."""
+    global _process_pool, _thread_pool
+    with _lock:
+        process_pool, thread_pool = _process_pool, _thread_pool
+        _process_pool = _thread_pool = None
+    if process_pool is not None:
+        process_pool.shutdown(wait=wait, cancel_futures=True)
+    if thread_pool is not None:
+        thread_pool.shutdown(wait=wait)
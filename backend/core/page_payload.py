@@ -0,0 +1,175 @@
+"""
+Per-page payload optimizer for Gemini extraction requests.
+
+A page slice serialized with a plain `tobytes()` carries every embedded image
+at full resolution plus unused objects inherited from the source document, so
+one photo-heavy brochure page can be several megabytes. For each request this
+module builds:
+
+- a compacted PDF slice: unused objects collected, streams deflated, images
+  above PAYLOAD_IMAGE_DPI (default 150) downsampled and metadata dropped;
+- for single pages whose compacted slice is still large (PAYLOAD_RASTER_MIN_KB,
+  default 256), a JPEG rendering at the lowest DPI that keeps the page's
+  smallest text legible.
+
+The raster is only used when it passes the legibility check (the smallest
+span, typically a superscript, must render at least PAYLOAD_MIN_GLYPH_PX
+pixels tall within PAYLOAD_MAX_DPI) and is clearly smaller than the PDF,
+because the PDF also carries the text layer. Every choice is recorded on the
+returned PagePayload for the extraction report. Set PAYLOAD_OPTIMIZER=0 to
+send plain slices.
+"""
+
+import math
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+import fitz  # PyMuPDF
+
+PDF_MIME = "application/pdf"
+JPEG_MIME = "image/jpeg"
+
+# Text smaller than this is treated as extraction noise, not as legible content
+MIN_FONT_SIZE = 2.0
+# Scanned pages have no text layer to size against
+SCANNED_DPI = 150
+MIN_RASTER_DPI = 96
+JPEG_QUALITY = 85
+# The raster must be at most this fraction of the compacted PDF to be chosen
+RASTER_MAX_RATIO = 0.8
+
+
+@dataclass
+class PagePayload:
+    """What is actually sent to Gemini for one request."""
+    pages: List[int]
+    data: bytes
+    mime_type: str = PDF_MIME
+    kind: str = "pdf"               # "pdf", "compact_pdf" or "raster"
+    original_bytes: int = 0
+    dpi: Optional[int] = None
+    reason: str = ""
+
+    def as_audit(self) -> dict:
+        return {
+            "kind": self.kind,
+            "bytes": len(self.data),
+            "original_bytes": self.original_bytes,
+            "dpi": self.dpi,
+            "reason": self.reason,
+        }
+
+
+def _settings() -> dict:
+    return {
+        "enabled": os.getenv("PAYLOAD_OPTIMIZER", "1") != "0",
+        "image_dpi": int(os.getenv("PAYLOAD_IMAGE_DPI", "150")),
+        "raster_min_bytes": int(os.getenv("PAYLOAD_RASTER_MIN_KB", "256")) * 1024,
+        "max_dpi": int(os.getenv("PAYLOAD_MAX_DPI", "220")),
+        "min_glyph_px": float(os.getenv("PAYLOAD_MIN_GLYPH_PX", "12")),
+    }
+
+
+def compact_pdf(doc, image_dpi: int = 150, garbage: int = 3) -> bytes:
+    """
+    Serialize `doc` as small as possible without touching its text or vectors.
+
+    Images rendered above 4/3 x image_dpi are resampled to image_dpi; metadata,
+    thumbnails and unused objects are dropped (garbage=4 also merges duplicate
+    objects, slower on large files); all streams are deflated. Modifies `doc`
+    in place.
+    """
+    if image_dpi > 0 and hasattr(doc, "rewrite_images"):
+        try:
+            doc.rewrite_images(dpi_threshold=math.ceil(image_dpi * 4 / 3), dpi_target=image_dpi, quality=JPEG_QUALITY)
+        except Exception:
+            # Older MuPDF builds or exotic image types: keep the originals
+            pass
+    try:
+        doc.scrub(
+            attached_files=False, clean_pages=False, embedded_files=False, hidden_text=False,
+            javascript=True, metadata=True, redactions=False, remove_links=False,
+            reset_fields=False, reset_responses=False, thumbnails=True, xml_metadata=True,
+        )
+    except Exception:
+        doc.set_metadata({})
+    return doc.tobytes(garbage=garbage, deflate=True, deflate_images=True, deflate_fonts=True)
+
+
+def legible_dpi(page, min_glyph_px: float, max_dpi: int):
+    """
+    Lowest DPI at which the page's smallest text is still `min_glyph_px` tall.
+
+    Returns (dpi, legible); legible is False when that DPI exceeds max_dpi.
+    """
+    smallest = None
+    for block in page.get_text("dict")["blocks"]:
+        if block.get("type") != 0:
+            continue
+        for line in block["lines"]:
+            for span in line["spans"]:
+                if span["text"].strip() and span["size"] >= MIN_FONT_SIZE:
+                    smallest = span["size"] if smallest is None else min(smallest, span["size"])
+
+    if smallest is None:
+        return SCANNED_DPI, True
+    dpi = max(MIN_RASTER_DPI, math.ceil(min_glyph_px * 72 / smallest))
+    return dpi, dpi <= max_dpi
+
+
+def rasterize_page(page, dpi: int) -> bytes:
+    """Render a page to JPEG at `dpi`."""
+    pix = page.get_pixmap(dpi=dpi, alpha=False)
+    return pix.tobytes("jpeg", jpg_quality=JPEG_QUALITY)
+
+
+def build_page_payload(doc, page_nums: List[int], allow_raster: bool = True) -> PagePayload:
+    """
+    Build the smallest acceptable payload for the given 1-based pages of `doc`.
+
+    Args:
+        doc: Open PyMuPDF document (used on the calling thread only)
+        page_nums: Pages to include, in order
+        allow_raster: Consider a JPEG rendering (single-page payloads only)
+
+    Returns:
+        PagePayload with the bytes to send and the choice that was made
+    """
+    settings = _settings()
+    sliced = fitz.open()
+    try:
+        for page_num in page_nums:
+            sliced.insert_pdf(doc, from_page=page_num - 1, to_page=page_num - 1)
+        plain = sliced.tobytes()
+        if not settings["enabled"]:
+            return PagePayload(pages=page_nums, data=plain, original_bytes=len(plain), reason="optimizer disabled")
+
+        compacted = compact_pdf(sliced, settings["image_dpi"])
+    finally:
+        sliced.close()
+
+    if len(compacted) < len(plain):
+        best = PagePayload(pages=page_nums, data=compacted, kind="compact_pdf", original_bytes=len(plain), reason="compacted")
+    else:
+        best = PagePayload(pages=page_nums, data=plain, original_bytes=len(plain), reason="already compact")
+
+    if not allow_raster or len(page_nums) != 1:
+        return best
+    if len(best.data) < settings["raster_min_bytes"]:
+        return best
+
+    page = doc[page_nums[0] - 1]
+    dpi, legible = legible_dpi(page, settings["min_glyph_px"], settings["max_dpi"])
+    if not legible:
+        best.reason += f"; raster needs {dpi} dpi for the smallest text (max {settings['max_dpi']})"
+        return best
+
+    raster = rasterize_page(page, dpi)
+    if len(raster) <= len(best.data) * RASTER_MAX_RATIO:
+        return PagePayload(
+            pages=page_nums, data=raster, mime_type=JPEG_MIME, kind="raster",
+            original_bytes=len(plain), dpi=dpi, reason=f"raster {len(raster)} < pdf {len(best.data)} bytes",
+        )
+    best.reason += f"; raster at {dpi} dpi was {len(raster)} bytes"
+    return best
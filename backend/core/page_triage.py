@@ -0,0 +1,170 @@
+"""
+Local page triage for the drug table extractor.
+
+Classifies each brochure page from cheap PyMuPDF signals (text density,
+`page.find_tables()`, vector drawing count and raster image coverage) before
+any Gemini call, so covers, legends, reference lists and blank pages are never
+sent to the vision prompt. Every decision carries its reason and signals so the
+job output can show why a page was dropped.
+
+Categories:
+    table           -> sent to the extractor
+    uncertain       -> sent to the extractor (looks tabular without ruling lines)
+    prose           -> dropped (legends, intro text)
+    reference-list  -> dropped (references are parsed from text elsewhere)
+    irrelevant      -> dropped (blank pages, covers)
+
+Pages that cannot be judged locally (scanned, image-only) are always sent, and
+so are pages that might hold a table drawn without ruling lines: they name a
+drug-table column ("Generic Drug name", "Additional Consideration", ...) or
+PyMuPDF finds rows when it aligns words instead of lines.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+CATEGORY_TABLE = "table"
+CATEGORY_PROSE = "prose"
+CATEGORY_REFERENCES = "reference-list"
+CATEGORY_IRRELEVANT = "irrelevant"
+CATEGORY_UNCERTAIN = "uncertain"
+
+REFERENCES_HEADING_RE = re.compile(r"^\s*(references|bibliography|literature cited)\s*$", re.IGNORECASE | re.MULTILINE)
+REFERENCE_LINE_RE = re.compile(r"^\s*\d{1,4}[.)]?\s+[A-Z][A-Za-z'\-]+,?\s+[A-Z]")
+TABLE_HEADER_RE = re.compile(
+    r"generic\s+drug\s+name|brand\s+name|additional\s+considerations?|phlebitis|local\s+site\s+pain",
+    re.IGNORECASE,
+)
+CITATION_HINT_RE = re.compile(r"et al\.|\(\d{4}\)|\b(19|20)\d{2}\b;|doi:|PMID", re.IGNORECASE)
+
+# Grid tables drawn without ruling lines still have many small vector shapes (● / ◆)
+MIN_TABLE_ROWS = 2
+MIN_GRID_DRAWINGS = 40
+# Word-aligned rows needed before an unruled page is kept as a possible table
+MIN_TEXT_TABLE_ROWS = 3
+# Horizontal gap between words (points) that separates table columns; word spacing in prose is far smaller
+COLUMN_GUTTER_PT = 12
+SPARSE_TEXT_CHARS = 400
+SCANNED_TEXT_CHARS = 50
+
+
+@dataclass
+class PageTriage:
+    """Triage decision for one page."""
+    page_number: int
+    category: str
+    send_to_llm: bool
+    reason: str
+    signals: dict = field(default_factory=dict)
+
+    def as_audit(self) -> dict:
+        return {
+            "page": self.page_number,
+            "category": self.category,
+            "sent_to_llm": self.send_to_llm,
+            "reason": self.reason,
+            **self.signals,
+        }
+
+
+def _find_table_rows(page, **kwargs) -> tuple:
+    """(tables, data rows) found by page.find_tables(**kwargs); header rows produce no records."""
+    tables = table_rows = 0
+    try:
+        for table in page.find_tables(**kwargs).tables:
+            tables += 1
+            table_rows += max(0, table.row_count - 1)
+    except Exception:
+        pass
+    return tables, table_rows
+
+
+def _gutter_rows(page) -> int:
+    """Text lines (by baseline) with at least one column-sized gap between consecutive words."""
+    rows = {}
+    for x0, _, x1, y1, *_ in page.get_text("words"):
+        rows.setdefault(round(y1), []).append((x0, x1))
+    gapped = 0
+    for words in rows.values():
+        words.sort()
+        if any(b[0] - a[1] >= COLUMN_GUTTER_PT for a, b in zip(words, words[1:])):
+            gapped += 1
+    return gapped
+
+
+def page_signals(page) -> dict:
+    """Collect the local signals used for triage and batch size estimation."""
+    text = page.get_text("text")
+    stripped = text.strip()
+    page_area = abs(page.rect) or 1.0
+
+    tables, table_rows = _find_table_rows(page)
+
+    try:
+        drawings = len(page.get_drawings())
+    except Exception:
+        drawings = 0
+
+    image_area = 0.0
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        image_area += max(0.0, x1 - x0) * max(0.0, y1 - y0)
+
+    lines = [line for line in stripped.splitlines() if line.strip()]
+    reference_lines = sum(1 for line in lines if REFERENCE_LINE_RE.match(line))
+
+    return {
+        "text_chars": len(stripped),
+        "text_density": round(len(stripped) / page_area * 1000, 2),
+        "tables": tables,
+        "table_rows": table_rows,
+        "drawings": drawings,
+        "image_coverage": round(min(1.0, image_area / page_area), 3),
+        "reference_lines": reference_lines,
+        "citation_hints": len(CITATION_HINT_RE.findall(stripped)),
+        "table_headers": sorted({m.lower() for m in TABLE_HEADER_RE.findall(stripped)}),
+        "has_references_heading": bool(REFERENCES_HEADING_RE.search(stripped)),
+        "lines": len(lines),
+    }
+
+
+def classify_page(page) -> PageTriage:
+    """Classify one page; see module docstring for the categories."""
+    page_number = page.number + 1
+    signals = page_signals(page)
+
+    text_chars = signals["text_chars"]
+    coverage = signals["image_coverage"]
+
+    if text_chars < SCANNED_TEXT_CHARS and coverage > 0.5:
+        return PageTriage(page_number, CATEGORY_TABLE, True, "scanned/image-only page, cannot triage locally", signals)
+
+    if text_chars == 0 and coverage < 0.05 and signals["drawings"] < 5:
+        return PageTriage(page_number, CATEGORY_IRRELEVANT, False, "blank page", signals)
+
+    if signals["table_rows"] >= MIN_TABLE_ROWS:
+        return PageTriage(page_number, CATEGORY_TABLE, True, f"{signals['table_rows']} table rows detected", signals)
+
+    if signals["drawings"] >= MIN_GRID_DRAWINGS:
+        return PageTriage(page_number, CATEGORY_TABLE, True, f"{signals['drawings']} vector shapes (grid/glyph layout)", signals)
+
+    if signals["table_headers"]:
+        headers = ", ".join(signals["table_headers"])
+        return PageTriage(page_number, CATEGORY_TABLE, True, f"drug table header ({headers})", signals)
+
+    reference_share = signals["reference_lines"] / max(1, signals["lines"])
+    if signals["has_references_heading"] or (reference_share > 0.3 and signals["citation_hints"] >= 3):
+        return PageTriage(page_number, CATEGORY_REFERENCES, False, "reference list", signals)
+
+    # Tables without ruling lines: only worth the slower word-alignment pass before dropping a page.
+    # The text strategy also "finds" tables in running text, so rows must show column gutters too.
+    _, text_rows = _find_table_rows(page, strategy="text")
+    signals["text_table_rows"] = min(text_rows, _gutter_rows(page))
+    if signals["text_table_rows"] >= MIN_TEXT_TABLE_ROWS:
+        return PageTriage(page_number, CATEGORY_UNCERTAIN, True,
+                          f"{signals['text_table_rows']} word-aligned rows, possible unruled table", signals)
+
+    if text_chars < SPARSE_TEXT_CHARS:
+        return PageTriage(page_number, CATEGORY_IRRELEVANT, False, "sparse text, no table (cover/divider)", signals)
+
+    return PageTriage(page_number, CATEGORY_PROSE, False, "running text, no table", signals)
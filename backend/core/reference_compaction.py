@@ -0,0 +1,172 @@
+"""
+Compaction of reference PDFs before they are uploaded to Gemini.
+
+Publisher PDFs often carry embedded thumbnails, XMP metadata, incremental-save
+leftovers and figures scanned at 300-600 DPI, so a 12-page paper can be
+10-30 MB. Before upload, each reference is rewritten with page_payload's
+compact_pdf: unused and duplicate objects collected, streams deflated, images
+above REFERENCE_IMAGE_DPI (default 150) downsampled, thumbnails and metadata
+dropped. Text and vector content are untouched.
+
+Compacted artifacts are cached by the SHA-256 of the original bytes (plus the
+compaction settings) in REFERENCE_CACHE_DIR (default
+<tmp>/mlr_reference_cache, bounded by REFERENCE_CACHE_MAX_MB, default 1024),
+so a paper reused across jobs is only compacted once. Each result keeps the
+original hash, so uploads and reports can always be traced back to the file
+the user supplied. Set REFERENCE_COMPACTION=0 to upload originals.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import fitz  # PyMuPDF
+
+from extraction_cache import ExtractionCache
+from page_payload import compact_pdf
+
+logger = logging.getLogger(__name__)
+
+# Bump when compaction changes in a way that should invalidate cached artifacts
+COMPACTION_VERSION = "1"
+
+
+@dataclass
+class CompactionResult:
+    """A reference ready for upload, with the hash of the file it came from."""
+    filename: str
+    data: bytes
+    original_sha256: str
+    original_bytes: int
+    compacted_sha256: str
+    cached: bool = False
+    seconds: float = 0.0
+    reason: str = ""
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - len(self.data)
+
+    def as_audit(self) -> dict:
+        return {
+            "filename": self.filename,
+            "original_sha256": self.original_sha256,
+            "compacted_sha256": self.compacted_sha256,
+            "original_bytes": self.original_bytes,
+            "compacted_bytes": len(self.data),
+            "saved_bytes": self.saved_bytes,
+            "saved_ratio": round(self.saved_bytes / self.original_bytes, 3) if self.original_bytes else 0.0,
+            "cached": self.cached,
+            "seconds": round(self.seconds, 3),
+            "reason": self.reason,
+        }
+
+
+_reference_cache = None
+_reference_cache_lock = threading.Lock()
+
+
+def get_reference_cache() -> ExtractionCache:
+    """Process-wide store for compacted reference PDFs."""
+    global _reference_cache
+    if _reference_cache is None:
+        with _reference_cache_lock:
+            if _reference_cache is None:
+                directory = os.getenv("REFERENCE_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "mlr_reference_cache")
+                max_mb = int(os.getenv("REFERENCE_CACHE_MAX_MB", "1024"))
+                _reference_cache = ExtractionCache(directory, max_bytes=max_mb * 1_048_576)
+    return _reference_cache
+
+
+def _compact(pdf_bytes: bytes, image_dpi: int) -> bytes:
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        if doc.needs_pass:
+            raise ValueError("encrypted PDF")
+        return compact_pdf(doc, image_dpi=image_dpi, garbage=4)
+    finally:
+        doc.close()
+
+
+def compact_reference(pdf_bytes: bytes, filename: str = "", cache: Optional[ExtractionCache] = None) -> CompactionResult:
+    """
+    Return the smallest safe version of a reference PDF.
+
+    Falls back to the original bytes when compaction is disabled, fails, or
+    does not make the file smaller.
+
+    Args:
+        pdf_bytes: Reference PDF as supplied by the user
+        filename: Used for logging and the audit record only
+        cache: Artifact store override (defaults to get_reference_cache())
+
+    Returns:
+        CompactionResult with the bytes to upload and the savings
+    """
+    started = time.perf_counter()
+    original_sha = hashlib.sha256(pdf_bytes).hexdigest()
+
+    def _original(reason: str) -> CompactionResult:
+        return CompactionResult(
+            filename=filename, data=pdf_bytes, original_sha256=original_sha, original_bytes=len(pdf_bytes),
+            compacted_sha256=original_sha, seconds=time.perf_counter() - started, reason=reason,
+        )
+
+    if os.getenv("REFERENCE_COMPACTION", "1") == "0":
+        return _original("compaction disabled")
+
+    image_dpi = int(os.getenv("REFERENCE_IMAGE_DPI", "150"))
+    if cache is None:
+        cache = get_reference_cache()
+    key = cache.make_key(original_sha, "reference_pdf", f"{COMPACTION_VERSION}:{image_dpi}")
+
+    meta = cache.get(key)
+    if meta is not None:
+        if meta.get("compacted_sha256") == original_sha:
+            result = _original(meta.get("reason", "already compact"))
+            result.cached = True
+            return result
+        data = cache.get_blob(key)
+        if data is not None and hashlib.sha256(data).hexdigest() == meta.get("compacted_sha256"):
+            return CompactionResult(
+                filename=filename, data=data, original_sha256=original_sha, original_bytes=len(pdf_bytes),
+                compacted_sha256=meta["compacted_sha256"], cached=True,
+                seconds=time.perf_counter() - started, reason="cached",
+            )
+
+    try:
+        compacted = _compact(pdf_bytes, image_dpi)
+    except Exception as e:
+        logger.warning(f"[COMPACTION] Uploading {filename or original_sha[:12]} as-is: {e}")
+        return _original(f"compaction failed: {e}")
+
+    if len(compacted) >= len(pdf_bytes):
+        result = _original("already compact")
+        cache.put(key, {"original_sha256": original_sha, "compacted_sha256": original_sha, "reason": result.reason})
+    else:
+        result = CompactionResult(
+            filename=filename, data=compacted, original_sha256=original_sha, original_bytes=len(pdf_bytes),
+            compacted_sha256=hashlib.sha256(compacted).hexdigest(),
+            seconds=time.perf_counter() - started, reason="compacted",
+        )
+        # Blob first, so a reader never finds metadata pointing at a missing artifact
+        cache.put_blob(key, compacted)
+        cache.put(key, {
+            "original_sha256": original_sha,
+            "compacted_sha256": result.compacted_sha256,
+            "original_bytes": result.original_bytes,
+            "compacted_bytes": len(compacted),
+            "reason": result.reason,
+        })
+
+    logger.info(
+        f"[COMPACTION] {filename or original_sha[:12]}: {result.original_bytes / 1_048_576:.2f} MB -> "
+        f"{len(result.data) / 1_048_576:.2f} MB ({result.saved_bytes / max(1, result.original_bytes):.0%} saved) "
+        f"in {result.seconds:.2f}s"
+    )
+    return result
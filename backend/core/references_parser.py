@@ -0,0 +1,202 @@
+"""
+Single-pass parser for the numbered references section of a brochure.
+
+The section is located by scanning lines from the END of the document for a
+"References" heading, so running text that merely mentions references earlier
+on is never picked up. When the list continues under a repeated heading on the
+next page ("References", "References (cont'd)"), earlier headings are followed
+back until the list starts.
+
+Entries are then tokenized line by line in one pass. A numbered line only
+starts a new entry when its number continues the sequence (expected, or a
+small gap for an entry lost in text extraction); this keeps wrapped numerals
+such as "Vol. 12." or "2019;12. " inside the current reference and supports
+any number of references (no 3-digit limit). Page footers inside the section
+close the current entry instead of truncating the whole list.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# A heading may share its line with the first entries ("References: 1. Smith J, ...")
+HEADING_RE = re.compile(
+    r"^\s*(references|bibliography|literature cited)\b\s*(\(?\s*(cont(inued|'d|\.)?)\s*\)?)?\s*:?\s*(?P<rest>.*)$",
+    re.IGNORECASE,
+)
+FOOTER_RE = re.compile(r"(BD, the BD Logo|Becton, Dickinson|©|Copyright|All rights reserved)", re.IGNORECASE)
+ENTRY_RE = re.compile(r"^\s*\[?(\d{1,5})[.)\]]\s+(.*)$")
+NUMBER_ONLY_RE = re.compile(r"^\s*\[?(\d{1,5})[.)\]]\s*$")
+
+# A line-leading number this far past the expected one still starts an entry
+MAX_NUMBER_GAP = 2
+
+
+def _heading(line: str) -> Optional[str]:
+    """
+    Return the rest of the line when `line` is a references heading, else None.
+
+    The rest is "" for a heading alone on its line. Text after the heading
+    only counts when it opens a numbered entry, so prose that starts with the
+    word "References" is not taken for the section.
+    """
+    match = HEADING_RE.match(line)
+    if not match:
+        return None
+    rest = match.group("rest").strip()
+    if rest and _entry_start(rest, None) is None:
+        return None
+    return rest
+
+
+def _entry_start(line: str, expected: Optional[int]) -> Optional[Tuple[int, str]]:
+    """Return (number, rest) when `line` starts the next reference entry."""
+    head = line.lstrip()[:1]
+    if not head.isdigit() and head != "[":
+        return None
+    match = NUMBER_ONLY_RE.match(line)
+    if match:
+        number, rest = int(match.group(1)), ""
+    else:
+        match = ENTRY_RE.match(line)
+        if not match:
+            return None
+        number, rest = int(match.group(1)), match.group(2)
+
+    if expected is None:
+        return number, rest
+    if expected <= number <= expected + MAX_NUMBER_GAP:
+        return number, rest
+    return None
+
+
+def _split_inline(text: str, expected: int) -> List[Tuple[Optional[int], str]]:
+    """
+    Split a line holding several entries ("... 2019. 4. Doe B, ...").
+
+    Only the exact next number followed by a word is accepted inline, which
+    keeps "Vol. 12." and "2019;12. 345" intact while still splitting entries
+    that start lowercase ("3. de Souza ...").
+    Returns [(None, tail of current entry), (n, text), ...].
+    """
+    parts = [(None, text)]
+    while True:
+        number, current = parts[-1]
+        if str(expected) not in current:
+            return parts
+        cut = -1
+        for marker in (f" {expected}. ", f" {expected}) "):
+            found = current.find(marker)
+            if found != -1 and (cut == -1 or found < cut):
+                cut = found
+        if cut == -1:
+            return parts
+        after = current[cut + len(str(expected)) + 3:]
+        if not after[:1].isalpha():
+            return parts
+        parts[-1] = (number, current[:cut])
+        parts.append((expected, after))
+        expected += 1
+
+
+def find_references_section(text: str) -> List[str]:
+    """
+    Return the lines of the references section (headings removed).
+
+    Scans backwards from the end of the document; an empty list means no
+    heading was found.
+    """
+    lines = text.splitlines()
+    headings = {}
+    index = len(lines) - 1
+
+    while index >= 0:
+        rest = _heading(lines[index])
+        if rest is not None:
+            headings[index] = rest
+            first = _first_entry_number([rest] + lines[index + 1:], 0)
+            # The list started under this heading, or nothing numbered follows it
+            if first is None or first <= 1:
+                break
+        index -= 1
+
+    if not headings:
+        return []
+
+    start = min(headings)
+    section = []
+    for offset in range(start, len(lines)):
+        if offset in headings:
+            # Entries that share the heading's line belong to the section
+            if headings[offset]:
+                section.append(headings[offset])
+        else:
+            section.append(lines[offset])
+    return section
+
+
+def _first_entry_number(lines: List[str], start: int) -> Optional[int]:
+    for line in lines[start:]:
+        if _heading(line) is not None:
+            return None
+        if not line.strip():
+            continue
+        entry = _entry_start(line, None)
+        return entry[0] if entry else None
+    return None
+
+
+def parse_references(text: str) -> Dict[str, str]:
+    """
+    Parse the numbered references of a document.
+
+    Args:
+        text: Full document text (e.g. concatenated PyMuPDF page text)
+
+    Returns:
+        Dict mapping the reference number (as a string) to its text
+    """
+    references = {}
+    current_number = None
+    current_parts = []
+    expected = None
+    closed = False
+
+    def _flush():
+        if current_number is not None:
+            entry = " ".join(" ".join(current_parts).split())
+            if entry or str(current_number) not in references:
+                references[str(current_number)] = entry
+
+    for line in find_references_section(text):
+        stripped = line.strip()
+        if not stripped:
+            continue
+
+        if FOOTER_RE.search(stripped):
+            # Footer of a page in the middle of the list: end the entry, keep the list open
+            closed = True
+            continue
+
+        entry = _entry_start(stripped, expected)
+        if entry is not None:
+            _flush()
+            current_number, rest = entry
+            current_parts = []
+            expected = current_number + 1
+            closed = False
+            stripped = rest
+            if not stripped:
+                continue
+        elif current_number is None or closed:
+            continue
+
+        pieces = _split_inline(stripped, expected)
+        current_parts.append(pieces[0][1])
+        for number, piece in pieces[1:]:
+            _flush()
+            current_number = number
+            current_parts = [piece]
+            expected = number + 1
+
+    _flush()
+    return references
@@ -0,0 +1,266 @@
+"""
+Constant-memory exports of validation results: CSV, JSONL, XLSX and Parquet.
+
+Rows are consumed one at a time from any iterable of dicts (a job's results,
+a queryset iterator, a generator) and written out in chunks of
+EXPORT_CHUNK_ROWS (default 1000), so memory stays flat whatever the job size:
+
+- csv / jsonl: encoded chunks are yielded as soon as they are written;
+- parquet: one Arrow record batch per chunk through a streaming ParquetWriter
+  (pyarrow; a deployment without it answers parquet requests with
+  ExportUnavailable);
+- xlsx: openpyxl write-only mode, which spools rows to a temp file instead of
+  building the workbook in memory. A zip can only be sent once its central
+  directory is written, so the finished file is then streamed from disk.
+
+Usage:
+    for chunk in export_rows(rows, "csv"):
+        response.write(chunk)
+
+    write_export(rows, "xlsx", "results.xlsx")
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional
+
+EXPORT_COLUMNS = [
+    "statement",
+    "reference_no",
+    "reference",
+    "matched_paper",
+    "matched_evidence",
+    "validation_result",
+    "page_location",
+    "confidence_score",
+    "matching_method",
+    "analysis_summary",
+]
+
+# format -> (content type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+FILE_CHUNK_BYTES = 64 * 1024
+# Excel refuses longer cell values
+XLSX_MAX_CELL_CHARS = 32767
+
+
+class ExportUnavailable(RuntimeError):
+    """The format needs an optional dependency that is not installed."""
+
+
+def _chunk_rows() -> int:
+    return max(1, int(os.getenv("EXPORT_CHUNK_ROWS", "1000")))
+
+
+def _cell(value):
+    """Flatten one value for tabular formats (None -> "", containers -> JSON)."""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, default=str, ensure_ascii=False)
+    return value
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained as byte chunks."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _stream_file(handle) -> Iterator[bytes]:
+    handle.seek(0)
+    while True:
+        chunk = handle.read(FILE_CHUNK_BYTES)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_csv(rows: Iterable[Dict], columns: List[str] = EXPORT_COLUMNS) -> Iterator[bytes]:
+    """Yield CSV (header first) as UTF-8 chunks of EXPORT_CHUNK_ROWS rows."""
+    chunk_rows = _chunk_rows()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow([_cell(row.get(column)) for column in columns])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_jsonl(rows: Iterable[Dict], columns: List[str] = EXPORT_COLUMNS) -> Iterator[bytes]:
+    """Yield one JSON object per line, EXPORT_CHUNK_ROWS lines per chunk."""
+    chunk_rows = _chunk_rows()
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({column: row.get(column) for column in columns}, default=str, ensure_ascii=False))
+        if len(lines) >= chunk_rows:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines.clear()
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def iter_xlsx(rows: Iterable[Dict], columns: List[str] = EXPORT_COLUMNS, sheet_name: str = "Results") -> Iterator[bytes]:
+    """Write a write-only workbook to a temp file, then yield it in 64 KB chunks."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+
+    def _xlsx_cell(value):
+        value = _cell(value)
+        if not isinstance(value, str):
+            return value
+        value = ILLEGAL_CHARACTERS_RE.sub("", value)[:XLSX_MAX_CELL_CHARS]
+        if value.startswith("="):
+            # Extracted text, not a formula
+            cell = WriteOnlyCell(sheet, value=value)
+            cell.data_type = "s"
+            return cell
+        return value
+
+    sheet.append(columns)
+    for row in rows:
+        sheet.append([_xlsx_cell(row.get(column)) for column in columns])
+
+    with tempfile.TemporaryFile() as handle:
+        workbook.save(handle)
+        yield from _stream_file(handle)
+
+
+def _parquet_schema(columns: List[str]):
+    import pyarrow as pa
+
+    return pa.schema([
+        (column, pa.float64() if column == "confidence_score" else pa.string())
+        for column in columns
+    ])
+
+
+def _parquet_batch(schema, rows: List[Dict]):
+    import pyarrow as pa
+
+    arrays = []
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+        if pa.types.is_floating(field.type):
+            values = [None if value in (None, "") else float(value) for value in values]
+        else:
+            values = [None if value is None else str(_cell(value)) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_parquet(rows: Iterable[Dict], columns: List[str] = EXPORT_COLUMNS) -> Iterator[bytes]:
+    """Yield a Parquet file written as one row group per EXPORT_CHUNK_ROWS rows."""
+    import pyarrow.parquet as pq
+
+    chunk_rows = _chunk_rows()
+    schema = _parquet_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                writer.write_batch(_parquet_batch(schema, batch))
+                batch.clear()
+                yield sink.drain()
+        if batch:
+            writer.write_batch(_parquet_batch(schema, batch))
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+_WRITERS = {
+    "csv": iter_csv,
+    "jsonl": iter_jsonl,
+    "xlsx": iter_xlsx,
+    "parquet": iter_parquet,
+}
+
+
+def check_export_format(export_format: str) -> None:
+    """
+    Raise before any output is produced if `export_format` cannot be written.
+
+    Raises:
+        ValueError: Unknown format
+        ExportUnavailable: Format needs a missing optional dependency
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{export_format}' (expected one of: {', '.join(EXPORT_FORMATS)})")
+    if export_format == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise ExportUnavailable("Parquet export requires pyarrow")
+
+
+def export_rows(rows: Iterable[Dict], export_format: str, columns: Optional[List[str]] = None) -> Iterator[bytes]:
+    """
+    Stream `rows` in the given format.
+
+    The format is checked immediately, so errors surface before the first
+    chunk (e.g. before HTTP headers are sent); rows are only read as the
+    returned iterator is consumed.
+
+    Args:
+        rows: Iterable of result dicts
+        export_format: "csv", "jsonl", "xlsx" or "parquet"
+        columns: Columns to write, in order (defaults to EXPORT_COLUMNS)
+
+    Returns:
+        Iterator of encoded byte chunks
+    """
+    check_export_format(export_format)
+    return _WRITERS[export_format](rows, columns or EXPORT_COLUMNS)
+
+
+def write_export(rows: Iterable[Dict], export_format: str, path: str, columns: Optional[List[str]] = None) -> str:
+    """Write `rows` to `path` chunk by chunk; returns the path."""
+    chunks = export_rows(rows, export_format, columns)
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return path
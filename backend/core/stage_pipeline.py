@@ -0,0 +1,245 @@
+"""
+Minimal streaming stage runner: a producer feeding a chain of worker stages
+through bounded queues.
+
+Each stage has its own thread pool and an input queue of at most
+`queue_size` items. A stage that falls behind fills its queue and blocks the
+stage in front of it (backpressure), so memory stays bounded no matter how far
+extraction runs ahead of validation. Every stage records how long its workers
+were busy, starved (waiting for input) and blocked (waiting for room
+downstream), which shows where the pipeline's time actually goes.
+
+The producer runs on the calling thread, which keeps single-threaded work
+(e.g. PyMuPDF page access) on one thread.
+
+Usage:
+    pipeline = StagePipeline(produce, [Stage("convert", to_rows), Stage("validate", check, workers=4)])
+    outputs = pipeline.run()
+    pipeline.metrics()   # {"source": {...}, "convert": {...}, "validate": {...}}
+"""
+
+import contextvars
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+# How often blocked puts/gets re-check whether the pipeline was aborted
+_POLL_SECONDS = 0.1
+
+
+class PipelineAborted(Exception):
+    """Raised inside a stage when another stage failed."""
+
+
+@dataclass
+class Stage:
+    """
+    One step of the pipeline: func(item) returns the items to pass on (or None).
+
+    on_finished, if set, is called once (from the stage's last worker) after the
+    stage has processed its final item.
+    """
+    name: str
+    func: Callable[[Any], Optional[Iterable[Any]]]
+    workers: int = 1
+    queue_size: int = 64
+    on_finished: Optional[Callable[[], None]] = None
+
+
+class StageMetrics:
+    """Counters for one stage, updated from its worker threads."""
+
+    def __init__(self, name: str, workers: int, started: float):
+        self.name = name
+        self.workers = workers
+        self._started = started
+        self._lock = threading.Lock()
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+        self.starved_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_queue_depth = 0
+        self.first_output = None
+        self.finished = None
+
+    def add(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def saw_queue_depth(self, depth: int):
+        if depth > self.max_queue_depth:
+            with self._lock:
+                self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def output(self, count: int = 1):
+        with self._lock:
+            self.items_out += count
+            if self.first_output is None:
+                self.first_output = time.perf_counter() - self._started
+
+    def as_dict(self) -> dict:
+        return {
+            "workers": self.workers,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "starved_seconds": round(self.starved_seconds, 3),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "max_queue_depth": self.max_queue_depth,
+            "first_output_seconds": None if self.first_output is None else round(self.first_output, 3),
+            "finished_seconds": None if self.finished is None else round(self.finished, 3),
+        }
+
+
+class StagePipeline:
+    """Runs `source(emit)` on the calling thread and the stages on worker threads."""
+
+    def __init__(self, source: Callable[[Callable[[Any], None]], None], stages: List[Stage], name: str = "pipeline"):
+        if not stages:
+            raise ValueError("StagePipeline needs at least one stage")
+        self.source = source
+        self.stages = stages
+        self.name = name
+        self.outputs = []
+        self._outputs_lock = threading.Lock()
+        self._queues = [queue.Queue(maxsize=max(1, stage.queue_size)) for stage in stages]
+        self._finished_workers = [0] * len(stages)
+        self._finished_lock = threading.Lock()
+        self._abort = threading.Event()
+        self._errors = []
+        self._started = None
+        self._metrics = {}
+
+    # --- queue helpers ---
+
+    def _put(self, index: int, item, metrics: StageMetrics):
+        q = self._queues[index]
+        waited = 0.0
+        while True:
+            if self._abort.is_set():
+                raise PipelineAborted()
+            started = time.perf_counter()
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                waited += time.perf_counter() - started
+                break
+            except queue.Full:
+                waited += time.perf_counter() - started
+        metrics.add(blocked_seconds=waited)
+        self._metrics[self.stages[index].name].saw_queue_depth(q.qsize())
+
+    def _get(self, index: int, metrics: StageMetrics):
+        q = self._queues[index]
+        waited = 0.0
+        try:
+            while True:
+                if self._abort.is_set():
+                    raise PipelineAborted()
+                started = time.perf_counter()
+                try:
+                    return q.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    pass
+                finally:
+                    waited += time.perf_counter() - started
+        finally:
+            metrics.add(starved_seconds=waited)
+
+    def _finish(self, index: int):
+        """Called once per worker of stage `index`; the last one closes the next stage."""
+        with self._finished_lock:
+            self._finished_workers[index] += 1
+            last = self._finished_workers[index] == self.stages[index].workers
+        if not last:
+            return
+        stage_metrics = self._metrics[self.stages[index].name]
+        stage_metrics.finished = time.perf_counter() - self._started
+        if self.stages[index].on_finished is not None:
+            self.stages[index].on_finished()
+        if index + 1 < len(self.stages):
+            for _ in range(self.stages[index + 1].workers):
+                self._put(index + 1, _END, stage_metrics)
+
+    def _fail(self, where: str, error: BaseException):
+        if not isinstance(error, PipelineAborted):
+            logger.error(f"[PIPELINE] {self.name}: {where} failed: {error}", exc_info=error)
+            self._errors.append(error)
+        self._abort.set()
+
+    # --- workers ---
+
+    def _worker(self, index: int):
+        stage = self.stages[index]
+        metrics = self._metrics[stage.name]
+        try:
+            while True:
+                item = self._get(index, metrics)
+                if item is _END:
+                    break
+                metrics.add(items_in=1)
+                started = time.perf_counter()
+                produced = stage.func(item)
+                metrics.add(busy_seconds=time.perf_counter() - started)
+                for out in produced or ():
+                    metrics.output()
+                    if index + 1 < len(self.stages):
+                        self._put(index + 1, out, metrics)
+                    else:
+                        with self._outputs_lock:
+                            self.outputs.append(out)
+            self._finish(index)
+        except BaseException as e:
+            self._fail(f"stage '{stage.name}'", e)
+
+    def run(self) -> list:
+        """Run to completion and return the last stage's outputs; re-raises the first failure."""
+        self._started = time.perf_counter()
+        source_metrics = StageMetrics("source", 1, self._started)
+        self._metrics = {"source": source_metrics}
+        for stage in self.stages:
+            self._metrics[stage.name] = StageMetrics(stage.name, stage.workers, self._started)
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for number in range(stage.workers):
+                # Workers run in a copy of the caller's context (e.g. the job tag on log records)
+                thread = threading.Thread(target=contextvars.copy_context().run, args=(self._worker, index),
+                                          name=f"{self.name}-{stage.name}-{number}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        def emit(item):
+            source_metrics.output()
+            self._put(0, item, source_metrics)
+
+        try:
+            started = time.perf_counter()
+            self.source(emit)
+            source_metrics.add(busy_seconds=time.perf_counter() - started - source_metrics.blocked_seconds)
+            source_metrics.finished = time.perf_counter() - self._started
+            for _ in range(self.stages[0].workers):
+                self._put(0, _END, source_metrics)
+        except BaseException as e:
+            self._fail("source", e)
+            if isinstance(e, PipelineAborted):
+                pass
+            elif not isinstance(e, Exception):
+                raise
+
+        for thread in threads:
+            thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return self.outputs
+
+    def metrics(self) -> dict:
+        return {name: m.as_dict() for name, m in self._metrics.items()}
@@ -0,0 +1,384 @@
+"""
+Streaming validation pipeline: claims are validated while the brochure is
+still being extracted.
+
+Stages (see stage_pipeline.py), connected by bounded queues:
+
+    extract   (calling thread)  pages -> citations / table rows, as each page finishes
+    convert   (1 worker)        items -> validation rows; groups rows by statement and
+                                emits one unit per (statement, reference PDF) not seen yet
+    upload    (PIPELINE_UPLOAD_WORKERS, default 2)
+                                uploads each reference PDF to Gemini once
+    validate  (PIPELINE_VALIDATION_WORKERS, default 4)
+                                validates a statement against one PDF
+
+When extraction ends, per-PDF results are aggregated per statement and mapped
+back onto the rows exactly as StatementValidator.validate_dataframe does, so
+the output is the same as the sequential pipeline's. Each unit is validated
+with the statement's combined reference numbers as known when it is queued;
+a statement whose later rows add references is completed at the end, and any
+of its results asked with the shorter list are validated again.
+An optional on_results callback receives (position, result) pairs as soon as
+a statement's verdict is final (every row converted, every per-PDF result
+back), so callers can store the report while validation is still running.
+Queue sizes are PIPELINE_QUEUE_SIZE (default 32); per-stage metrics are
+returned in stats["pipeline"]. An optional on_progress callback receives the
+running counters (pages with extracted claims, statements, validations) as
+the stages advance.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from conversion import build_citation_rows, build_validation_rows_special_case
+from Gemini_version import StatementValidator, ValidationResult, load_pdf_content
+from stage_pipeline import Stage, StagePipeline
+from Superscript import extract_drug_superscript_table_data, extract_footnotes
+
+logger = logging.getLogger(__name__)
+
+
+def _combined_reference_no(group_data: Dict) -> str:
+    """The reference_no validate_dataframe passes for a statement group."""
+    return ",".join(sorted(str(r) for r in group_data["reference_nos"]))
+
+
+def _page_key(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 1 << 30
+
+
+class _StreamState:
+    """Rows and statement groups built by the convert stage (single worker, no lock needed)."""
+
+    def __init__(self):
+        self.references: Dict[str, str] = {}
+        self.rows = []
+        self.groups = {}
+        self.requested = set()
+
+
+class _Progress:
+    """Counters shared by the stages, reported through on_progress(stage, **counters)."""
+
+    def __init__(self, callback: Optional[Callable], pages_total: int):
+        self._callback = callback
+        self._lock = threading.Lock()
+        self.pages_total = pages_total
+        self.pages = set()
+        self.extracting = True
+        self.statements = 0
+        self.pending: Dict[str, int] = {}
+        self.validations_total = 0
+        self.validations_done = 0
+
+    def _report(self):
+        if self._callback is None:
+            return
+        with self._lock:
+            counters = {
+                "pages_done": self.pages_total if not self.extracting else min(len(self.pages), self.pages_total),
+                "pages_total": self.pages_total,
+                "statements_total": self.statements,
+                "statements_done": self.statements - sum(1 for n in self.pending.values() if n),
+                "validations_done": self.validations_done,
+                "validations_total": self.validations_total,
+            }
+        self._callback("extracting" if self.extracting else "validating", **counters)
+
+    def items_extracted(self, items):
+        with self._lock:
+            for item in items:
+                page = item.get("page_number") if isinstance(item, dict) else getattr(item, "page_number", None)
+                if page is not None:
+                    self.pages.add(str(page))
+        self._report()
+
+    def units_queued(self, statements: int, units: List[Dict]):
+        with self._lock:
+            self.statements = statements
+            for unit in units:
+                self.pending[unit["statement"]] = self.pending.get(unit["statement"], 0) + 1
+            self.validations_total += len(units)
+        if units:
+            self._report()
+
+    def unit_validated(self, statement: str):
+        with self._lock:
+            self.pending[statement] -= 1
+            self.validations_done += 1
+        self._report()
+
+    def extraction_finished(self):
+        with self._lock:
+            self.extracting = False
+        self._report()
+
+
+class _Verdicts:
+    """
+    Aggregates each statement as soon as its verdict is final and hands its rows to on_results.
+
+    Positions are known once the convert stage has finished (rows are reported in
+    page order), and a statement is final when every PDF resolve_group_pdfs picks
+    for it has been validated. Each statement and its rows map to exactly one
+    result (aggregate_results returns one), so a row's position is its place in
+    the report. Anything not final when the pipeline ends is finished in run().
+    """
+
+    def __init__(self, callback: Optional[Callable], validator: StatementValidator,
+                 pdf_files_dict: Dict[str, Dict], state: _StreamState):
+        self._callback = callback
+        self._validator = validator
+        self._pdf_files_dict = pdf_files_dict
+        self._state = state
+        self._lock = threading.Lock()
+        self.per_pdf = {}
+        self.asked: Dict[Tuple[str, str], str] = {}
+        self.statement_cache: Dict[str, List[ValidationResult]] = {}
+        self.needed: Dict[str, Dict] = {}
+        self.positions: Optional[Dict[str, List[int]]] = None
+        self.rows: List[Dict] = []
+        self.sent = 0
+
+    def _finalise(self, statement: str) -> List[Tuple[int, ValidationResult]]:
+        """Aggregate `statement` if all its PDFs are back; caller holds the lock."""
+        if statement in self.statement_cache:
+            return []
+        needed = self.needed[statement]
+        group_data = self._state.groups[statement]
+        reference_no = _combined_reference_no(group_data)
+        if any(not self._current(statement, pdf_name, reference_no) for pdf_name in needed):
+            return []
+        reference = group_data["sample_row"].get("reference", "")
+        individual_results = [self.per_pdf[(statement, pdf_name)] for pdf_name in needed]
+        self.statement_cache[statement] = self._validator.aggregate_results(
+            statement, reference_no, reference, individual_results)
+        return self._entries(statement)
+
+    def _current(self, statement: str, pdf_name: str, reference_no: str) -> bool:
+        """True once the PDF's result is back and was asked with the statement's final reference_no."""
+        key = (statement, pdf_name)
+        return key in self.per_pdf and self.asked.get(key) == reference_no
+
+    def _entries(self, statement: str) -> List[Tuple[int, ValidationResult]]:
+        result = self.statement_cache[statement][0]
+        return [(position, result) for position in self.positions.get(statement, ())]
+
+    def _send(self, entries: List[Tuple[int, ValidationResult]]):
+        if entries and self._callback is not None:
+            with self._lock:
+                self.sent += len(entries)
+            self._callback(entries)
+
+    def rows_converted(self):
+        """Convert stage finished: fix row positions and resolve each statement's PDFs."""
+        entries = []
+        with self._lock:
+            self.rows = [row for _, _, row in sorted(self._state.rows, key=lambda entry: entry[:2])]
+            self.positions = {}
+            for position, row in enumerate(self.rows):
+                statement = row.get("statement", "").strip() if isinstance(row.get("statement", ""), str) else ""
+                if statement:
+                    self.positions.setdefault(statement, []).append(position)
+                else:
+                    entries.extend((position, result) for result in self._validator.expand_results([row], {}))
+
+            for statement, group_data in self._state.groups.items():
+                if not group_data["references"]:
+                    self.statement_cache[statement] = [self._validator.no_reference_result(statement)]
+                    entries.extend(self._entries(statement))
+                    continue
+                filtered_pdf_dict, skipped = self._validator.resolve_group_pdfs(
+                    statement, group_data, self._pdf_files_dict, tag="STREAM")
+                if skipped is not None:
+                    self.statement_cache[statement] = skipped
+                    entries.extend(self._entries(statement))
+                    continue
+                self.needed[statement] = filtered_pdf_dict
+                entries.extend(self._finalise(statement))
+        self._send(entries)
+
+    def validated(self, key: Tuple[str, str], reference_no: str, result: ValidationResult):
+        """One per-PDF result, asked with `reference_no`, is back (validate stage)."""
+        with self._lock:
+            self.per_pdf[key] = result
+            self.asked[key] = reference_no
+            entries = self._finalise(key[0]) if self.positions is not None and key[0] in self.needed else []
+        self._send(entries)
+
+    def complete_late(self) -> int:
+        """Validate what the stream never requested or asked with too few references; returns validations run."""
+        completed_late = 0
+        for statement, needed in self.needed.items():
+            if statement in self.statement_cache:
+                continue
+            group_data = self._state.groups[statement]
+            reference_no = _combined_reference_no(group_data)
+            reference = group_data["sample_row"].get("reference", "")
+            for pdf_name, pdf_info in needed.items():
+                if not self._current(statement, pdf_name, reference_no):
+                    completed_late += 1
+                    self.per_pdf[(statement, pdf_name)] = self._validator.validate_against_pdf(
+                        statement, reference_no, reference, pdf_name, pdf_info,
+                        page_no=group_data["sample_row"].get("page_no"), tag=pdf_name,
+                    )
+                    self.asked[(statement, pdf_name)] = reference_no
+            with self._lock:
+                entries = self._finalise(statement)
+            self._send(entries)
+        return completed_late
+
+
+def run_streaming_validation(
+    brochure_path: str,
+    pdf_files_dict: Dict[str, Dict],
+    validation_type: str = "research",
+    stats: Optional[Dict] = None,
+    validator: Optional[StatementValidator] = None,
+    on_progress: Optional[Callable[..., None]] = None,
+    on_results: Optional[Callable[[List[Tuple[int, ValidationResult]]], None]] = None,
+) -> List[ValidationResult]:
+    """
+    Extract, convert and validate a brochure with overlapping stages.
+
+    Args:
+        brochure_path: Local path of the brochure PDF
+        pdf_files_dict: {reference filename: {"content": bytes, ...}}
+        validation_type: "drug" (table extraction) or "research" (footnotes)
+        stats: Optional dict receiving the extraction report and stats["pipeline"]
+        validator: StatementValidator to use (a new one by default)
+        on_progress: Optional callback(stage, **counters), called from the stage
+            threads; stage is "extracting" or "validating"
+        on_results: Optional callback([(position, result), ...]) receiving every
+            row of the returned list exactly once, as soon as its verdict is
+            final; called from the stage threads
+
+    Returns:
+        One ValidationResult per validation row, in page order; empty when no
+        claims were extracted
+    """
+    started = time.perf_counter()
+    validator = validator or StatementValidator()
+    stats = stats if stats is not None else {}
+    state = _StreamState()
+    upload_locks = {name: threading.Lock() for name in pdf_files_dict}
+    pages_total = 0
+    if on_progress is not None:
+        with fitz.open(brochure_path) as doc:
+            pages_total = len(doc)
+    progress = _Progress(on_progress, pages_total)
+    verdicts = _Verdicts(on_results, validator, pdf_files_dict, state)
+
+    def extract(emit):
+        def _emit(items):
+            progress.items_extracted(items)
+            emit(items)
+
+        if validation_type == "drug":
+            extract_drug_superscript_table_data(brochure_path, stats=stats, on_items=_emit)
+        else:
+            def _references(references):
+                state.references = references
+            extract_footnotes(brochure_path, stats=stats, on_items=_emit, on_references=_references)
+        progress.extraction_finished()
+
+    def convert(items):
+        if validation_type == "drug":
+            rows = build_validation_rows_special_case(items, {})
+        else:
+            rows = build_citation_rows(items, state.references)
+
+        # Group the whole batch first so its units carry every reference it adds
+        cited = []
+        for row in rows:
+            state.rows.append((_page_key(row.get("page_no")), len(state.rows), row))
+            statement = validator.add_to_statement_groups(state.groups, row)
+            reference_no = str(row.get("reference_no") or "")
+            if statement is not None and reference_no:
+                cited.append((statement, reference_no))
+
+        units = []
+        for statement, reference_no in cited:
+            if reference_no.lower() == "table":
+                pdf_names = list(pdf_files_dict)
+            else:
+                pdf_names = list(validator.filter_pdfs_by_references(pdf_files_dict, reference_no))
+
+            group_data = state.groups[statement]
+            sample_row = group_data["sample_row"]
+            for pdf_name in pdf_names:
+                if (statement, pdf_name) in state.requested:
+                    continue
+                state.requested.add((statement, pdf_name))
+                units.append({
+                    "statement": statement,
+                    "reference_no": _combined_reference_no(group_data),
+                    "reference": sample_row.get("reference", ""),
+                    "page_no": sample_row.get("page_no"),
+                    "pdf_name": pdf_name,
+                })
+        progress.units_queued(len(state.groups), units)
+        return units
+
+    def upload(unit):
+        pdf_name = unit["pdf_name"]
+        with upload_locks[pdf_name]:
+            if pdf_name not in validator.pdf_gemini_cache:
+                content = load_pdf_content(pdf_files_dict[pdf_name])
+                try:
+                    validator.pdf_gemini_cache[pdf_name] = validator.llm.upload_pdf_to_gemini(content, pdf_name)
+                    validator.pdf_content_cache[pdf_name] = content
+                except Exception as e:
+                    # validate_statement retries the upload and reports the failure per statement
+                    logger.warning(f"[STREAM] Upload of {pdf_name} failed: {e}")
+        return [unit]
+
+    def validate(unit):
+        result = validator.validate_against_pdf(
+            unit["statement"], unit["reference_no"], unit["reference"], unit["pdf_name"],
+            pdf_files_dict[unit["pdf_name"]], page_no=unit["page_no"], tag=unit["pdf_name"],
+        )
+        progress.unit_validated(unit["statement"])
+        verdicts.validated((unit["statement"], unit["pdf_name"]), unit["reference_no"], result)
+        return [((unit["statement"], unit["pdf_name"]), result)]
+
+    queue_size = int(os.getenv("PIPELINE_QUEUE_SIZE", "32"))
+    pipeline = StagePipeline(extract, [
+        Stage("convert", convert, workers=1, queue_size=queue_size, on_finished=verdicts.rows_converted),
+        Stage("upload", upload, workers=int(os.getenv("PIPELINE_UPLOAD_WORKERS", "2")), queue_size=queue_size),
+        Stage("validate", validate, workers=int(os.getenv("PIPELINE_VALIDATION_WORKERS", "4")), queue_size=queue_size),
+    ], name="validation")
+    per_pdf = dict(pipeline.run())
+    streamed_seconds = time.perf_counter() - started
+
+    # Statements whose later rows added references after their units were queued
+    completed_late = verdicts.complete_late()
+    rows = verdicts.rows
+    results = validator.expand_results(rows, verdicts.statement_cache) if rows else []
+
+    metrics = pipeline.metrics()
+    stats["pipeline"] = {
+        "stages": metrics,
+        "rows": len(rows),
+        "statements": len(state.groups),
+        "validation_units": len(per_pdf),
+        "completed_after_extraction": completed_late,
+        "rows_streamed": verdicts.sent,
+        "streamed_seconds": round(streamed_seconds, 3),
+        "wall_seconds": round(time.perf_counter() - started, 3),
+    }
+    first_result = metrics["validate"]["first_output_seconds"]
+    logger.info(
+        f"[STREAM] {len(rows)} rows, {len(state.groups)} statements, {len(per_pdf)} validations in "
+        f"{stats['pipeline']['wall_seconds']:.1f}s; extraction finished at {metrics['source']['finished_seconds']}s, "
+        f"first validation at {first_result}s"
+    )
+    return results
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The core modules import each other by bare name (see validation_api.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import time
+
+from batch_validation import ReferenceStore, build_reference_set
+
+
+class _Document:
+    """Disk-backed upload, as UploadedDocument after receive()."""
+
+    def __init__(self, directory, name, data):
+        self.filename = name
+        self.path = os.path.join(directory, name)
+        with open(self.path, "wb") as f:
+            f.write(data)
+        self.size = len(data)
+        self.page_count = 1
+        self.sha256 = hashlib.sha256(data).hexdigest()
+
+    def delete(self):
+        os.remove(self.path)
+
+
+def _age(store, reference_id, seconds):
+    past = time.time() - seconds
+    for suffix in (".pdf", ".json"):
+        os.utime(store._path(reference_id, suffix), (past, past))
+
+
+def test_eviction_removes_pdf_and_metadata_together(tmp_path):
+    store = ReferenceStore(str(tmp_path / "store"), max_bytes=10_000_000)
+    old = store.add(_Document(tmp_path, "old.pdf", b"%PDF old" * 1000))
+    new = store.add(_Document(tmp_path, "new.pdf", b"%PDF new" * 1000))
+    _age(store, old, 3600)
+    _age(store, new, 60)
+    # Only the PDF of the new entry is older than the old entry's metadata
+    past = time.time() - 7200
+    os.utime(store._path(new, ".pdf"), (past, past))
+
+    store.max_bytes = 9000
+    store.evict()
+
+    assert store.resolve(new) is not None
+    assert store.resolve(old) is None
+    assert not os.path.exists(store._path(old, ".pdf"))
+    assert not os.path.exists(store._path(old, ".json"))
+
+
+def test_eviction_skips_pinned_references_and_temp_files(tmp_path):
+    store = ReferenceStore(str(tmp_path / "store"), max_bytes=10_000_000)
+    pinned = store.add(_Document(tmp_path, "pinned.pdf", b"%PDF a" * 2000))
+    other = store.add(_Document(tmp_path, "other.pdf", b"%PDF b" * 2000))
+    tmp_file = os.path.join(os.path.dirname(store._path(other, ".pdf")), "abc.tmp")
+    with open(tmp_file, "wb") as f:
+        f.write(b"in flight")
+
+    store.max_bytes = 1
+    with store.pinned([pinned]):
+        _age(store, pinned, 3600)
+        store.evict()
+        assert store.resolve(pinned) is not None
+    assert store.resolve(other) is None
+    assert os.path.exists(tmp_file)
+
+
+def test_build_reference_set_names_duplicate_filenames_apart(tmp_path):
+    store = ReferenceStore(str(tmp_path / "store"), max_bytes=10_000_000)
+    first = _Document(tmp_path, "ref.pdf", b"%PDF one")
+    stored = store.add(first)
+    (tmp_path / "again").mkdir()
+    second = _Document(tmp_path / "again", "ref.pdf", b"%PDF two")
+
+    pdf_files_dict, references = build_reference_set([second], [stored], store)
+
+    assert len(pdf_files_dict) == 2
+    assert {ref["reference_id"] for ref in references} == {stored, second.sha256}
@@ -0,0 +1,74 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+
+import Superscript
+from json_salvage import salvage_json, validate_items
+
+
+def test_complete_document_is_returned_as_is():
+    result = salvage_json('```json\n[{"a": 1}, {"a": 2},]\n```')
+    assert result.complete and result.ok
+    assert result.value == [{"a": 1}, {"a": 2}]
+
+
+def test_truncated_array_keeps_complete_elements():
+    result = salvage_json('[{"a": 1}, {"a": 2}, {"a": 3, "b": "cut')
+    assert result.truncated
+    assert result.value == [{"a": 1}, {"a": 2}]
+    assert [(lost["index"], lost["reason"]) for lost in result.lost] == [(2, "truncated")]
+
+
+def test_malformed_element_is_dropped_alone():
+    result = salvage_json('[{"a": 1}, {"a": oops}, {"a": 3}]')
+    assert result.value == [{"a": 1}, {"a": 3}]
+    assert result.lost[0]["index"] == 1
+    assert result.lost[0]["reason"].startswith("malformed")
+
+
+def test_truncated_wrapper_object_salvages_its_array():
+    result = salvage_json('{"statements": [ {"a": 1}, {"a": 2}, {"stat')
+    assert result.kind == "object" and result.truncated
+    assert result.value == {"statements": [{"a": 1}, {"a": 2}]}
+    assert result.lost == [{"index": 2, "reason": "truncated", "fragment": '{"stat', "member": "statements"}]
+
+
+def test_truncated_object_keeps_earlier_members():
+    result = salvage_json('{"count": 2, "statements": [{"a": 1}')
+    assert result.value == {"count": 2, "statements": []}
+    assert result.lost[0]["member"] == "statements"
+
+
+def test_no_json():
+    assert salvage_json("sorry, I cannot help").kind == "none"
+    assert salvage_json("").lost[0]["reason"] == "empty response"
+
+
+class _Row(BaseModel):
+    name: str
+
+
+def test_validate_items_rejects_rows_individually():
+    valid, rejected = validate_items([{"name": "x"}, {"nope": 1}], _Row)
+    assert [row.name for row in valid] == ["x"]
+    assert rejected[0]["index"] == 1
+
+
+def test_whole_document_partial_batch_keeps_string_page_numbers(monkeypatch):
+    items = [
+        {"page_number": "1", "superscript_number": "1", "statement": "first"},
+        {"page_number": "2", "superscript_number": "2", "statement": "second"},
+        {"page_number": "3", "superscript_number": "3", "statement": "third"},
+    ]
+    text = '{"statements": [' + ", ".join(json.dumps(item) for item in items) + ', {"page_n'
+    response = SimpleNamespace(text=text, candidates=[])
+    monkeypatch.setattr(Superscript, "_generate_json_response", lambda *args, **kwargs: response)
+
+    with pytest.raises(Superscript.PartialBatchError) as caught:
+        Superscript._extract_footnote_window([1, 2, 3, 4], b"%PDF", whole_document=True)
+
+    # Page 3 may have had more rows after the cut; pages 1-2 are complete
+    assert [item["statement"] for item in caught.value.partial] == ["first", "second"]
+    assert caught.value.missing == [3, 4]
@@ -0,0 +1,109 @@
+import fitz
+import pytest
+
+from native_citations import FLAG_SUPERSCRIPT, scan_document, scan_page
+
+BODY_SIZE = 11
+MARKER_SIZE = 7
+
+
+@pytest.fixture
+def doc():
+    document = fitz.open()
+    yield document
+    document.close()
+
+
+def _cited_line(page, y, sentence, marker, x=50):
+    """A body-text sentence followed by a smaller, raised citation marker."""
+    page.insert_text((x, y), sentence, fontsize=BODY_SIZE)
+    end = x + fitz.get_text_length(sentence, fontsize=BODY_SIZE)
+    page.insert_text((end + 0.5, y - 4), marker, fontsize=MARKER_SIZE)
+
+
+class _Unflagged:
+    """Page whose spans carry no superscript flag, as some PDF producers emit them."""
+
+    def __init__(self, page):
+        self._page = page
+
+    def __getattr__(self, name):
+        return getattr(self._page, name)
+
+    def get_text(self, option="text", **kwargs):
+        result = self._page.get_text(option, **kwargs)
+        if option == "dict":
+            for block in result["blocks"]:
+                for line in block.get("lines", []):
+                    for span in line["spans"]:
+                        span["flags"] &= ~FLAG_SUPERSCRIPT
+        return result
+
+
+def test_markers_are_paired_with_their_sentences(doc):
+    page = doc.new_page()
+    page.insert_text((50, 70), "Efficacy", fontsize=16)
+    _cited_line(page, 100, "Drug A lowers blood pressure in adults.", "1,2")
+    _cited_line(page, 116, "It is well tolerated in the elderly.", "3")
+
+    scan, heading = scan_page(page, None)
+
+    assert not scan.needs_llm
+    assert scan.confidence == 1.0
+    assert [(c["superscript_number"], c["statement"]) for c in scan.citations] == [
+        ("1,2", "Drug A lowers blood pressure in adults."),
+        ("3", "It is well tolerated in the elderly."),
+    ]
+    assert {c["heading"] for c in scan.citations} == {"Efficacy"}
+    assert heading == "Efficacy"
+
+
+def test_heading_carries_over_to_the_next_page(doc):
+    first_page = doc.new_page()
+    first_page.insert_text((50, 70), "Safety", fontsize=16)
+    first_page.insert_text((50, 100), "Adverse events were collected for every patient.", fontsize=BODY_SIZE)
+    _cited_line(doc.new_page(), 100, "Nausea was the most common adverse event.", "4")
+
+    first, second = scan_document(doc)
+
+    assert first.reason == "no markers"
+    assert second.citations[0]["heading"] == "Safety"
+
+
+def test_blank_page_needs_no_llm(doc):
+    scan, _ = scan_page(doc.new_page(), None)
+    assert (scan.needs_llm, scan.reason, scan.citations) == (False, "no text", [])
+
+
+def test_image_only_page_goes_to_the_llm(doc):
+    page = doc.new_page()
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 20, 20), False)
+    pixmap.clear_with(200)
+    page.insert_image(page.rect, pixmap=pixmap)
+
+    scan, _ = scan_page(page, None)
+
+    assert scan.needs_llm
+    assert scan.confidence == 0.0
+    assert scan.reason.startswith("scanned")
+
+
+def test_unflagged_superscripts_are_found_but_sent_to_the_llm(doc):
+    page = doc.new_page()
+    _cited_line(page, 100, "Drug A lowers blood pressure in adults.", "1,2")
+    _cited_line(page, 116, "It is well tolerated in the elderly.", "3")
+
+    scan, _ = scan_page(_Unflagged(page), None)
+
+    # Size and rise still identify the markers, but only with heuristic weight
+    assert [c["superscript_number"] for c in scan.citations] == ["1,2", "3"]
+    assert scan.confidence == 0.5
+    assert scan.needs_llm
+
+
+def test_plain_trailing_numbers_are_not_markers(doc):
+    page = doc.new_page()
+    page.insert_text((50, 100), "Store below 25 degrees for up to 12 months after opening the vial 3", fontsize=BODY_SIZE)
+    scan, _ = scan_page(page, None)
+    assert scan.citations == []
+    assert scan.reason == "no markers"
@@ -0,0 +1,97 @@
+import fitz
+import pytest
+
+from native_tables import extract_grid_page
+
+LEFT, TOP, ROW_HEIGHT = 40, 60, 24
+COLUMN_WIDTHS = (140, 60, 70, 70, 70)
+
+
+@pytest.fixture
+def doc():
+    document = fitz.open()
+    yield document
+    document.close()
+
+
+def _ruled_grid(page, rows):
+    """Draw a fully ruled table; rows[0] is the header, cells are strings or callables(page, rect)."""
+    xs = [LEFT]
+    for width in COLUMN_WIDTHS[:len(rows[0])]:
+        xs.append(xs[-1] + width)
+    bottom = TOP + ROW_HEIGHT * len(rows)
+    for i in range(len(rows) + 1):
+        page.draw_line((xs[0], TOP + i * ROW_HEIGHT), (xs[-1], TOP + i * ROW_HEIGHT))
+    for x in xs:
+        page.draw_line((x, TOP), (x, bottom))
+    for r, cells in enumerate(rows):
+        for c, cell in enumerate(cells):
+            rect = fitz.Rect(xs[c], TOP + r * ROW_HEIGHT, xs[c + 1], TOP + (r + 1) * ROW_HEIGHT)
+            if callable(cell):
+                cell(page, rect)
+            elif cell:
+                page.insert_text((rect.x0 + 4, rect.y1 - 8), cell, fontsize=9)
+
+
+def _name(name, marker=""):
+    def draw(page, rect):
+        page.insert_text((rect.x0 + 4, rect.y1 - 8), name, fontsize=9)
+        if marker:
+            # Smaller and raised, like a typeset superscript
+            page.insert_text((rect.x0 + 4 + fitz.get_text_length(name, fontsize=9) + 1, rect.y1 - 12), marker, fontsize=5)
+    return draw
+
+
+def _circle(page, rect):
+    page.draw_circle(((rect.x0 + rect.x1) / 2, (rect.y0 + rect.y1) / 2), 3, fill=(0, 0, 0))
+
+
+def _diamond(page, rect):
+    x, y = (rect.x0 + rect.x1) / 2, (rect.y0 + rect.y1) / 2
+    page.draw_polyline([(x, y - 4), (x + 4, y), (x, y + 4), (x - 4, y), (x, y - 4)], fill=(0, 0, 0))
+
+
+HEADER = ("Drug", "pH", "Saline", "Dextrose", "Ringer")
+
+
+def test_grid_marks_and_superscripts_are_read(doc):
+    page = doc.new_page()
+    _ruled_grid(page, [
+        HEADER,
+        (_name("Amikacin", "12"), "3.5-5.5", _circle, "", _diamond),
+        (_name("Cefazolin"), "4.5", "", _circle, ""),
+    ])
+    scan = extract_grid_page(page)
+
+    assert not scan.needs_llm
+    assert scan.confidence == 1.0
+    first, second = scan.rows
+    assert (first["row_name"], first["superscript_number"], first["ph_value"]) == ("Amikacin", "12", "3.5-5.5")
+    assert (first["column_name"], first["mark_type"]) == ("Saline.Ringer", "Circle.Diamond")
+    assert (second["row_name"], second["superscript_number"]) == ("Cefazolin", None)
+    assert (second["column_name"], second["mark_type"]) == ("Dextrose", "Circle")
+
+
+def test_statement_table_goes_to_the_llm(doc):
+    page = doc.new_page()
+    _ruled_grid(page, [("Drug", "Statement"), ("Amikacin", "Stable for 24 hours"), ("Cefazolin", "Protect from light")])
+    scan = extract_grid_page(page)
+    assert scan.needs_llm
+    assert scan.reason.startswith("not a grid table")
+
+
+def test_grid_without_readable_marks_goes_to_the_llm(doc):
+    # e.g. the symbols are part of an embedded image
+    page = doc.new_page()
+    _ruled_grid(page, [HEADER, ("Amikacin", "5", "", "", ""), ("Cefazolin", "4.5", "", "", "")])
+    scan = extract_grid_page(page)
+    assert scan.needs_llm
+    assert scan.reason == "no readable marks"
+
+
+def test_page_without_table(doc):
+    page = doc.new_page()
+    page.insert_text((50, 80), "Compatibility information continues on the next page.")
+    scan = extract_grid_page(page)
+    assert scan.needs_llm
+    assert scan.reason == "no table detected"
@@ -0,0 +1,80 @@
+import textwrap
+
+import fitz
+import pytest
+
+from page_triage import (
+    CATEGORY_IRRELEVANT, CATEGORY_PROSE, CATEGORY_REFERENCES, CATEGORY_TABLE, CATEGORY_UNCERTAIN, classify_page,
+)
+
+
+@pytest.fixture
+def doc():
+    document = fitz.open()
+    yield document
+    document.close()
+
+
+def _unruled_table(page, header=("Drug", "Trade", "Notes"), rows=8):
+    for i, cells in enumerate([header] + [(f"drug{n}", f"Brand{n}", f"Dilute in saline {n}") for n in range(rows)]):
+        for x, cell in zip((50, 200, 350), cells):
+            page.insert_text((x, 80 + i * 20), cell)
+
+
+def _prose(page, sentence, repeat=20):
+    for i, line in enumerate(textwrap.wrap(" ".join([sentence] * repeat), 90)):
+        page.insert_text((50, 60 + i * 14), line)
+
+
+def test_unruled_statement_table_is_kept(doc):
+    page = doc.new_page()
+    _unruled_table(page)
+    decision = classify_page(page)
+    assert decision.send_to_llm
+    assert decision.category == CATEGORY_UNCERTAIN
+
+
+def test_drug_table_header_is_kept(doc):
+    page = doc.new_page()
+    _unruled_table(page, header=("Generic Drug name", "Brand Name", "Additional Consideration"), rows=1)
+    decision = classify_page(page)
+    assert decision.send_to_llm
+    assert decision.category == CATEGORY_TABLE
+
+
+def test_ruled_table_is_kept(doc):
+    page = doc.new_page()
+    for i in range(5):
+        page.draw_line((40, 65 + i * 20), (500, 65 + i * 20))
+    for x in (40, 190, 340, 500):
+        page.draw_line((x, 65), (x, 145))
+    for i in range(4):
+        for x, cell in zip((50, 200, 350), (f"drug{i}", f"Brand{i}", "Dilute")):
+            page.insert_text((x, 80 + i * 20), cell)
+    decision = classify_page(page)
+    assert decision.send_to_llm
+    assert decision.category == CATEGORY_TABLE
+
+
+def test_running_text_is_dropped(doc):
+    page = doc.new_page()
+    _prose(page, "The catheter should be flushed regularly according to institutional protocol.")
+    decision = classify_page(page)
+    assert not decision.send_to_llm
+    assert decision.category == CATEGORY_PROSE
+
+
+def test_reference_list_is_dropped(doc):
+    page = doc.new_page()
+    page.insert_text((50, 50), "References")
+    for i in range(1, 8):
+        page.insert_text((50, 60 + i * 14), f"{i}. Smith J, Doe B. A study of flushing. J Infus Nurs. 2019;12:34.")
+    decision = classify_page(page)
+    assert not decision.send_to_llm
+    assert decision.category == CATEGORY_REFERENCES
+
+
+def test_blank_page_is_dropped(doc):
+    decision = classify_page(doc.new_page())
+    assert not decision.send_to_llm
+    assert decision.category == CATEGORY_IRRELEVANT
@@ -0,0 +1,44 @@
+from references_parser import find_references_section, parse_references
+
+
+def test_heading_alone_on_its_line():
+    text = "Body text.\nReferences\n1. Smith J. A study. 2019.\n2. Doe B. Another. 2020.\n"
+    assert parse_references(text) == {"1": "Smith J. A study. 2019.", "2": "Doe B. Another. 2020."}
+
+
+def test_heading_followed_by_colon_and_inline_entries():
+    text = "Body text.\nReferences: 1. Smith J. A study. 2019. 2. Doe B. Another. 2020.\n"
+    assert parse_references(text) == {"1": "Smith J. A study. 2019.", "2": "Doe B. Another. 2020."}
+
+
+def test_heading_sharing_line_with_first_entry():
+    text = "Body text.\nReferences 1. Smith J. A study.\n2. Doe B. Another.\n"
+    assert find_references_section(text) == ["1. Smith J. A study.", "2. Doe B. Another."]
+    assert parse_references(text) == {"1": "Smith J. A study.", "2": "Doe B. Another."}
+
+
+def test_prose_starting_with_references_is_not_a_heading():
+    text = "References to earlier work follow.\nReferences\n1. A x.\n2. B y.\n"
+    assert parse_references(text) == {"1": "A x.", "2": "B y."}
+
+
+def test_inline_entries_starting_lowercase_are_split():
+    text = "References\n1. Smith J. Title. 2019. 2. van der Berg A. Other. 2020. 3. de Souza P. Third. 2021.\n"
+    assert parse_references(text) == {
+        "1": "Smith J. Title. 2019.",
+        "2": "van der Berg A. Other. 2020.",
+        "3": "de Souza P. Third. 2021.",
+    }
+
+
+def test_wrapped_volume_numbers_stay_in_entry():
+    text = "References\n1. Smith J. J Med. Vol. 2. 2019;12. 345-350.\n2. Doe B. Another.\n"
+    assert parse_references(text) == {"1": "Smith J. J Med. Vol. 2. 2019;12. 345-350.", "2": "Doe B. Another."}
+
+
+def test_continued_heading_and_footer():
+    text = (
+        "References\n1. A one.\n2. B two.\n© Becton, Dickinson\n"
+        "References (cont'd)\n3. C three.\n"
+    )
+    assert parse_references(text) == {"1": "A one.", "2": "B two.", "3": "C three."}
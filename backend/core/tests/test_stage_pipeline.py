@@ -0,0 +1,82 @@
+import contextvars
+import threading
+import time
+
+import pytest
+
+from stage_pipeline import Stage, StagePipeline
+
+
+def _source(items):
+    def produce(emit):
+        for item in items:
+            emit(item)
+    return produce
+
+
+def test_items_flow_through_every_stage():
+    pipeline = StagePipeline(_source(range(20)), [
+        Stage("double", lambda n: [n * 2], workers=2, queue_size=2),
+        Stage("split", lambda n: [n, n + 1] if n % 4 == 0 else None, workers=3, queue_size=2),
+    ])
+    outputs = pipeline.run()
+
+    assert sorted(outputs) == sorted(x for n in range(20) if (n * 2) % 4 == 0 for x in (n * 2, n * 2 + 1))
+    metrics = pipeline.metrics()
+    assert metrics["source"]["items_out"] == 20
+    assert (metrics["double"]["items_in"], metrics["double"]["items_out"]) == (20, 20)
+    assert (metrics["split"]["items_in"], metrics["split"]["items_out"]) == (20, 20)
+    assert metrics["double"]["max_queue_depth"] <= 2
+
+
+def test_on_finished_runs_once_after_the_last_item():
+    seen = []
+    finished = []
+    stage = Stage("collect", seen.append, workers=3, on_finished=lambda: finished.append(len(seen)))
+    StagePipeline(_source(range(10)), [stage, Stage("sink", lambda item: [item])]).run()
+    assert finished == [10]
+
+
+def test_stage_failure_is_raised_and_stops_the_source():
+    emitted = []
+
+    def produce(emit):
+        for n in range(1000):
+            emitted.append(n)
+            emit(n)
+
+    def check(n):
+        if n == 3:
+            raise ValueError("bad item")
+        time.sleep(0.001)
+        return [n]
+
+    pipeline = StagePipeline(produce, [Stage("check", check, workers=1, queue_size=1)])
+    with pytest.raises(ValueError, match="bad item"):
+        pipeline.run()
+    # Backpressure plus the abort keep the producer from running to the end
+    assert len(emitted) < 1000
+
+
+def test_source_failure_is_raised():
+    def produce(emit):
+        emit(1)
+        raise RuntimeError("extraction failed")
+
+    with pytest.raises(RuntimeError, match="extraction failed"):
+        StagePipeline(produce, [Stage("noop", lambda item: [item])]).run()
+
+
+def test_workers_inherit_the_callers_context():
+    tag = contextvars.ContextVar("tag", default=None)
+    tag.set("job-1")
+    seen = set()
+    lock = threading.Lock()
+
+    def record(item):
+        with lock:
+            seen.add(tag.get())
+        return [item]
+
+    StagePipeline(_source(range(5)), [Stage("record", record, workers=2)]).run()
+    assert seen == {"job-1"}
@@ -0,0 +1,118 @@
+import threading
+from types import SimpleNamespace
+
+import streaming_validation
+from Gemini_version import StatementValidator, ValidationResult
+
+
+class _Validator:
+    """StatementValidator's grouping/aggregation with a scripted validate_against_pdf."""
+
+    add_to_statement_groups = staticmethod(StatementValidator.add_to_statement_groups)
+    expand_results = staticmethod(StatementValidator.expand_results)
+    no_reference_result = staticmethod(StatementValidator.no_reference_result)
+    filter_pdfs_by_references = StatementValidator.filter_pdfs_by_references
+    resolve_group_pdfs = StatementValidator.resolve_group_pdfs
+    aggregate_results = StatementValidator.aggregate_results
+
+    def __init__(self, on_validate):
+        self.on_validate = on_validate
+        self.asked = []
+        self.pdf_gemini_cache = {}
+        self.pdf_content_cache = {}
+        self.llm = SimpleNamespace(upload_pdf_to_gemini=lambda content, name: name)
+
+    def validate_against_pdf(self, statement, reference_no, reference, pdf_name, pdf_info, page_no=None, tag=""):
+        self.asked.append((pdf_name, reference_no))
+        self.on_validate(statement)
+        return ValidationResult(
+            statement=statement, reference_no=reference_no, reference=reference, matched_paper=pdf_name,
+            matched_evidence="quote", validation_result="Supported", page_location="p. 2",
+            confidence_score=0.9, analysis_summary="",
+        )
+
+
+def _run(monkeypatch, rows, on_validate, on_results, validator=None):
+    """Run the pipeline over `rows`, one extraction batch (or a list of batches)."""
+    batches = rows if rows and isinstance(rows[0], list) else [rows]
+
+    def extract_footnotes(path, stats=None, on_items=None, on_references=None):
+        on_references({})
+        for batch in batches:
+            on_items(batch)
+
+    monkeypatch.setattr(streaming_validation, "extract_footnotes", extract_footnotes)
+    monkeypatch.setattr(streaming_validation, "build_citation_rows", lambda items, references: list(items))
+    monkeypatch.setattr(streaming_validation, "load_pdf_content", lambda info: b"%PDF")
+    pdfs = {"1. Smith.pdf": {}, "2. Jones.pdf": {}}
+    stats = {}
+    results = streaming_validation.run_streaming_validation(
+        "brochure.pdf", pdfs, "research", stats=stats, validator=validator or _Validator(on_validate),
+        on_results=on_results,
+    )
+    return results, stats
+
+
+def _row(page, statement, reference_no):
+    return {"page_no": page, "statement": statement, "reference_no": reference_no, "reference": f"Ref {reference_no}"}
+
+
+def test_final_verdicts_are_handed_over_while_other_statements_validate(monkeypatch):
+    first_streamed = threading.Event()
+    waited = []
+    streamed = []
+
+    def on_validate(statement):
+        if statement == "Second claim":
+            # Only returns early if the first claim's row was handed over before this validation ends
+            waited.append(first_streamed.wait(5))
+
+    def on_results(entries):
+        streamed.extend(entries)
+        if any(result.statement == "First claim" for _, result in entries):
+            first_streamed.set()
+
+    rows = [_row(3, "Second claim", 2), _row(1, "First claim", 1), _row(2, "", "")]
+    results, stats = _run(monkeypatch, rows, on_validate, on_results)
+
+    assert waited == [True]
+    assert [r.statement for r in results] == ["First claim", "[Empty Statement]", "Second claim"]
+    # Every row exactly once, at its place in the returned report
+    assert sorted(position for position, _ in streamed) == [0, 1, 2]
+    for position, result in streamed:
+        assert result.statement == results[position].statement
+        assert result.validation_result == results[position].validation_result
+    assert stats["pipeline"]["rows_streamed"] == 3
+
+
+def test_statement_citing_two_references_waits_for_both(monkeypatch):
+    validated = []
+    seen_at_handover = []
+
+    def on_results(entries):
+        seen_at_handover.append((len(validated), len(entries)))
+
+    rows = [_row(1, "Claim", 1), _row(1, "Claim", 2)]
+    results, _ = _run(monkeypatch, rows, validated.append, on_results)
+
+    assert seen_at_handover == [(2, 2)]
+    assert [r.matched_paper for r in results] == ["Multiple PDFs (2/2 support)"] * 2
+
+
+def test_units_are_asked_with_the_statements_combined_references(monkeypatch):
+    validator = _Validator(lambda statement: None)
+    rows = [_row(1, "Claim", 1), _row(1, "Claim", 2)]
+    _run(monkeypatch, rows, None, None, validator=validator)
+
+    assert sorted(validator.asked) == [("1. Smith.pdf", "1,2"), ("2. Jones.pdf", "1,2")]
+
+
+def test_results_asked_before_a_later_reference_are_validated_again(monkeypatch):
+    validator = _Validator(lambda statement: None)
+    rows = [[_row(1, "Claim", 1)], [_row(4, "Claim", 2)]]
+    results, stats = _run(monkeypatch, rows, None, None, validator=validator)
+
+    # The first PDF was asked with "1" while page 4 was still being extracted
+    assert validator.asked[-1] == ("1. Smith.pdf", "1,2")
+    assert stats["pipeline"]["completed_after_extraction"] == 1
+    assert [r.reference_no for r in results] == ["1,2", "1,2"]
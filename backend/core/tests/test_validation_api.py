@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+import offload
+import validation_api
+
+
+def _start(monkeypatch, route):
+    release = threading.Event()
+
+    def run_batch(items, pdf_files_dict, validation_type, validator, on_result=None, reference_store=None):
+        release.wait(5)
+        return []
+
+    monkeypatch.setattr(validation_api, "run_batch", run_batch)
+    monkeypatch.setattr(validation_api, "get_reference_store", lambda: None)
+    return release
+
+
+async def _wait_for_release(route):
+    for _ in range(100):
+        if offload._in_flight[route] == 0:
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+def test_disconnected_stream_keeps_the_slot_until_the_batch_ends(monkeypatch):
+    route = "test_batch_disconnect"
+    release = _start(monkeypatch, route)
+
+    async def scenario():
+        await offload.acquire_slot(route)
+        events = validation_api._stream_batch(route, "TEST", [{"statement": "s"}], {}, [], "research", None)
+        await events.__anext__()
+        await events.aclose()  # client went away
+        await asyncio.sleep(0.05)
+        held = offload._in_flight[route]
+        release.set()
+        return held, await _wait_for_release(route)
+
+    assert asyncio.run(scenario()) == (1, True)
+
+
+def test_stream_never_started_still_releases_the_slot(monkeypatch):
+    route = "test_batch_cancelled"
+    release = _start(monkeypatch, route)
+    release.set()
+
+    async def scenario():
+        await offload.acquire_slot(route)
+        validation_api._stream_batch(route, "TEST", [{"statement": "s"}], {}, [], "research", None)
+        return await _wait_for_release(route)
+
+    assert asyncio.run(scenario())
@@ -0,0 +1,357 @@
+"""
+Streaming upload sink shared by the Django and FastAPI endpoints.
+
+An upload is consumed chunk by chunk (UPLOAD_CHUNK_KB, default 1024) and each
+chunk is, in one pass:
+
+- checked against the size limit (UPLOAD_MAX_MB, default 100) - a declared
+  size over the limit is rejected before reading, an undeclared one as soon as
+  the running total crosses it;
+- hashed (SHA-256) and scanned for page-count metadata;
+- written to a destination: a file on disk, memory (spilling to a temp file
+  above UPLOAD_MEMORY_MAX_KB, default 1024) or an S3 multipart upload.
+
+Peak memory per upload is bounded whatever the file size: one chunk on disk,
+one part for S3, at most UPLOAD_MEMORY_MAX_KB for memory.
+The result is an UploadedDocument handle: size, hash, page count and where the
+bytes live. Read the bytes only where they are really needed.
+
+The page count comes from the PDF's uncompressed objects (the page tree's
+/Count, else the number of /Type /Page objects); it is None when all of them
+sit in compressed object streams. PyMuPDF gives the exact count later.
+
+Usage:
+    doc = receive_django_file(uploaded_file, DiskDestination(workspace))
+    doc = await receive_upload_file(upload, DiskDestination())          # FastAPI
+    pdf_files_dict[doc.filename] = doc.as_pdf_info()
+"""
+
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import Awaitable, BinaryIO, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PAGE_OBJECT_RE = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+PAGE_COUNT_RE = re.compile(rb"/Count\s+(\d+)")
+# Longest match either pattern can produce, kept across chunk boundaries
+_SCAN_OVERLAP = 64
+
+
+class UploadTooLarge(ValueError):
+    """The upload exceeds the configured size limit."""
+
+
+def _chunk_bytes() -> int:
+    return int(os.getenv("UPLOAD_CHUNK_KB", "1024")) * 1024
+
+
+def max_upload_bytes() -> int:
+    return int(os.getenv("UPLOAD_MAX_MB", "100")) * 1_048_576
+
+
+@dataclass
+class UploadedDocument:
+    """A received upload: metadata plus the location of its bytes."""
+    filename: str
+    size: int
+    sha256: str
+    page_count: Optional[int]
+    is_pdf: bool
+    storage: str                    # "memory", "disk" or "s3"
+    path: Optional[str] = None
+    key: Optional[str] = None
+    data: Optional[bytes] = None
+
+    def open(self) -> BinaryIO:
+        """Binary file object over the stored bytes (not available for S3)."""
+        if self.storage == "memory":
+            return io.BytesIO(self.data)
+        if self.storage == "disk":
+            return open(self.path, "rb")
+        raise ValueError(f"{self.filename} is stored in S3 ({self.key}); download it first")
+
+    def read_bytes(self) -> bytes:
+        """Load the whole document (only where a consumer needs bytes, e.g. a Gemini upload)."""
+        if self.storage == "memory":
+            return self.data
+        with self.open() as f:
+            return f.read()
+
+    def as_pdf_info(self) -> dict:
+        """Entry for a validator pdf_files_dict; bytes are loaded lazily from "path"."""
+        info = {"path": self.path, "sha256": self.sha256, "size": self.size, "page_count": self.page_count}
+        if self.storage == "memory":
+            info["content"] = self.data
+        return info
+
+    def delete(self):
+        """Remove a disk-backed document."""
+        if self.storage == "disk" and self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class DiskDestination:
+    """Write to `directory`/`filename` (a new temp file when no directory is given)."""
+
+    def __init__(self, directory: Optional[str] = None, filename: Optional[str] = None, suffix: str = ".pdf"):
+        self.directory = directory
+        self.filename = filename
+        self.suffix = suffix
+        self.path = None
+        self._file = None
+
+    def open(self, filename: str):
+        if self.directory is None:
+            fd, self.path = tempfile.mkstemp(suffix=self.suffix)
+            self._file = os.fdopen(fd, "wb")
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            # basename: uploaded names must not escape the workspace
+            self.path = os.path.join(self.directory, os.path.basename(self.filename or filename))
+            self._file = open(self.path, "wb")
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+
+    def finish(self) -> dict:
+        self._file.close()
+        return {"storage": "disk", "path": self.path}
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class MemoryDestination:
+    """Keep small uploads in memory; spill to a temp file past `max_memory_bytes`."""
+
+    def __init__(self, max_memory_bytes: Optional[int] = None, suffix: str = ".pdf"):
+        if max_memory_bytes is None:
+            max_memory_bytes = int(os.getenv("UPLOAD_MEMORY_MAX_KB", "1024")) * 1024
+        self.max_memory_bytes = max_memory_bytes
+        self.suffix = suffix
+        self._buffer = io.BytesIO()
+        self._disk = None
+
+    def open(self, filename: str):
+        self._filename = filename
+
+    def write(self, chunk: bytes):
+        if self._disk is None and self._buffer.tell() + len(chunk) > self.max_memory_bytes:
+            self._disk = DiskDestination(suffix=self.suffix)
+            self._disk.open(self._filename)
+            self._disk.write(self._buffer.getvalue())
+            self._buffer = None
+        if self._disk is not None:
+            self._disk.write(chunk)
+        else:
+            self._buffer.write(chunk)
+
+    def finish(self) -> dict:
+        if self._disk is not None:
+            return self._disk.finish()
+        return {"storage": "memory", "data": self._buffer.getvalue()}
+
+    def abort(self):
+        if self._disk is not None:
+            self._disk.abort()
+        self._buffer = None
+
+
+class S3MultipartDestination:
+    """
+    Stream to S3 with a multipart upload, one part (UPLOAD_S3_PART_MB, default 8) in memory at a time.
+
+    Uploads smaller than one part are sent with a single put_object.
+    """
+
+    def __init__(self, client, bucket: str, key: str, extra_args: Optional[dict] = None, part_size: Optional[int] = None):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.extra_args = extra_args or {}
+        # S3 requires every part but the last to be at least 5 MB
+        self.part_size = max(5 * 1_048_576, part_size or int(os.getenv("UPLOAD_S3_PART_MB", "8")) * 1_048_576)
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+
+    def open(self, filename: str):
+        pass
+
+    def _flush_part(self):
+        if self._upload_id is None:
+            response = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key, **self.extra_args)
+            self._upload_id = response["UploadId"]
+        number = len(self._parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=number, Body=bytes(self._buffer)
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": number})
+        self._buffer.clear()
+
+    def write(self, chunk: bytes):
+        self._buffer.extend(chunk)
+        if len(self._buffer) >= self.part_size:
+            self._flush_part()
+
+    def finish(self) -> dict:
+        if self._upload_id is None:
+            self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer), **self.extra_args)
+        else:
+            if self._buffer:
+                self._flush_part()
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, MultipartUpload={"Parts": self._parts}
+            )
+        return {"storage": "s3", "key": self.key}
+
+    def abort(self):
+        self._buffer.clear()
+        if self._upload_id is not None:
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            except Exception as e:
+                logger.warning(f"[UPLOAD] Could not abort multipart upload {self.key}: {e}")
+
+
+class _PageScanner:
+    """Incremental page-count scan; a match is counted once, even across chunk boundaries."""
+
+    def __init__(self):
+        self._tail = b""
+        self._offset = 0            # absolute offset of self._tail[0]
+        self._counted_to = 0        # absolute end of the last counted match
+        self.page_objects = 0
+        self.max_count = 0
+
+    def feed(self, chunk: bytes, final: bool = False):
+        data = self._tail + chunk
+        counted_to = self._counted_to
+        for pattern in (PAGE_OBJECT_RE, PAGE_COUNT_RE):
+            for match in pattern.finditer(data):
+                end = self._offset + match.end()
+                # A match touching the end may continue in the next chunk: wait for it
+                if (match.end() == len(data) and not final) or end <= self._counted_to:
+                    continue
+                if pattern is PAGE_OBJECT_RE:
+                    self.page_objects += 1
+                else:
+                    self.max_count = max(self.max_count, int(match.group(1)))
+                counted_to = max(counted_to, end)
+        self._counted_to = counted_to
+        keep = min(len(data), _SCAN_OVERLAP)
+        self._offset += len(data) - keep
+        self._tail = data[len(data) - keep:]
+
+    @property
+    def page_count(self) -> Optional[int]:
+        return self.max_count or self.page_objects or None
+
+
+class UploadSink:
+    """Receives one upload chunk by chunk; see the module docstring."""
+
+    def __init__(self, filename: str, destination=None, max_bytes: Optional[int] = None):
+        self.filename = os.path.basename(filename or "upload.pdf")
+        self.destination = destination if destination is not None else MemoryDestination()
+        self.max_bytes = max_upload_bytes() if max_bytes is None else max_bytes
+        self.size = 0
+        self._sha = hashlib.sha256()
+        self._scanner = _PageScanner()
+        self._head = b""
+        self._open = False
+
+    def check_declared_size(self, declared: Optional[int]):
+        if declared is not None and self.max_bytes and declared > self.max_bytes:
+            raise UploadTooLarge(f"{self.filename} is {declared / 1_048_576:.1f} MB (limit {self.max_bytes / 1_048_576:.1f} MB)")
+
+    def write(self, chunk: bytes):
+        if not chunk:
+            return
+        if not self._open:
+            self.destination.open(self.filename)
+            self._open = True
+        self.size += len(chunk)
+        if self.max_bytes and self.size > self.max_bytes:
+            self.abort()
+            raise UploadTooLarge(f"{self.filename} exceeds the {self.max_bytes / 1_048_576:.1f} MB upload limit")
+        if len(self._head) < 1024:
+            self._head += chunk[:1024 - len(self._head)]
+        self._sha.update(chunk)
+        self._scanner.feed(chunk)
+        self.destination.write(chunk)
+
+    def finish(self) -> UploadedDocument:
+        if not self._open:
+            self.destination.open(self.filename)
+        self._scanner.feed(b"", final=True)
+        stored = self.destination.finish()
+        doc = UploadedDocument(
+            filename=self.filename,
+            size=self.size,
+            sha256=self._sha.hexdigest(),
+            page_count=self._scanner.page_count,
+            is_pdf=b"%PDF-" in self._head,
+            **stored,
+        )
+        logger.info(f"[UPLOAD] {doc.filename}: {doc.size} bytes, {doc.page_count or '?'} pages, "
+                    f"sha256 {doc.sha256[:12]}, {doc.storage}")
+        return doc
+
+    def abort(self):
+        if self._open:
+            self.destination.abort()
+            self._open = False
+
+
+def receive(chunks: Iterable[bytes], filename: str, destination=None, max_bytes: Optional[int] = None,
+            declared_size: Optional[int] = None) -> UploadedDocument:
+    """Consume an iterable of byte chunks into `destination` (memory by default)."""
+    sink = UploadSink(filename, destination, max_bytes)
+    sink.check_declared_size(declared_size)
+    try:
+        for chunk in chunks:
+            sink.write(chunk)
+        return sink.finish()
+    except BaseException:
+        sink.abort()
+        raise
+
+
+async def receive_async(read: Callable[[int], Awaitable[bytes]], filename: str, destination=None,
+                        max_bytes: Optional[int] = None, declared_size: Optional[int] = None) -> UploadedDocument:
+    """Like receive(), pulling chunks with `await read(size)` until it returns b""."""
+    sink = UploadSink(filename, destination, max_bytes)
+    sink.check_declared_size(declared_size)
+    size = _chunk_bytes()
+    try:
+        while True:
+            chunk = await read(size)
+            if not chunk:
+                break
+            sink.write(chunk)
+        return sink.finish()
+    except BaseException:
+        sink.abort()
+        raise
+
+
+def receive_django_file(file_obj, destination=None, max_bytes: Optional[int] = None) -> UploadedDocument:
+    """Receive a Django UploadedFile."""
+    return receive(file_obj.chunks(_chunk_bytes()), file_obj.name, destination, max_bytes,
+                   declared_size=getattr(file_obj, "size", None))
+
+
+async def receive_upload_file(upload, destination=None, max_bytes: Optional[int] = None) -> UploadedDocument:
+    """Receive a FastAPI/Starlette UploadFile."""
+    return await receive_async(upload.read, upload.filename, destination, max_bytes,
+                               declared_size=getattr(upload, "size", None))
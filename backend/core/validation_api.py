@@ -2,13 +2,13 @@
 # CORRECTED validation_api.py - TWO SEPARATE PIPELINES
 # ============================================================================
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 from dataclasses import asdict
+import asyncio
 import json
-import tempfile
 import os
 from pathlib import Path
 import logging
@@ -21,6 +21,9 @@ from conversion import (
     build_validation_dataframe
 )
 from Gemini_version import StatementValidator, ValidationResult
+from offload import acquire_slot, concurrency_limit, offload_status, release_slot, run_blocking
+from batch_validation import build_reference_set, get_reference_store, parse_statements, run_batch, summarize
+from upload_sink import DiskDestination, UploadTooLarge, receive_upload_file
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -81,6 +84,7 @@ class DrugValidateResponse(BaseModel):
 # ============================================================================
 
 @drug_router.post("/extract", response_model=DrugExtractResponse)
+@concurrency_limit("drug_extract")
 async def extract_drug_pdf(file: UploadFile = File(...)):
     """
     Extract drug compatibility table data from PDF
@@ -93,13 +97,12 @@ async def extract_drug_pdf(file: UploadFile = File(...)):
         logger.info(f"[DRUG EXTRACT] Processing: {file.filename}")
         
         # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            contents = await file.read()
-            tmp.write(contents)
-            temp_path = tmp.name
+        # Streamed to disk in chunks (hashed and size-checked), never read whole into memory
+        temp_path = (await receive_upload_file(file, DiskDestination())).path
         
         # Extract using drug-specific function
-        records = extract_drug_superscript_table_data(temp_path)
+        # Mostly Gemini vision calls: a thread keeps them under this process's shared rate limiter
+        records = await run_blocking(extract_drug_superscript_table_data, temp_path)
         
         if not records:
             logger.warning("[DRUG EXTRACT] No records extracted")
@@ -118,6 +121,8 @@ async def extract_drug_pdf(file: UploadFile = File(...)):
             message=f"[OK] Successfully extracted {len(records)} drug records"
         )
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"[DRUG EXTRACT] [ERROR] Error: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Drug extraction failed: {str(e)}")
@@ -128,6 +133,7 @@ async def extract_drug_pdf(file: UploadFile = File(...)):
 
 
 @drug_router.post("/convert", response_model=DrugConvertResponse)
+@concurrency_limit("drug_convert")
 async def convert_drug_records(request: DrugConvertRequest):
     """
     Convert drug extraction records to validation format (AUTO-DETECT)
@@ -142,7 +148,8 @@ async def convert_drug_records(request: DrugConvertRequest):
             raise ValueError("No records provided")
         
         # Convert using auto-detection function
-        validation_rows = build_validation_rows_special_case(
+        validation_rows = await run_blocking(
+            build_validation_rows_special_case,
             request.records,
             request.references
         )
@@ -170,6 +177,7 @@ async def convert_drug_records(request: DrugConvertRequest):
 
 
 @drug_router.post("/convert/image1", response_model=DrugConvertResponse)
+@concurrency_limit("drug_convert")
 async def convert_drug_records_image1(request: DrugConvertRequest):
     """
     Convert IMAGE 1 drug extraction records (pH compatibility tables)
@@ -185,7 +193,8 @@ async def convert_drug_records_image1(request: DrugConvertRequest):
             raise ValueError("No records provided")
         
         # Convert using IMAGE 1 specific function
-        validation_rows = build_validation_rows_image1(
+        validation_rows = await run_blocking(
+            build_validation_rows_image1,
             request.records,
             request.references
         )
@@ -213,6 +222,7 @@ async def convert_drug_records_image1(request: DrugConvertRequest):
 
 
 @drug_router.post("/convert/image2", response_model=DrugConvertResponse)
+@concurrency_limit("drug_convert")
 async def convert_drug_records_image2(request: DrugConvertRequest):
     """
     Convert IMAGE 2 drug extraction records (statement-based tables)
@@ -228,7 +238,8 @@ async def convert_drug_records_image2(request: DrugConvertRequest):
             raise ValueError("No records provided")
         
         # Convert using IMAGE 2 specific function
-        validation_rows = build_validation_rows_image2(
+        validation_rows = await run_blocking(
+            build_validation_rows_image2,
             request.records,
             request.references
         )
@@ -256,6 +267,7 @@ async def convert_drug_records_image2(request: DrugConvertRequest):
 
 
 @drug_router.post("/validate", response_model=DrugValidateResponse)
+@concurrency_limit("drug_validate")
 async def validate_drug_statement(
     files: List[UploadFile] = File(...),
     statement: str = Query(..., description="Drug statement to validate"),
@@ -283,22 +295,17 @@ async def validate_drug_statement(
         # Save all uploaded files
         pdf_files_dict = {}
         for file in files:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                contents = await file.read()
-                tmp.write(contents)
-                temp_path = tmp.name
-                temp_paths.append(temp_path)
-                
-                pdf_files_dict[file.filename] = {
-                    "content": contents,
-                    "path": temp_path
-                }
+            # Streamed to disk; validators read the bytes from "path" when they need them
+            document = await receive_upload_file(file, DiskDestination())
+            temp_paths.append(document.path)
+            pdf_files_dict[file.filename] = document.as_pdf_info()
         
-        # Initialize validator
-        validator = StatementValidator()
+        # Initialize validator (pings Gemini, so not on the event loop)
+        validator = await run_blocking(StatementValidator)
         
         # Validate using PHARMACEUTICAL mode (for drug statements)
-        validation_results = validator.validate_statement_against_all_papers(
+        validation_results = await run_blocking(
+            validator.validate_statement_against_all_papers,
             statement=statement,
             reference_no=reference_no,
             reference=reference_text or "",
@@ -340,6 +347,8 @@ async def validate_drug_statement(
             message=f"[OK] Validated against {len(files)} PDFs"
         )
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"[DRUG VALIDATE] [ERROR] Error: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Drug validation failed: {str(e)}")
@@ -351,6 +360,7 @@ async def validate_drug_statement(
 
 
 @drug_router.post("/pipeline")
+@concurrency_limit("drug_pipeline")
 async def drug_pipeline(
     pdf_file: UploadFile = File(...),
     reference_files: List[UploadFile] = File(...)
@@ -369,14 +379,12 @@ async def drug_pipeline(
         logger.info(f"[DRUG PIPELINE] Starting with {pdf_file.filename} + {len(reference_files)} references")
         
         # Step 1: Extract
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            contents = await pdf_file.read()
-            tmp.write(contents)
-            extract_path = tmp.name
-            temp_paths.append(extract_path)
+        # Streamed to disk in chunks (hashed and size-checked), never read whole into memory
+        extract_path = (await receive_upload_file(pdf_file, DiskDestination())).path
+        temp_paths.append(extract_path)
         
         logger.info("[DRUG PIPELINE] Step 1: Extracting...")
-        extracted_records = extract_drug_superscript_table_data(extract_path)
+        extracted_records = await run_blocking(extract_drug_superscript_table_data, extract_path)
         
         if not extracted_records:
             raise ValueError("No drug table records extracted from PDF")
@@ -385,7 +393,7 @@ async def drug_pipeline(
         
         # Step 2: Convert
         logger.info("[DRUG PIPELINE] Step 2: Converting...")
-        validation_rows = build_validation_rows_special_case(extracted_records, {})
+        validation_rows = await run_blocking(build_validation_rows_special_case, extracted_records, {})
         
         if not validation_rows:
             raise ValueError("No validation rows generated")
@@ -396,23 +404,19 @@ async def drug_pipeline(
         logger.info("[DRUG PIPELINE] Step 3: Validating...")
         pdf_files_dict = {}
         for file in reference_files:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                contents = await file.read()
-                tmp.write(contents)
-                temp_path = tmp.name
-                temp_paths.append(temp_path)
-                pdf_files_dict[file.filename] = {
-                    "content": contents,
-                    "path": temp_path
-                }
+            # Streamed to disk; validators read the bytes from "path" when they need them
+            document = await receive_upload_file(file, DiskDestination())
+            temp_paths.append(document.path)
+            pdf_files_dict[file.filename] = document.as_pdf_info()
         
-        validator = StatementValidator()
+        validator = await run_blocking(StatementValidator)
         all_validation_results = []
         
         for idx, row in enumerate(validation_rows, 1):
             logger.info(f"[DRUG PIPELINE] Validating row {idx}/{len(validation_rows)}")
             
-            results = validator.validate_statement_against_all_papers(
+            results = await run_blocking(
+                validator.validate_statement_against_all_papers,
                 statement=row["statement"],
                 reference_no=row["reference_no"],
                 reference=row["reference"],
@@ -442,6 +446,8 @@ async def drug_pipeline(
             "message": "[OK] Drug pipeline completed successfully"
         })
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"[DRUG PIPELINE] [ERROR] Failed: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Drug pipeline failed: {str(e)}")
@@ -457,6 +463,7 @@ async def drug_pipeline(
 # ============================================================================
 
 @research_router.post("/extract")
+@concurrency_limit("research_extract")
 async def extract_research_pdf(file: UploadFile = File(...)):
     """
     Extract citations from research PDF
@@ -468,13 +475,12 @@ async def extract_research_pdf(file: UploadFile = File(...)):
     try:
         logger.info(f"[RESEARCH EXTRACT] Processing: {file.filename}")
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            contents = await file.read()
-            tmp.write(contents)
-            temp_path = tmp.name
+        # Streamed to disk in chunks (hashed and size-checked), never read whole into memory
+        temp_path = (await receive_upload_file(file, DiskDestination())).path
         
         # Extract using research-specific function
-        extraction_result = extract_footnotes(temp_path)
+        # Mostly Gemini vision calls: a thread keeps them under this process's shared rate limiter
+        extraction_result = await run_blocking(extract_footnotes, temp_path)
         
         if not extraction_result.in_text:
             logger.warning("[RESEARCH EXTRACT] No citations extracted")
@@ -503,6 +509,8 @@ async def extract_research_pdf(file: UploadFile = File(...)):
             "message": f"[OK] Successfully extracted {len(extraction_result.in_text)} citations"
         })
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"[RESEARCH EXTRACT] [ERROR] Error: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Research extraction failed: {str(e)}")
@@ -513,6 +521,7 @@ async def extract_research_pdf(file: UploadFile = File(...)):
 
 
 @research_router.post("/validate")
+@concurrency_limit("research_validate")
 async def validate_research_statement(
     files: List[UploadFile] = File(...),
     statement: str = Query(..., description="Research statement to validate"),
@@ -540,21 +549,16 @@ async def validate_research_statement(
         # Save all uploaded files
         pdf_files_dict = {}
         for file in files:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                contents = await file.read()
-                tmp.write(contents)
-                temp_path = tmp.name
-                temp_paths.append(temp_path)
-                
-                pdf_files_dict[file.filename] = {
-                    "content": contents,
-                    "path": temp_path
-                }
+            # Streamed to disk; validators read the bytes from "path" when they need them
+            document = await receive_upload_file(file, DiskDestination())
+            temp_paths.append(document.path)
+            pdf_files_dict[file.filename] = document.as_pdf_info()
         
-        validator = StatementValidator()
+        validator = await run_blocking(StatementValidator)
         
         # Validate using RESEARCH mode
-        validation_results = validator.validate_statement_against_all_papers(
+        validation_results = await run_blocking(
+            validator.validate_statement_against_all_papers,
             statement=statement,
             reference_no=reference_no,
             reference=reference_text or "",
@@ -606,6 +610,8 @@ async def validate_research_statement(
             "message": f"[OK] Validated against {len(files)} research papers"
         })
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"[RESEARCH VALIDATE] [ERROR] Error: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Research validation failed: {str(e)}")
@@ -616,6 +622,164 @@ async def validate_research_statement(
                 os.remove(temp_path)
 
 
+# ============================================================================
+# BATCH VALIDATION (many statements, one shared reference set)
+# ============================================================================
+
+_BATCH_DONE = object()
+
+
+def _ndjson(payload: Dict) -> bytes:
+    return (json.dumps(payload, default=str) + "\n").encode("utf-8")
+
+
+def _stream_batch(route: str, tag: str, items: List[Dict], pdf_files_dict: Dict, references: List[Dict],
+                  validation_type: str, validator):
+    """
+    Start the batch and return its NDJSON stream: "references", one "result" per
+    statement as it completes, then "summary" (or "error").
+
+    The batch starts before the response does and the route slot is released when
+    run_batch returns, not when the stream closes: a client that disconnects does
+    not free the slot while its batch still runs, and a response cancelled before
+    it started streaming cannot leak it.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def on_result(entry):
+        loop.call_soon_threadsafe(queue.put_nowait, entry)
+
+    def work():
+        try:
+            return run_batch(items, pdf_files_dict, validation_type, validator, on_result=on_result,
+                             reference_store=get_reference_store())
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _BATCH_DONE)
+            loop.call_soon_threadsafe(release_slot, route)
+
+    task = asyncio.ensure_future(run_blocking(work))
+
+    def _unobserved(done):
+        # Nobody awaits the task once the client is gone; log its failure here instead
+        if not done.cancelled() and done.exception() is not None:
+            logger.error(f"[{tag}] [ERROR] Batch failed: {done.exception()}")
+
+    task.add_done_callback(_unobserved)
+
+    async def events():
+        try:
+            yield _ndjson({"event": "references", "total_statements": len(items), "references": references})
+            while True:
+                entry = await queue.get()
+                if entry is _BATCH_DONE:
+                    break
+                yield _ndjson({"event": "result", **entry})
+            results = await task
+            logger.info(f"[{tag}] [OK] Streamed {len(results)} results")
+            yield _ndjson({"event": "summary", "summary": summarize(results)})
+        except Exception as e:
+            yield _ndjson({"event": "error", "detail": str(e)})
+
+    return events()
+
+
+async def _validate_batch(route: str, tag: str, validation_type: str, statements: str,
+                          files: Optional[List[UploadFile]], reference_ids: str, stream: bool):
+    """Shared body of the drug and research batch endpoints."""
+    await acquire_slot(route)
+    temp_paths = []
+    slot_handed_off = False
+    try:
+        items = parse_statements(statements)
+        ids = [ref.strip() for ref in reference_ids.split(",") if ref.strip()]
+        logger.info(f"[{tag}] {len(items)} statements against {len(files or [])} uploaded + {len(ids)} stored references")
+
+        documents = []
+        for file in files or []:
+            # Streamed to disk, then kept in the reference store for later batches
+            document = await receive_upload_file(file, DiskDestination())
+            temp_paths.append(document.path)
+            documents.append(document)
+
+        pdf_files_dict, references = await run_blocking(build_reference_set, documents, ids, get_reference_store())
+        if not pdf_files_dict:
+            raise ValueError("No reference PDFs provided")
+
+        validator = await run_blocking(StatementValidator)
+
+        if stream:
+            events = _stream_batch(route, tag, items, pdf_files_dict, references, validation_type, validator)
+            # The running batch releases the slot when it finishes
+            slot_handed_off = True
+            return StreamingResponse(events, media_type="application/x-ndjson")
+
+        results = await run_blocking(run_batch, items, pdf_files_dict, validation_type, validator,
+                                     reference_store=get_reference_store())
+        summary = summarize(results)
+        logger.info(f"[{tag}] [OK] Results: {summary}")
+        return JSONResponse({
+            "success": True,
+            "total_statements": len(results),
+            "references": references,
+            "results": results,
+            "summary": summary,
+            "message": f"[OK] Validated {len(results)} statements against {len(references)} references"
+        })
+
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.error(f"[{tag}] [ERROR] Error: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Batch validation failed: {str(e)}")
+
+    finally:
+        # Uploads moved into the reference store are gone from their temp paths
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        if not slot_handed_off:
+            release_slot(route)
+
+
+_BATCH_STATEMENTS_HELP = (
+    'JSON list of statements: strings, or objects with "statement" and optional '
+    '"reference_no", "reference", "page_no" and "references" (filenames or reference ids)'
+)
+
+
+@drug_router.post("/validate/batch")
+async def validate_drug_batch(
+    statements: str = Form(..., description=_BATCH_STATEMENTS_HELP),
+    files: Optional[List[UploadFile]] = File(None),
+    reference_ids: str = Form(default="", description="Comma-separated ids of references stored by earlier batches"),
+    stream: bool = Query(False, description="Stream NDJSON results as statements complete")
+):
+    """
+    Validate many drug statements against one shared set of reference PDFs
+
+    Uses: run_batch() (pharmaceutical mode); references are uploaded once
+    Returns: One aggregated result per statement, plus reference ids for reuse
+    """
+    return await _validate_batch("drug_batch", "DRUG BATCH", "pharmaceutical", statements, files, reference_ids, stream)
+
+
+@research_router.post("/validate/batch")
+async def validate_research_batch(
+    statements: str = Form(..., description=_BATCH_STATEMENTS_HELP),
+    files: Optional[List[UploadFile]] = File(None),
+    reference_ids: str = Form(default="", description="Comma-separated ids of references stored by earlier batches"),
+    stream: bool = Query(False, description="Stream NDJSON results as statements complete")
+):
+    """
+    Validate many research statements against one shared set of reference papers
+
+    Uses: run_batch() (research mode); references are uploaded once
+    Returns: One aggregated result per statement, plus reference ids for reuse
+    """
+    return await _validate_batch("research_batch", "RESEARCH BATCH", "research", statements, files, reference_ids, stream)
+
+
 # ============================================================================
 # HEALTH CHECKS
 # ============================================================================
@@ -626,10 +790,12 @@ async def drug_health():
     return {
         "status": "Drug Pipeline is running",
         "pipeline_type": "DRUG",
+        "load": offload_status(),
         "endpoints": {
             "extract": "POST /api/drugs/extract",
             "convert": "POST /api/drugs/convert",
             "validate": "POST /api/drugs/validate",
+            "validate_batch": "POST /api/drugs/validate/batch",
             "pipeline": "POST /api/drugs/pipeline"
         }
     }
@@ -641,8 +807,10 @@ async def research_health():
     return {
         "status": "Research Pipeline is running",
         "pipeline_type": "RESEARCH",
+        "load": offload_status(),
         "endpoints": {
             "extract": "POST /api/research/extract",
-            "validate": "POST /api/research/validate"
+            "validate": "POST /api/research/validate",
+            "validate_batch": "POST /api/research/validate/batch"
         }
     }
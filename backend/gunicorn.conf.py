@@ -71,6 +71,8 @@ access_log_format = '%(t)s "%(r)s" %(s)s %(b)s "%(f)s" %(L)ss'
 # ==============================================================================
 # Preload app before forking workers — saves memory via copy-on-write.
 # Each worker shares the Django app code in memory instead of loading it separately.
+# Safe because Gemini/Mongo clients are never created at import time: core/clients.py
+# builds them on first use and drops any inherited instance after fork.
 preload_app = True
 
 # ==============================================================================
@@ -0,0 +1,177 @@
+"""
+Benchmark conversion.build_validation_dataframe on large citation lists.
+
+Generates N synthetic citations (pydantic InlineCitation models and plain
+dicts, mixing prose, "Row: | Column: | Content:" and "Table" superscripts)
+and times the previous row-dict implementation against the columnar builder,
+then does the same for build_validation_rows_special_case on drug table rows.
+
+Usage:
+    python scripts/bench_conversion.py [--count 100000] [--repeat 3]
+
+Exits with status 1 if the two implementations disagree on any row.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+import pandas as pd  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+from typing import Optional  # noqa: E402
+
+from conversion import (  # noqa: E402
+    build_validation_dataframe,
+    build_validation_dataframe_special_case,
+    build_validation_rows_special_case,
+)
+
+
+class InlineCitation(BaseModel):
+    """Same shape as Superscript.InlineCitation (not imported to keep this script light)."""
+    page_number: int
+    superscript_number: str
+    heading: Optional[str] = None
+    statement: str
+
+
+def legacy_build_validation_dataframe(in_text, references):
+    """The previous implementation (per-field .dict(), inline regex, list of row dicts)."""
+    output = []
+
+    def _get_field(obj, key, default=""):
+        try:
+            if hasattr(obj, 'get'):
+                return obj.get(key, default)
+        except Exception:
+            pass
+        try:
+            if hasattr(obj, 'dict'):
+                return obj.dict().get(key, default)
+        except Exception:
+            pass
+        try:
+            return getattr(obj, key, default)
+        except Exception:
+            return default
+
+    for item in in_text:
+        raw_sup = _get_field(item, "superscript_number", "")
+        raw_stmt = _get_field(item, "statement", "")
+        raw_heading = _get_field(item, "heading", "")
+        superscript_no = str(raw_sup if raw_sup is not None else "").strip()
+        statement = str(raw_stmt if raw_stmt is not None else "").strip()
+        heading = str(raw_heading if raw_heading is not None else "").strip()
+
+        is_table = False
+        table_match = re.search(r"Row:\s*(.*?)\s*\|\s*Column:\s*(.*?)\s*\|\s*Content:\s*(.*)$", statement)
+        if table_match:
+            statement = f"{table_match.group(1).strip()}. {table_match.group(2).strip()}. {table_match.group(3).strip()}"
+            is_table = True
+        elif ". " in statement and statement.count(". ") >= 2:
+            is_table = True
+
+        if is_table:
+            final_statement = statement
+        elif heading and statement:
+            final_statement = f"{heading}. {statement}"
+        elif statement:
+            final_statement = statement
+        else:
+            final_statement = heading
+
+        if superscript_no == "Table":
+            ref_match = re.search(r'[\s,]+([\d,\-]+)\s*$', final_statement)
+            if ref_match:
+                superscript_no = ref_match.group(1).strip()
+                final_statement = final_statement[:ref_match.start()].strip()
+
+        output.append({
+            "statement": final_statement,
+            "reference_no": superscript_no,
+            "reference": references.get(superscript_no, ""),
+            "page_no": _get_field(item, "page_number", 1),
+        })
+    return pd.DataFrame(output)
+
+
+def synthetic_citations(count):
+    items = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            fields = dict(page_number=i % 40 + 1, superscript_number=str(i % 60 + 1),
+                          heading="Catheter care", statement=f"Flushing reduced occlusion by {i % 90}% in trial {i}")
+        elif kind == 1:
+            fields = dict(page_number=i % 40 + 1, superscript_number="Table",
+                          statement=f"Row: Drug {i} | Column: Storage | Content: Stable for 24 h {i % 60 + 1},{i % 7 + 1}")
+        elif kind == 2:
+            fields = dict(page_number=i % 40 + 1, superscript_number=str(i % 60 + 1),
+                          statement=f"Drug {i}. Y-site. Compatible for 4 h. See label")
+        else:
+            fields = dict(page_number=i % 40 + 1, superscript_number=str(i % 60 + 1), heading=None, statement="")
+        items.append(InlineCitation(**fields) if i % 2 else fields)
+    return items
+
+
+def synthetic_drug_rows(count):
+    rows = []
+    for i in range(count):
+        if i % 3:
+            rows.append({"page_number": i % 40 + 1, "row_name": f"Drug {i}", "superscript_number": str(i % 60 + 1),
+                         "ph_value": "3.5-5.5", "column_name": "D5W.NS.LR", "mark_type": "Circle.Diamond.Circle"})
+        else:
+            rows.append({"page_number": i % 40 + 1, "row_name": f"Drug {i}", "superscript_number": None,
+                         "statement": "Store refrigerated", "superscript_in_statement": str(i % 60 + 1),
+                         "column_name": "Storage"})
+    return rows
+
+
+def _time(func, repeat, *args):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    references = {str(n): f"Reference {n}. J Infus Nurs. 2020." for n in range(1, 61)}
+    failed = False
+
+    citations = synthetic_citations(args.count)
+    legacy_seconds, legacy_df = _time(legacy_build_validation_dataframe, args.repeat, citations, references)
+    new_seconds, new_df = _time(build_validation_dataframe, args.repeat, citations, references)
+    print(f"build_validation_dataframe, {args.count} citations:")
+    print(f"   legacy   {legacy_seconds:8.3f} s")
+    print(f"   columnar {new_seconds:8.3f} s   ({legacy_seconds / new_seconds:.1f}x)")
+    if not legacy_df.equals(new_df):
+        print("   FAIL: outputs differ")
+        failed = True
+
+    rows = synthetic_drug_rows(args.count)
+    rows_seconds, row_dicts = _time(build_validation_rows_special_case, args.repeat, rows, references)
+    frame_seconds, frame = _time(build_validation_dataframe_special_case, args.repeat, rows, references)
+    print(f"special case, {args.count} drug rows:")
+    print(f"   rows + DataFrame(rows) {rows_seconds + _time(pd.DataFrame, 1, row_dicts)[0]:8.3f} s")
+    print(f"   columnar DataFrame     {frame_seconds:8.3f} s")
+    if not pd.DataFrame(row_dicts).equals(frame):
+        print("   FAIL: outputs differ")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
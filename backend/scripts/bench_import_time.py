@@ -0,0 +1,163 @@
+"""
+Import-time benchmark for the web and worker entry points.
+
+Runs each entry point in a fresh interpreter under `python -X importtime`,
+sums the self time of every imported module, and compares the result with the
+startup profile checked in next to this script (startup_profile.json).
+
+Entry points:
+    wsgi    config.wsgi plus URLconf resolution (what a gunicorn worker loads
+            before serving its first auth/health/OTP request)
+    celery  config.celery plus task autodiscovery (what `celery -A config
+            worker` imports before the pool starts)
+
+Usage:
+    python scripts/bench_import_time.py [--repeat 5] [--top 10]
+    python scripts/bench_import_time.py --update     # rewrite the profile
+
+Exits with status 1 if an entry point imports a module on its deny list, or
+its total import time exceeds the profiled total by more than the tolerance
+(profile "tolerance", default 0.25, plus a small absolute slack for noise).
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_profile.json")
+
+DEFAULT_TOLERANCE = 0.25
+# Absolute slack on top of the relative tolerance, so tiny totals don't flap
+SLACK_MS = 50.0
+
+ENTRY_POINTS = {
+    "wsgi": (
+        "import config.wsgi\n"
+        "from django.urls import get_resolver\n"
+        "get_resolver().url_patterns\n"
+    ),
+    "celery": (
+        "from config.celery import app\n"
+        "app.loader.import_default_modules()\n"
+    ),
+}
+
+# Heavy modules that must stay out of these entry points (loaded on first use instead)
+DENY_LIST = {
+    "wsgi": ["pandas", "numpy", "fitz", "pymupdf", "google.generativeai", "boto3", "sendgrid"],
+    "celery": ["pandas", "numpy", "fitz", "pymupdf", "google.generativeai", "boto3", "sendgrid"],
+}
+
+
+def run_importtime(code):
+    """Run `code` in a fresh interpreter; return [(name, self_us, cumulative_us, depth)]."""
+    env = dict(os.environ)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get("PYTHONPATH")]))
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+
+    # Run outside the repo so nothing the settings module writes lands in the tree
+    with tempfile.TemporaryDirectory() as cwd:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=cwd, env=env, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.splitlines()[-15:])
+        raise RuntimeError(f"Entry point failed to import:\n{tail}")
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def measure(name, repeat, top):
+    """Best-of-`repeat` import profile for one entry point."""
+    best = None
+    for _ in range(repeat):
+        modules = run_importtime(ENTRY_POINTS[name])
+        total_ms = sum(m[1] for m in modules) / 1000
+        if best is None or total_ms < best[0]:
+            best = (total_ms, modules)
+
+    total_ms, modules = best
+    imported = {m[0] for m in modules}
+    # Slowest top-level imports made by the entry point itself (depth 0)
+    roots = sorted((m for m in modules if m[3] == 0), key=lambda m: m[2], reverse=True)
+    return {
+        "total_ms": round(total_ms, 1),
+        "modules": len(imported),
+        "top": [{"module": m[0], "cumulative_ms": round(m[2] / 1000, 1)} for m in roots[:top]],
+        "denied": sorted(mod for mod in DENY_LIST[name] if mod in imported),
+    }
+
+
+def load_profile():
+    try:
+        with open(PROFILE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entry", choices=sorted(ENTRY_POINTS), nargs="+", default=sorted(ENTRY_POINTS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--update", action="store_true", help="write the measured profile to startup_profile.json")
+    args = parser.parse_args()
+
+    profile = load_profile() or {}
+    tolerance = profile.get("tolerance", DEFAULT_TOLERANCE)
+    baseline = profile.get("entry_points", {})
+    results = {}
+    failed = False
+
+    for name in args.entry:
+        result = measure(name, args.repeat, args.top)
+        results[name] = result
+
+        print(f"\n== {name}: {result['total_ms']:.1f} ms, {result['modules']} modules")
+        for item in result["top"]:
+            print(f"   {item['cumulative_ms']:>8.1f} ms  {item['module']}")
+
+        if result["denied"]:
+            print(f"   FAIL: imports deferred modules at startup: {', '.join(result['denied'])}")
+            failed = True
+
+        if name in baseline and not args.update:
+            limit = baseline[name]["total_ms"] * (1 + tolerance) + SLACK_MS
+            print(f"   profile {baseline[name]['total_ms']:.1f} ms, limit {limit:.1f} ms")
+            if result["total_ms"] > limit:
+                print(f"   FAIL: {name} import time regressed past the profile")
+                failed = True
+
+    if args.update:
+        entry_points = dict(baseline)
+        entry_points.update(results)
+        profile = {
+            "python": platform.python_version(),
+            "tolerance": tolerance,
+            "entry_points": entry_points,
+        }
+        with open(PROFILE_PATH, "w", encoding="utf-8") as f:
+            json.dump(profile, f, indent=2)
+            f.write("\n")
+        print(f"\nWrote {PROFILE_PATH}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
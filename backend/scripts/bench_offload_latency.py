@@ -0,0 +1,137 @@
+"""
+Load test: health-check latency while validations run on the FastAPI routers.
+
+Mounts the drug and research routers from core/validation_api.py in a test
+app (no server or network needed: requests go through httpx's ASGI transport,
+on the same event loop as the app). Extraction and Gemini calls are replaced
+by stand-ins that wait like a Gemini vision call with a little CPU work
+(--extract-seconds) or block (--validate-seconds).
+While --requests extract and validate requests are in flight, GET
+/api/drugs/health is probed every 50 ms; each probe's latency is measured from
+its scheduled time, so waiting for a blocked event loop is counted.
+
+The run is done twice: with the blocking work called inline on the event loop
+(the previous behavior) and through core/offload.py.
+
+Usage:
+    python scripts/bench_offload_latency.py [--requests 4] [--extract-seconds 1.5]
+                                            [--validate-seconds 1.5] [--max-health-ms 250]
+
+Exits with status 1 if the offloaded health p99 exceeds --max-health-ms.
+"""
+
+import argparse
+import asyncio
+import functools
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+import offload  # noqa: E402
+import validation_api  # noqa: E402
+
+
+def fake_extract(path, seconds=1.5):
+    """Stand-in for extract_drug_superscript_table_data: page parsing, then waiting on Gemini."""
+    total = sum(i * i for i in range(10_000))
+    time.sleep(seconds)
+    return [{"page_number": 1, "row_name": "Drug", "superscript_number": "1", "checksum": total % 7}]
+
+
+class FakeValidator:
+    """Blocking stand-in for StatementValidator (the real one pings and calls Gemini)."""
+    validate_seconds = 1.5
+
+    def validate_statement_against_all_papers(self, **kwargs):
+        time.sleep(self.validate_seconds)
+        return []
+
+
+async def _inline(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+async def _run(args, inline: bool) -> list:
+    app = FastAPI()
+    app.include_router(validation_api.drug_router)
+    app.include_router(validation_api.research_router)
+
+    validation_api.run_blocking = _inline if inline else offload.run_blocking
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def extract():
+            return await client.post("/api/drugs/extract", files={"file": ("b.pdf", b"%PDF-1.4", "application/pdf")})
+
+        async def validate():
+            return await client.post(
+                "/api/research/validate",
+                params={"statement": "Claim", "reference_no": "1"},
+                files={"files": ("1. Ref.pdf", b"%PDF-1.4", "application/pdf")},
+            )
+
+        work = [asyncio.create_task(extract()) for _ in range(args.requests)]
+        work += [asyncio.create_task(validate()) for _ in range(args.requests)]
+
+        latencies = []
+        scheduled = time.perf_counter()
+        await asyncio.sleep(0.05)
+        while True:
+            # Measured from the probe's scheduled time, so a stalled event loop counts
+            scheduled += 0.05
+            response = await client.get("/api/drugs/health")
+            latencies.append((time.perf_counter() - scheduled) * 1000)
+            assert response.status_code == 200
+            if all(task.done() for task in work):
+                break
+            await asyncio.sleep(max(0.0, scheduled + 0.05 - time.perf_counter()))
+
+        statuses = [task.result().status_code for task in work]
+        if any(code != 200 for code in statuses):
+            print(f"   unexpected statuses: {statuses}")
+    return latencies
+
+
+def _report(label: str, latencies: list) -> float:
+    if not latencies:
+        print(f"{label}: no health checks completed")
+        return 0.0
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label}: {len(ordered)} health checks, p50 {statistics.median(ordered):7.1f} ms, "
+          f"p99 {p99:7.1f} ms, max {ordered[-1]:7.1f} ms")
+    return p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=4, help="Extract and validate requests each")
+    parser.add_argument("--extract-seconds", type=float, default=1.5)
+    parser.add_argument("--validate-seconds", type=float, default=1.5)
+    parser.add_argument("--max-health-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("OFFLOAD_LIMIT_DRUG_EXTRACT", str(args.requests))
+    os.environ.setdefault("OFFLOAD_LIMIT_RESEARCH_VALIDATE", str(args.requests))
+
+    validation_api.extract_drug_superscript_table_data = functools.partial(fake_extract, seconds=args.extract_seconds)
+    FakeValidator.validate_seconds = args.validate_seconds
+    validation_api.StatementValidator = FakeValidator
+
+    _report("inline   ", asyncio.run(_run(args, inline=True)))
+    # Route semaphores belong to the event loop that created them
+    offload._semaphores.clear()
+    offloaded_p99 = _report("offloaded", asyncio.run(_run(args, inline=False)))
+    offload.shutdown_pools()
+
+    sys.exit(1 if offloaded_p99 > args.max_health_ms else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark the references parser on synthetic compendia.
+
+Generates documents with 1k-10k numbered references containing the cases the
+old regex parser got wrong (numbers above 999, "Vol. 12." wrapped to the start
+of a line, repeated "References" headings, page footers inside the list), then
+times the old lazy-regex parser against references_parser.parse_references.
+
+Usage:
+    python scripts/bench_references_parser.py [--sizes 1000 2000 5000 10000] [--repeat 5]
+
+Exits with status 1 if the new parser misses references or its time per
+reference at the largest size exceeds MAX_SCALING x the smallest size.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+from references_parser import parse_references  # noqa: E402
+
+# Per-reference time may grow at most this much from the smallest to the largest input
+MAX_SCALING = 2.0
+
+
+def legacy_parse(text):
+    """The previous implementation (regex from the first "References" match)."""
+    start = re.search(r"References\s*(.*)", text, flags=re.IGNORECASE | re.DOTALL)
+    if not start:
+        return {}
+    refs_text = start.group(1)
+    stop = re.search(r"(BD, the BD Logo|Becton, Dickinson|©|Copyright|All rights reserved)", refs_text, flags=re.IGNORECASE)
+    if stop:
+        refs_text = refs_text[:stop.start()]
+    pattern = r"(\d{1,3})[.)]\s+(.*?)(?=\s+\d{1,3}[.)]\s+|$)"
+    references = {}
+    for num, ref_text in re.findall(pattern, refs_text.strip(), flags=re.DOTALL):
+        references[num] = re.sub(r"\s+", " ", ref_text.replace("\n", " ")).strip()
+    return references
+
+
+def synthetic_document(count, per_page=40):
+    """Body text followed by `count` references spread over pages with footers and repeated headings."""
+    lines = ["Compatibility overview", "Details are listed in the References section at the end."]
+    lines += [f"Statement {i} about infusion site reactions.{i % 9 + 1}" for i in range(200)]
+    lines.append("References")
+    for number in range(1, count + 1):
+        lines.append(f"{number}. Author{number} A, Writer B, et al. Stability of drug {number} in solution.")
+        lines.append("J Infus Nurs. 2019;")
+        lines.append(f"Vol. {number % 40 + 1}. pp {number}-{number + 7}.")
+        if number % per_page == 0 and number < count:
+            lines.append("© 2024 BD. BD, the BD Logo are trademarks of Becton, Dickinson and Company.")
+            lines.append(str(number // per_page + 10))
+            lines.append("References (continued)")
+    return "\n".join(lines)
+
+
+def _time(func, text, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 5000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'refs':>7} {'chars':>10} {'legacy s':>10} {'legacy found':>13} {'new s':>9} {'new found':>10} {'us/ref':>8}")
+    per_ref = []
+    failed = False
+    for size in args.sizes:
+        text = synthetic_document(size)
+        legacy_seconds, legacy_refs = _time(legacy_parse, text, args.repeat)
+        new_seconds, new_refs = _time(parse_references, text, args.repeat)
+        per_ref.append(new_seconds / size)
+        print(f"{size:>7} {len(text):>10} {legacy_seconds:>10.3f} {len(legacy_refs):>13} "
+              f"{new_seconds:>9.3f} {len(new_refs):>10} {new_seconds / size * 1e6:>8.2f}")
+
+        if len(new_refs) != size or not new_refs[str(size)].startswith(f"Author{size} "):
+            print(f"  FAIL: expected {size} references, parsed {len(new_refs)}")
+            failed = True
+
+    scaling = per_ref[-1] / per_ref[0] if per_ref[0] else 0.0
+    print(f"\nTime per reference, largest vs smallest input: {scaling:.2f}x (limit {MAX_SCALING}x)")
+    if scaling > MAX_SCALING:
+        print("FAIL: parser does not scale linearly")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
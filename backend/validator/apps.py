@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class ValidatorConfig(AppConfig):
     name = 'validator'
+
+    def ready(self):
+        # Per-job log buffers behind the logs endpoints (web process and Celery worker)
+        from .job_logs import install_job_log_handler
+        install_job_log_handler()
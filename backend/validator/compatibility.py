@@ -1,35 +1,13 @@
+from django.core.exceptions import ValidationError
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 import logging
-import threading
 
-logger = logging.getLogger(__name__)
-
-# --- In-Memory Log Store (Compatibility with FastAPI logs polling) ---
-recent_logs = []
-logs_lock = threading.Lock()
-
-class QueueHandler(logging.Handler):
-    def emit(self, record):
-        try:
-            log_entry = {
-                "timestamp": self.format(record),
-                "message": record.getMessage(),
-                "level": record.levelname,
-            }
-            with logs_lock:
-                recent_logs.append(log_entry)
-                if len(recent_logs) > 100:
-                    recent_logs.pop(0)
-        except Exception:
-            self.handleError(record)
+from .job_logs import read_job_logs
+from .models import ValidationJob
 
-# Attach handler to root logger so we catch logs from Superscript, conversion, Gemini_version
-_root_logger = logging.getLogger()
-_compatibility_handler = QueueHandler()
-_compatibility_handler.setFormatter(logging.Formatter('%(asctime)s', datefmt='%H:%M:%S'))
-_root_logger.addHandler(_compatibility_handler)
+logger = logging.getLogger(__name__)
 
 
 @api_view(['GET'])
@@ -41,13 +19,24 @@ def health_check(request):
     return Response({"status": "ok", "service": "MLR Validator (Django DRF)"})
 
 @api_view(['GET'])
-@permission_classes([AllowAny])
+@permission_classes([IsAuthenticated])
 def get_latest_logs(request):
     """
-    Polls the latest logs for real-time feedback in UI.
+    Polls the latest logs of the caller's job for real-time feedback in UI.
+    Uses ?job_id= when given, otherwise the caller's most recent job; ?since= is
+    the cursor from the previous response.
     """
-    with logs_lock:
-        return Response({"logs": list(recent_logs)})
+    jobs = ValidationJob.objects.filter(user=request.user)
+    job_id = request.query_params.get('job_id')
+    try:
+        job = jobs.get(id=job_id) if job_id else jobs.order_by('-created_at').first()
+    except (ValidationJob.DoesNotExist, ValidationError):
+        job = None
+    if job is None:
+        return Response({"logs": [], "cursor": None})
+
+    logs, cursor = read_job_logs(job.id, request.query_params.get('since') or None)
+    return Response({"job_id": str(job.id), "logs": logs, "cursor": cursor})
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -0,0 +1,194 @@
+"""
+Per-job log buffers for the UI's live log view.
+
+run_validation_task sets the current_job_id contextvar, which tags everything
+logged while the job runs, including the pipeline's worker threads (they copy
+the caller's context). JobLogHandler, on the root logger, keeps only tagged records:
+untagged records cost one contextvar lookup and take no lock.
+
+Storage:
+  - Redis (JOB_LOGS_REDIS_URL, default PROGRESS_REDIS_URL / CELERY_BROKER_URL
+    when it is a redis:// URL): one stream per job capped at
+    JOB_LOGS_MAX_LINES (default 1000), kept JOB_LOGS_TTL_SECONDS (default
+    86400). Records are handed to a writer thread through a bounded queue
+    (JOB_LOGS_QUEUE_SIZE, default 10000) and dropped when it is full, so
+    logging never waits on Redis.
+  - In-process fallback (JOB_LOGS_BACKEND=memory, or no Redis): one deque of
+    JOB_LOGS_MAX_LINES per job for the JOB_LOGS_MAX_JOBS (default 200) most
+    recently started jobs. Only the process that ran the job sees its logs.
+
+Readers page with an opaque cursor: read_job_logs(job_id, since) returns the
+lines after `since` and the cursor to pass next time.
+"""
+
+import contextvars
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+current_job_id: contextvars.ContextVar = contextvars.ContextVar("mlr_job_id", default=None)
+
+
+def _max_lines() -> int:
+    return int(os.getenv("JOB_LOGS_MAX_LINES", "1000"))
+
+
+class MemoryJobLogStore:
+    """Bounded deque per job; appends take no lock."""
+
+    def __init__(self):
+        self._jobs: Dict[str, deque] = {}
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._max_jobs = int(os.getenv("JOB_LOGS_MAX_JOBS", "200"))
+
+    def _buffer(self, job_id: str) -> deque:
+        buffer = self._jobs.get(job_id)
+        if buffer is None:
+            with self._lock:
+                buffer = self._jobs.get(job_id)
+                if buffer is None:
+                    while len(self._jobs) >= self._max_jobs:
+                        self._jobs.pop(next(iter(self._jobs)))
+                    buffer = self._jobs[job_id] = deque(maxlen=_max_lines())
+        return buffer
+
+    def append(self, job_id: str, entry: Dict):
+        entry["id"] = str(next(self._seq))
+        self._buffer(job_id).append(entry)
+
+    def read(self, job_id: str, since: Optional[str], limit: int) -> List[Dict]:
+        buffer = self._jobs.get(job_id)
+        if buffer is None:
+            return []
+        floor = int(since) if since and since.isdigit() else 0
+        return [entry for entry in buffer.copy() if int(entry["id"]) > floor][:limit]
+
+
+class RedisJobLogStore:
+    """Capped Redis stream per job, written in batches by a background thread."""
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True, health_check_interval=30)
+        self._redis.ping()
+        self._ttl = int(os.getenv("JOB_LOGS_TTL_SECONDS", "86400"))
+        self._queue = queue.Queue(maxsize=int(os.getenv("JOB_LOGS_QUEUE_SIZE", "10000")))
+        self.dropped = 0
+        threading.Thread(target=self._write_loop, name="job-log-writer", daemon=True).start()
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"mlr:joblogs:{job_id}"
+
+    def append(self, job_id: str, entry: Dict):
+        try:
+            self._queue.put_nowait((job_id, entry))
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self):
+        max_lines = _max_lines()
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                pipe = self._redis.pipeline(transaction=False)
+                for job_id, entry in batch:
+                    pipe.xadd(self._key(job_id), {"data": json.dumps(entry, default=str)}, maxlen=max_lines, approximate=True)
+                for job_id in {job_id for job_id, _ in batch}:
+                    pipe.expire(self._key(job_id), self._ttl)
+                pipe.execute()
+            except Exception:
+                # Never log from here: the record would come straight back to this queue
+                self.dropped += len(batch)
+
+    def read(self, job_id: str, since: Optional[str], limit: int) -> List[Dict]:
+        entries = self._redis.xrange(self._key(job_id), min=f"({since}" if since else "-", count=limit)
+        return [{**json.loads(fields["data"]), "id": entry_id} for entry_id, fields in entries]
+
+
+def _redis_url() -> Optional[str]:
+    url = (os.getenv("JOB_LOGS_REDIS_URL") or os.getenv("PROGRESS_REDIS_URL")
+           or getattr(settings, "CELERY_BROKER_URL", ""))
+    return url if url and url.startswith(("redis://", "rediss://")) else None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_log_store():
+    """Process-wide store: Redis when configured and reachable, otherwise in-process."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                url = _redis_url()
+                if os.getenv("JOB_LOGS_BACKEND", "redis") == "memory" or url is None:
+                    _store = MemoryJobLogStore()
+                else:
+                    try:
+                        _store = RedisJobLogStore(url)
+                    except Exception as e:
+                        logger.warning(f"[JOB LOGS] Redis unavailable ({e}); job logs stay in-process")
+                        _store = MemoryJobLogStore()
+    return _store
+
+
+def read_job_logs(job_id, since: Optional[str] = None, limit: int = 200) -> Tuple[List[Dict], Optional[str]]:
+    """Log lines after `since` (oldest first, at most `limit`) and the next cursor."""
+    entries = get_job_log_store().read(str(job_id), since, limit)
+    return entries, entries[-1]["id"] if entries else since
+
+
+class JobLogHandler(logging.Handler):
+    """Root-logger handler that keeps the records of tagged jobs, without locking."""
+
+    def handle(self, record):
+        # Handler.handle() would take the handler lock around emit(); the stores do not need it
+        job_id = current_job_id.get()
+        if job_id is None:
+            return False
+        record.job_id = job_id
+        try:
+            get_job_log_store().append(job_id, {
+                "timestamp": time.strftime("%H:%M:%S", time.localtime(record.created)),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+            })
+        except Exception:
+            self.handleError(record)
+        return True
+
+    def emit(self, record):
+        self.handle(record)
+
+
+_handler = None
+
+
+def install_job_log_handler(level: int = logging.INFO) -> JobLogHandler:
+    """Attach the handler to the root logger (again, after something reset the root handlers)."""
+    global _handler
+    if _handler is None:
+        _handler = JobLogHandler(level)
+    root = logging.getLogger()
+    if _handler not in root.handlers:
+        root.addHandler(_handler)
+    return _handler
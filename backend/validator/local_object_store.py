@@ -0,0 +1,143 @@
+"""
+Filesystem stand-in for the S3 multipart upload API (local development and tests).
+
+Implements the subset of the boto3 S3 client used by direct uploads
+(create_multipart_upload, generate_presigned_url for upload_part, list_parts,
+complete_multipart_upload, abort_multipart_upload), so DirectUploadService runs
+the same code against S3, MinIO (AWS_S3_ENDPOINT_URL) or this store.
+
+"Presigned" part URLs point at the validator's local part endpoint and carry a
+signed token (key, upload id, part number) that expires like an S3 URL.
+Objects live under DIRECT_UPLOAD_LOCAL_DIR (default <tmp>/mlr_direct_uploads),
+which the web process and the Celery worker must share.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+
+from django.core import signing
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+PART_TOKEN_SALT = "validator.local_object_store.part"
+
+
+def _default_root() -> str:
+    return os.getenv("DIRECT_UPLOAD_LOCAL_DIR") or os.path.join(tempfile.gettempdir(), "mlr_direct_uploads")
+
+
+class LocalObjectStore:
+    """Multipart uploads into a local directory, with the boto3 S3 client's method names."""
+
+    def __init__(self, root: str = None):
+        self.root = root or _default_root()
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        """Local path of an object key."""
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(os.path.abspath(self.root) + os.sep):
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    def _upload_dir(self, upload_id: str) -> str:
+        if not upload_id.isalnum():
+            raise ValueError(f"Invalid upload id: {upload_id}")
+        return os.path.join(self.root, ".multipart", upload_id)
+
+    def _manifest(self, upload_id: str) -> dict:
+        try:
+            with open(os.path.join(self._upload_dir(upload_id), "upload.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"No such upload: {upload_id}")
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **kwargs) -> dict:
+        upload_id = uuid.uuid4().hex
+        upload_dir = self._upload_dir(upload_id)
+        os.makedirs(upload_dir)
+        with open(os.path.join(upload_dir, "upload.json"), "w", encoding="utf-8") as f:
+            json.dump({"key": Key, "metadata": kwargs.get("Metadata", {})}, f)
+        return {"Bucket": Bucket, "Key": Key, "UploadId": upload_id}
+
+    def generate_presigned_url(self, ClientMethod: str, Params: dict, ExpiresIn: int = 3600) -> str:
+        if ClientMethod != "upload_part":
+            raise ValueError(f"LocalObjectStore cannot presign {ClientMethod}")
+        token = signing.dumps(
+            {"key": Params["Key"], "upload_id": Params["UploadId"], "part": Params["PartNumber"], "ttl": ExpiresIn},
+            salt=PART_TOKEN_SALT,
+        )
+        return reverse("validator-direct-upload-part", kwargs={"token": token})
+
+    def write_part_from_token(self, token: str, stream, chunk_size: int = 1_048_576) -> str:
+        """
+        Store one part from a presigned-URL PUT body and return its ETag.
+
+        Raises signing.BadSignature (or SignatureExpired) for a bad token and
+        ValueError for an unknown upload.
+        """
+        claims = signing.loads(token, salt=PART_TOKEN_SALT)
+        signing.loads(token, salt=PART_TOKEN_SALT, max_age=claims["ttl"])
+        manifest = self._manifest(claims["upload_id"])
+        if manifest["key"] != claims["key"]:
+            raise ValueError("Part token does not match the upload")
+
+        upload_dir = self._upload_dir(claims["upload_id"])
+        digest = hashlib.md5()
+        fd, tmp_path = tempfile.mkstemp(dir=upload_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+            os.replace(tmp_path, os.path.join(upload_dir, f"{claims['part']:05d}.part"))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return f'"{digest.hexdigest()}"'
+
+    def list_parts(self, Bucket: str, Key: str, UploadId: str, PartNumberMarker: int = 0, **kwargs) -> dict:
+        upload_dir = self._upload_dir(UploadId)
+        self._manifest(UploadId)
+        parts = []
+        for name in sorted(os.listdir(upload_dir)):
+            if not name.endswith(".part"):
+                continue
+            number = int(name[:-5])
+            if number <= PartNumberMarker:
+                continue
+            path = os.path.join(upload_dir, name)
+            digest = hashlib.md5()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1_048_576), b""):
+                    digest.update(chunk)
+            parts.append({"PartNumber": number, "ETag": f'"{digest.hexdigest()}"', "Size": os.path.getsize(path)})
+        return {"Bucket": Bucket, "Key": Key, "UploadId": UploadId, "Parts": parts, "IsTruncated": False}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict) -> dict:
+        upload_dir = self._upload_dir(UploadId)
+        if self._manifest(UploadId)["key"] != Key:
+            raise ValueError("Key does not match the upload")
+        target = self.path(Key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as out:
+            for part in MultipartUpload["Parts"]:
+                with open(os.path.join(upload_dir, f"{part['PartNumber']:05d}.part"), "rb") as f:
+                    shutil.copyfileobj(f, out, 1_048_576)
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        logger.info(f"[DIRECT UPLOAD] Assembled {len(MultipartUpload['Parts'])} parts into {target}")
+        return {"Bucket": Bucket, "Key": Key}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> dict:
+        shutil.rmtree(self._upload_dir(UploadId), ignore_errors=True)
+        return {}
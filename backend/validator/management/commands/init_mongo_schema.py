@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Create MongoDB indexes and the schema version record (run once per deployment, not on import)."
+
+    def handle(self, *args, **options):
+        from mongo_db import initialize_schema
+
+        if not initialize_schema():
+            raise CommandError("MongoDB schema initialization failed; see the log for details.")
+        self.stdout.write(self.style.SUCCESS("MongoDB schema initialized"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('validator', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='validationjob',
+            name='status',
+            field=models.CharField(choices=[('awaiting_upload', 'Awaiting upload'), ('uploaded', 'Uploaded'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='uploaded', max_length=20),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+ROW_FIELDS = (
+    'statement', 'reference_no', 'reference', 'matched_paper', 'matched_evidence',
+    'validation_result', 'page_location', 'confidence_score', 'matching_method', 'analysis_summary',
+)
+
+
+def move_results_to_rows(apps, schema_editor):
+    """Move each job's result_json["results"] into ValidationResultRow records."""
+    ValidationJob = apps.get_model('validator', 'ValidationJob')
+    ValidationResultRow = apps.get_model('validator', 'ValidationResultRow')
+    for job in ValidationJob.objects.exclude(result_json=None).iterator(chunk_size=100):
+        results = (job.result_json or {}).get('results')
+        if not isinstance(results, list):
+            continue
+        rows = []
+        for position, result in enumerate(results):
+            values = {field: result.get(field) for field in ROW_FIELDS}
+            values['reference_no'] = '' if values['reference_no'] is None else str(values['reference_no'])
+            values['confidence_score'] = float(values['confidence_score'] or 0.0)
+            rows.append(ValidationResultRow(
+                job=job, position=position, **{k: ('' if v is None else v) for k, v in values.items()}
+            ))
+        ValidationResultRow.objects.bulk_create(rows, batch_size=500)
+        job.result_json = {k: v for k, v in job.result_json.items() if k != 'results'}
+        job.result_json['result_count'] = len(rows)
+        job.save(update_fields=['result_json'])
+
+
+def move_rows_to_results(apps, schema_editor):
+    ValidationJob = apps.get_model('validator', 'ValidationJob')
+    ValidationResultRow = apps.get_model('validator', 'ValidationResultRow')
+    for job in ValidationJob.objects.filter(result_rows__isnull=False).distinct().iterator(chunk_size=100):
+        rows = ValidationResultRow.objects.filter(job=job).order_by('position').values(*ROW_FIELDS)
+        job.result_json = {k: v for k, v in (job.result_json or {}).items() if k != 'result_count'}
+        job.result_json['results'] = list(rows)
+        job.save(update_fields=['result_json'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('validator', '0002_validationjob_awaiting_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValidationResultRow',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('position', models.PositiveIntegerField()),
+                ('statement', models.TextField()),
+                ('reference_no', models.CharField(blank=True, default='', max_length=255)),
+                ('reference', models.TextField(blank=True, default='')),
+                ('matched_paper', models.TextField(blank=True, default='')),
+                ('matched_evidence', models.TextField(blank=True, default='')),
+                ('validation_result', models.CharField(max_length=32)),
+                ('page_location', models.TextField(blank=True, default='')),
+                ('confidence_score', models.FloatField(default=0.0)),
+                ('matching_method', models.CharField(blank=True, default='', max_length=255)),
+                ('analysis_summary', models.TextField(blank=True, default='')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_rows', to='validator.validationjob')),
+            ],
+            options={
+                'ordering': ['job', 'position'],
+                'indexes': [models.Index(fields=['job', 'validation_result', 'position'], name='vrow_job_result_idx'), models.Index(fields=['job', 'confidence_score', 'position'], name='vrow_job_confidence_idx')],
+                'constraints': [models.UniqueConstraint(fields=('job', 'position'), name='vrow_job_position_uniq')],
+            },
+        ),
+        migrations.RunPython(move_results_to_rows, move_rows_to_results),
+    ]
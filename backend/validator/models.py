@@ -4,6 +4,7 @@ import uuid
 
 class ValidationJob(models.Model):
     STATUS_CHOICES = (
+        ('awaiting_upload', 'Awaiting upload'),  # direct upload initiated, files not finalized yet
         ('uploaded', 'Uploaded'),
         ('processing', 'Processing'),
         ('completed', 'Completed'),
@@ -28,3 +29,39 @@ class ValidationJob(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+
+
+class ValidationResultRow(models.Model):
+    """
+    One verdict row of a job's report.
+
+    Rows are written in batches as the pipeline finishes them and read page by page
+    (keyset pagination on position or confidence), so large reports never
+    have to be loaded whole.
+    """
+    id = models.BigAutoField(primary_key=True)
+    job = models.ForeignKey(ValidationJob, on_delete=models.CASCADE, related_name='result_rows')
+    position = models.PositiveIntegerField()  # order in the report
+    statement = models.TextField()
+    reference_no = models.CharField(max_length=255, blank=True, default='')
+    reference = models.TextField(blank=True, default='')
+    matched_paper = models.TextField(blank=True, default='')
+    matched_evidence = models.TextField(blank=True, default='')
+    validation_result = models.CharField(max_length=32)
+    page_location = models.TextField(blank=True, default='')
+    confidence_score = models.FloatField(default=0.0)
+    matching_method = models.CharField(max_length=255, blank=True, default='')
+    analysis_summary = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return f"{self.job_id} #{self.position} - {self.validation_result}"
+
+    class Meta:
+        ordering = ['job', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'position'], name='vrow_job_position_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['job', 'validation_result', 'position'], name='vrow_job_result_idx'),
+            models.Index(fields=['job', 'confidence_score', 'position'], name='vrow_job_confidence_idx'),
+        ]
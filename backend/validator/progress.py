@@ -0,0 +1,221 @@
+"""
+Job progress events, pushed from the Celery task to the job's watchers.
+
+The task publishes structured events (stage, pages and statements done, ETA)
+through ProgressReporter. Readers wait for events newer than a cursor:
+JobProgressView (long-poll, ?since=<cursor>; what the web UI uses) and
+JobProgressStreamView (server-sent events, resumable with Last-Event-ID, for
+clients that can send the Authorization header; EventSource cannot).
+
+Transport:
+  - Redis (PROGRESS_REDIS_URL, default CELERY_BROKER_URL when it is a redis://
+    URL): one capped stream per job (PROGRESS_HISTORY events, default 500,
+    kept PROGRESS_TTL_SECONDS, default 86400). Readers block in XREAD, so
+    events are pushed as they are added, and a stream (unlike plain pub/sub)
+    lets a reader that connects late replay from its cursor.
+  - In-process fallback when Redis is not configured or unreachable (or
+    PROGRESS_BACKEND=memory): only readers in the publishing process see the
+    events, which covers CELERY_ALWAYS_EAGER development setups.
+
+Event cursors are opaque strings; pass back the last one received.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from .sse import EventChannel, run_in_background
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STAGES = ("completed", "failed")
+
+
+def _history() -> int:
+    return int(os.getenv("PROGRESS_HISTORY", "500"))
+
+
+class MemoryProgressBus:
+    """Per-process event history per job; readers wait on a condition variable."""
+
+    def __init__(self):
+        self._events: Dict[str, deque] = {}
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    def publish(self, job_id: str, event: Dict) -> str:
+        with self._cond:
+            self._seq += 1
+            event = {**event, "id": str(self._seq)}
+            self._events.setdefault(job_id, deque(maxlen=_history())).append(event)
+            self._cond.notify_all()
+        return event["id"]
+
+    def _after(self, job_id: str, since: Optional[str]) -> List[Dict]:
+        floor = int(since) if since and since.isdigit() else 0
+        return [event for event in self._events.get(job_id, ()) if int(event["id"]) > floor]
+
+    def read(self, job_id: str, since: Optional[str] = None, timeout: float = 0) -> List[Dict]:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                events = self._after(job_id, since)
+                remaining = deadline - time.monotonic()
+                if events or remaining <= 0:
+                    return events
+                self._cond.wait(remaining)
+
+
+class RedisProgressBus:
+    """One capped Redis stream per job; readers block in XREAD."""
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True, health_check_interval=30)
+        self._redis.ping()
+        self._ttl = int(os.getenv("PROGRESS_TTL_SECONDS", "86400"))
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"mlr:progress:{job_id}"
+
+    def publish(self, job_id: str, event: Dict) -> str:
+        key = self._key(job_id)
+        pipe = self._redis.pipeline()
+        pipe.xadd(key, {"data": json.dumps(event, default=str)}, maxlen=_history(), approximate=True)
+        pipe.expire(key, self._ttl)
+        event_id, _ = pipe.execute()
+        return event_id
+
+    def read(self, job_id: str, since: Optional[str] = None, timeout: float = 0) -> List[Dict]:
+        block = int(timeout * 1000) if timeout > 0 else None
+        response = self._redis.xread({self._key(job_id): since or "0-0"}, count=_history(), block=block)
+        events = []
+        for _, entries in response or []:
+            for event_id, fields in entries:
+                events.append({**json.loads(fields["data"]), "id": event_id})
+        return events
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def _redis_url() -> Optional[str]:
+    url = os.getenv("PROGRESS_REDIS_URL") or getattr(settings, "CELERY_BROKER_URL", "")
+    return url if url and url.startswith(("redis://", "rediss://")) else None
+
+
+def get_progress_bus():
+    """Process-wide bus: Redis when configured and reachable, otherwise in-process."""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                url = _redis_url()
+                if os.getenv("PROGRESS_BACKEND", "redis") == "memory" or url is None:
+                    _bus = MemoryProgressBus()
+                else:
+                    try:
+                        _bus = RedisProgressBus(url)
+                        logger.info("[PROGRESS] Publishing job progress through Redis")
+                    except Exception as e:
+                        logger.warning(f"[PROGRESS] Redis unavailable ({e}); progress stays in-process")
+                        _bus = MemoryProgressBus()
+    return _bus
+
+
+def publish_progress(job_id, stage: str, **fields) -> Optional[str]:
+    """Publish one event for the job; failures are logged, never raised."""
+    event = {"job_id": str(job_id), "stage": stage, "ts": round(time.time(), 3), **fields}
+    try:
+        return get_progress_bus().publish(str(job_id), event)
+    except Exception as e:
+        logger.warning(f"[PROGRESS] Could not publish {stage} for job {job_id}: {e}")
+        return None
+
+
+def read_progress(job_id, since: Optional[str] = None, timeout: float = 0) -> List[Dict]:
+    """Events after `since`, waiting up to `timeout` seconds for the first one."""
+    return get_progress_bus().read(str(job_id), since, timeout)
+
+
+class ProgressReporter:
+    """
+    Turns pipeline counters into progress events with an ETA.
+
+    Pass report() as the pipeline's on_progress callback. Updates within the
+    same stage are sent at most every PROGRESS_MIN_INTERVAL seconds (default 1);
+    stage changes are always sent.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.started = time.monotonic()
+        self.min_interval = float(os.getenv("PROGRESS_MIN_INTERVAL", "1"))
+        self._last_sent = 0.0
+        self._stage = None
+        self._validation_started = None
+        self._lock = threading.Lock()
+
+    def _eta(self, counters: Dict) -> Optional[float]:
+        now = time.monotonic()
+        estimates = []
+        pages_done, pages_total = counters.get("pages_done") or 0, counters.get("pages_total") or 0
+        if pages_total and 0 < pages_done < pages_total:
+            estimates.append((now - self.started) / pages_done * (pages_total - pages_done))
+        done, total = counters.get("validations_done") or 0, counters.get("validations_total") or 0
+        if total and self._validation_started is None:
+            self._validation_started = now
+        if done and total > done:
+            elapsed = max(now - self._validation_started, 1e-3)
+            estimates.append(elapsed / done * (total - done))
+        return round(max(estimates), 1) if estimates else None
+
+    def report(self, stage: str, force: bool = False, **counters):
+        with self._lock:
+            now = time.monotonic()
+            if not force and stage == self._stage and now - self._last_sent < self.min_interval:
+                return
+            self._stage = stage
+            self._last_sent = now
+            eta = self._eta(counters)
+        publish_progress(self.job_id, stage, elapsed_seconds=round(now - self.started, 1),
+                         eta_seconds=eta, **counters)
+
+
+def stream_job_progress(job_id, status: str, since: Optional[str] = None) -> EventChannel:
+    """
+    Push a job's progress events into an SSE channel until the job finishes.
+
+    Events after `since` are replayed first. A job that already finished gets
+    its remaining events (or a final status event, once its history expired)
+    and the stream closes. Otherwise the watcher stops at the terminal event,
+    when the client disconnects, or after PROGRESS_STREAM_MAX_SECONDS
+    (default 1800), after which the client reconnects with Last-Event-ID.
+    """
+    read_seconds = float(os.getenv("PROGRESS_READ_SECONDS", "15"))
+    max_seconds = float(os.getenv("PROGRESS_STREAM_MAX_SECONDS", "1800"))
+
+    def _watch(channel: EventChannel):
+        cursor = since
+        deadline = time.monotonic() + max_seconds
+        finished = status in TERMINAL_STAGES
+        while not channel.abandoned and time.monotonic() < deadline:
+            events = read_progress(job_id, cursor, timeout=0 if finished else read_seconds)
+            for event in events:
+                channel.publish("progress", event, event_id=event["id"])
+                cursor = event["id"]
+                if event["stage"] in TERMINAL_STAGES:
+                    return
+            if finished:
+                channel.publish("progress", {"job_id": str(job_id), "stage": status, "status": status})
+                return
+
+    return run_in_background(_watch, name=f"progress-{job_id}")
@@ -31,6 +31,8 @@ from botocore.exceptions import ClientError, NoCredentialsError
 from django.conf import settings
 from typing import Optional, List
 
+from core.upload_sink import S3MultipartDestination, receive_django_file
+
 logger = logging.getLogger(__name__)
 
 
@@ -64,6 +66,8 @@ class S3StorageService:
                 region_name=self.region,
                 aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
                 aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                # S3-compatible stores (MinIO) for local and CI runs
+                endpoint_url=getattr(settings, 'AWS_S3_ENDPOINT_URL', None),
             )
             logger.info(f"S3 client initialized: bucket={self.bucket_name}, region={self.region}")
         except NoCredentialsError:
@@ -94,22 +98,24 @@ class S3StorageService:
         """
         s3_key = self._build_key(job_id, category, file_obj.name)
         
-        try:
-            # Django UploadedFile supports .read(), so we can stream it
-            self.s3_client.upload_fileobj(
-                file_obj,
-                self.bucket_name,
-                s3_key,
-                ExtraArgs={
-                    'ContentType': 'application/pdf',
-                    'ServerSideEncryption': 'AES256',  # Encrypt at rest
-                    'Metadata': {
-                        'job_id': job_id,
-                        'original_filename': file_obj.name,
-                    }
+        destination = S3MultipartDestination(
+            self.s3_client,
+            self.bucket_name,
+            s3_key,
+            extra_args={
+                'ContentType': 'application/pdf',
+                'ServerSideEncryption': 'AES256',  # Encrypt at rest
+                'Metadata': {
+                    'job_id': job_id,
+                    'original_filename': file_obj.name,
                 }
-            )
-            logger.info(f"Uploaded {file_obj.name} to s3://{self.bucket_name}/{s3_key}")
+            }
+        )
+
+        try:
+            # Streamed part by part (size-checked and hashed on the way), never held whole in memory
+            document = receive_django_file(file_obj, destination)
+            logger.info(f"Uploaded {file_obj.name} to s3://{self.bucket_name}/{s3_key} (sha256 {document.sha256[:12]})")
             return s3_key
             
         except ClientError as e:
@@ -1,3 +1,4 @@
+import os
 from rest_framework import serializers
 from .models import ValidationJob
 
@@ -14,3 +15,31 @@ class UploadSerializer(serializers.Serializer):
         allow_empty=False
     )
     validation_type = serializers.ChoiceField(choices=['research', 'drug'], default='research')
+
+
+class DirectUploadFileSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+
+
+class DirectUploadInitiateSerializer(serializers.Serializer):
+    brochure = DirectUploadFileSerializer()
+    references = serializers.ListField(
+        child=DirectUploadFileSerializer(),
+        allow_empty=False
+    )
+    validation_type = serializers.ChoiceField(choices=['research', 'drug'], default='research')
+
+    def validate_references(self, references):
+        # Object keys and the pipeline's reference lookup both use the basename
+        seen = set()
+        for ref in references:
+            name = os.path.basename(ref['filename'])
+            if name in seen:
+                raise serializers.ValidationError(f"Duplicate reference filename: {name}")
+            seen.add(name)
+        return references
+
+
+class DirectUploadTokenSerializer(serializers.Serializer):
+    upload_token = serializers.CharField()
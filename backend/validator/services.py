@@ -1,17 +1,31 @@
 import os
+import json
 import uuid
+import base64
 import shutil
+import queue
 import logging
 import tempfile
-from typing import List, Dict, Any, Tuple
+import threading
+from typing import List, Dict, Any, Tuple, Optional, Callable
 from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
+from .models import ValidationJob, ValidationResultRow
 
-from core.Gemini_version import StatementValidator, PDFProcessor
-from core.conversion import build_validation_dataframe
-from core.Superscript import extract_footnotes, extract_drug_superscript_table_data
-from core.Manual_Review import validate_manual_review, validate_manual_review_multi
+# The pipeline modules (pandas, numpy, PyMuPDF, google.generativeai) are imported
+# inside the functions that use them, so auth, health and OTP requests never pay
+# for them. Celery workers load them up front via preload_pipeline().
+PIPELINE_MODULES = (
+    "core.Gemini_version",
+    "core.conversion",
+    "core.Superscript",
+    "core.Manual_Review",
+    "core.streaming_validation",
+)
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +41,13 @@ def _get_s3():
     return S3StorageService()
 
 
+def preload_pipeline():
+    """Import the heavy pipeline modules now (e.g. in a Celery parent before it forks)."""
+    import importlib
+    for module in PIPELINE_MODULES:
+        importlib.import_module(module)
+
+
 class PipelineService:
     """
     Orchestrates file storage and validation pipeline execution.
@@ -105,15 +126,10 @@ class PipelineService:
             return s3_key
         else:
             # Local mode: write to disk
+            from core.upload_sink import DiskDestination, receive_django_file
             target_dir = os.path.join(workspace_path, subfolder)
-            os.makedirs(target_dir, exist_ok=True)
-            file_path = os.path.join(target_dir, file_obj.name)
-            
-            with open(file_path, 'wb+') as destination:
-                for chunk in file_obj.chunks():
-                    destination.write(chunk)
-            
-            return file_path
+            document = receive_django_file(file_obj, DiskDestination(target_dir))
+            return document.path
 
     @staticmethod
     def save_upload_to_s3(file_obj, job_id: str, category: str = "brochure") -> str:
@@ -140,7 +156,9 @@ class PipelineService:
         cls, 
         brochure_path: str, 
         reference_paths: List[str], 
-        validation_type: str = "research"
+        validation_type: str = "research",
+        on_progress: Optional[Callable[..., None]] = None,
+        on_results: Optional[Callable[[List], None]] = None
     ) -> Dict[str, Any]:
         """
         Orchestrate the full validation pipeline.
@@ -149,13 +167,26 @@ class PipelineService:
         The worker downloads them to temp files, runs the pipeline, then cleans up.
         
         In Local mode, they are local file paths (original behavior).
+
+        on_progress(stage, **counters) receives stage changes and, with the
+        streaming pipeline, page/statement/validation counts (see validator/progress.py).
+        on_results([(position, result dict), ...]) receives finished verdict rows
+        while the streaming pipeline runs (see ResultRowWriter); rows it was not
+        given are only in the returned "results".
         """
+        def _progress(stage, **counters):
+            if on_progress is not None:
+                on_progress(stage, **counters)
+
+        from core.Gemini_version import StatementValidator
+
         local_temp_dirs = []  # Track temp dirs for cleanup
         
         try:
             # ---- STEP 0: Resolve file paths (download from S3 if needed) ----
             if _use_s3():
                 s3 = _get_s3()
+                _progress("downloading")
                 
                 # Download brochure from S3 to local temp
                 brochure_local = s3.download_to_temp(brochure_path)
@@ -175,58 +206,52 @@ class PipelineService:
                 effective_brochure = brochure_path
                 effective_references = reference_paths
 
-            # ---- STEP 1: Extraction phase ----
-            logger.info(f"Starting extraction for {effective_brochure}")
-            
-            with open(effective_brochure, "rb") as f:
-                brochure_bytes = f.read()
-            
-            if validation_type == "drug":
-                extraction_result = extract_drug_superscript_table_data(brochure_bytes)
-            else:
-                extraction_result = extract_footnotes(brochure_bytes)
-            
-            # ---- STEP 2: Preparation phase ----
+            # ---- STEP 1: Preparation phase ----
             pdf_files_dict = {}
             for path in effective_references:
-                filename = os.path.basename(path)
-                with open(path, "rb") as f:
-                    pdf_files_dict[filename] = f.read()
-            
-            validation_df = build_validation_dataframe(extraction_result, pdf_files_dict)
-            
-            if validation_df.empty:
+                # Bytes are read from disk when a statement first needs the PDF
+                pdf_files_dict[os.path.basename(path)] = {"path": path}
+
+            # Extraction stats (incl. page triage decisions) are kept in the job output for audit
+            extraction_stats = {}
+            validator = StatementValidator()
+
+            # ---- STEP 2+3: Extraction and validation ----
+            logger.info(f"Starting extraction for {effective_brochure}")
+            if os.getenv("PIPELINE_STREAMING", "1") != "0":
+                # Claims are validated while later pages are still being extracted
+                from core.streaming_validation import run_streaming_validation
+
+                def _results(entries):
+                    if on_results is not None:
+                        on_results([(position, cls._format_result(res)) for position, res in entries])
+
+                results = run_streaming_validation(
+                    effective_brochure, pdf_files_dict, validation_type,
+                    stats=extraction_stats, validator=validator, on_progress=on_progress,
+                    on_results=_results,
+                )
+            else:
+                _progress("extracting")
+                results = cls._run_sequential(effective_brochure, pdf_files_dict, validation_type, extraction_stats, validator)
+            extraction_stats["reference_compaction"] = validator.llm.compaction_report
+
+            if not results:
                 return {
                     "status": "completed",
                     "results": [],
-                    "message": "No claims found for validation"
+                    "message": "No claims found for validation",
+                    "extraction_report": extraction_stats
                 }
 
-            # ---- STEP 3: Validation phase ----
-            validator = StatementValidator()
-            results = validator.validate_dataframe(validation_df)
-            
             # ---- STEP 4: Format results ----
-            formatted_results = [
-                {
-                    "statement": res.statement,
-                    "reference_no": res.reference_no,
-                    "reference": res.reference,
-                    "matched_paper": res.matched_paper,
-                    "matched_evidence": res.matched_evidence,
-                    "validation_result": res.validation_result,
-                    "page_location": res.page_location,
-                    "confidence_score": res.confidence_score,
-                    "matching_method": res.matching_method,
-                    "analysis_summary": res.analysis_summary
-                }
-                for res in results
-            ]
+            formatted_results = [cls._format_result(res) for res in results]
             
             return {
                 "status": "completed",
                 "results": formatted_results,
-                "brochure_name": os.path.basename(effective_brochure)
+                "brochure_name": os.path.basename(effective_brochure),
+                "extraction_report": extraction_stats
             }
             
         except Exception as e:
@@ -243,38 +268,585 @@ class PipelineService:
                     logger.warning(f"Failed to cleanup temp dir {temp_dir}: {e}")
 
 
+    @staticmethod
+    def _format_result(res) -> Dict[str, Any]:
+        """One ValidationResult as the report's result dict."""
+        return {
+            "statement": res.statement,
+            "reference_no": res.reference_no,
+            "reference": res.reference,
+            "matched_paper": res.matched_paper,
+            "matched_evidence": res.matched_evidence,
+            "validation_result": res.validation_result,
+            "page_location": res.page_location,
+            "confidence_score": res.confidence_score,
+            "matching_method": res.matching_method,
+            "analysis_summary": res.analysis_summary
+        }
+
+    @staticmethod
+    def _run_sequential(brochure_path: str, pdf_files_dict: Dict[str, Dict], validation_type: str,
+                        extraction_stats: Dict, validator) -> list:
+        """Extract the whole brochure, then validate (PIPELINE_STREAMING=0)."""
+        from core.conversion import build_validation_dataframe, build_validation_dataframe_special_case
+        from core.Superscript import extract_footnotes, extract_drug_superscript_table_data
+
+        if validation_type == "drug":
+            extraction_result = extract_drug_superscript_table_data(brochure_path, stats=extraction_stats)
+            validation_df = build_validation_dataframe_special_case(extraction_result, {})
+        else:
+            extraction_result = extract_footnotes(brochure_path, stats=extraction_stats)
+            validation_df = build_validation_dataframe(extraction_result.in_text, extraction_result.references)
+
+        if validation_df.empty:
+            return []
+        validation_df["pdf_files_dict"] = [pdf_files_dict] * len(validation_df)
+        return validator.validate_dataframe(validation_df)
+
+
+class DirectUploadService:
+    """
+    Presigned multipart uploads straight to the object store.
+
+    1. initiate(): creates the job (status 'awaiting_upload') and one multipart
+       upload per PDF, and returns presigned part URLs plus a signed upload token.
+    2. The client PUTs the parts (in parallel) to those URLs; the bytes never
+       pass through the web workers.
+    3. finalize(): checks that every part arrived with the declared sizes,
+       completes the uploads and dispatches the Celery job.
+
+    The store is S3 (or MinIO via AWS_S3_ENDPOINT_URL) in S3 mode, and the
+    filesystem stand-in LocalObjectStore otherwise.
+    """
+
+    TOKEN_SALT = "validator.direct_upload.manifest"
+
+    def __init__(self):
+        if _use_s3():
+            s3 = _get_s3()
+            self.client = s3.s3_client
+            self.bucket = s3.bucket_name
+            self.local = None
+        else:
+            from .local_object_store import LocalObjectStore
+            self.local = LocalObjectStore()
+            self.client = self.local
+            self.bucket = "local"
+
+    @staticmethod
+    def _part_size() -> int:
+        return max(5, getattr(settings, 'DIRECT_UPLOAD_PART_MB', 16)) * 1_048_576
+
+    @staticmethod
+    def _expires() -> int:
+        return getattr(settings, 'DIRECT_UPLOAD_EXPIRES_SECONDS', 3600)
+
+    def initiate(self, user, brochure: Dict[str, Any], references: List[Dict[str, Any]],
+                 validation_type: str = "research") -> Dict[str, Any]:
+        """
+        Start a direct upload for one brochure and its references.
+
+        Args:
+            user: Owner of the job
+            brochure, references: {"filename", "size"} per PDF
+            validation_type: 'research' or 'drug'
+
+        Returns:
+            {job_id, upload_token, part_size, expires_in, files: [{role, filename, key, upload_id, parts: [{part_number, url}]}]}
+            (part URLs from the local store are paths on this API)
+        """
+        from core.upload_sink import max_upload_bytes
+
+        max_files = getattr(settings, 'DIRECT_UPLOAD_MAX_FILES', 50)
+        if len(references) + 1 > max_files:
+            raise ValueError(f"Too many files ({len(references) + 1}); the limit is {max_files}")
+        specs = [("brochure", brochure)] + [("references", ref) for ref in references]
+        for _, spec in specs:
+            if spec["size"] > max_upload_bytes():
+                raise ValueError(f"{spec['filename']} exceeds the {max_upload_bytes() / 1_048_576:.0f} MB upload limit")
+
+        job = ValidationJob.objects.create(
+            user=user,
+            brochure_filename=os.path.basename(brochure["filename"]),
+            reference_file_count=len(references),
+            pipeline_type=validation_type,
+            status='awaiting_upload'
+        )
+
+        part_size = self._part_size()
+        files = []
+        try:
+            for role, spec in specs:
+                filename = os.path.basename(spec["filename"])
+                key = f"jobs/{job.id}/{role}/{filename}"
+                upload = self.client.create_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=key,
+                    ContentType='application/pdf',
+                    ServerSideEncryption='AES256',
+                    Metadata={'job_id': str(job.id), 'original_filename': filename},
+                )
+                part_count = max(1, -(-spec["size"] // part_size))
+                parts = [
+                    {
+                        "part_number": number,
+                        "url": self.client.generate_presigned_url(
+                            'upload_part',
+                            Params={'Bucket': self.bucket, 'Key': key, 'UploadId': upload['UploadId'], 'PartNumber': number},
+                            ExpiresIn=self._expires(),
+                        ),
+                    }
+                    for number in range(1, part_count + 1)
+                ]
+                files.append({"role": role, "filename": filename, "size": spec["size"], "key": key,
+                              "upload_id": upload['UploadId'], "parts": parts})
+        except Exception:
+            self._abort_files(files)
+            job.delete()
+            raise
+
+        token = signing.dumps({
+            "job_id": str(job.id),
+            "user_id": str(user.pk),
+            "files": [{k: f[k] for k in ("role", "filename", "size", "key", "upload_id")} for f in files],
+        }, salt=self.TOKEN_SALT)
+        logger.info(f"[DIRECT UPLOAD] Job {job.id}: {len(files)} files, {sum(len(f['parts']) for f in files)} parts")
+        return {
+            "job_id": str(job.id),
+            "upload_token": token,
+            "part_size": part_size,
+            "expires_in": self._expires(),
+            "files": files,
+        }
+
+    def _load_token(self, user, job_id, upload_token: str) -> Tuple[ValidationJob, Dict[str, Any]]:
+        try:
+            manifest = signing.loads(upload_token, salt=self.TOKEN_SALT, max_age=self._expires())
+        except signing.SignatureExpired:
+            raise ValueError("Upload token has expired; start a new upload")
+        except signing.BadSignature:
+            raise ValueError("Invalid upload token")
+        if manifest["job_id"] != str(job_id) or manifest["user_id"] != str(user.pk):
+            raise ValueError("Upload token does not belong to this job")
+        job = ValidationJob.objects.get(id=job_id, user=user)
+        if job.status != 'awaiting_upload':
+            raise ValueError(f"Job is already {job.status}")
+        return job, manifest
+
+    def _uploaded_parts(self, file: Dict[str, Any]) -> List[Dict[str, Any]]:
+        parts = []
+        marker = 0
+        while True:
+            response = self.client.list_parts(Bucket=self.bucket, Key=file["key"], UploadId=file["upload_id"],
+                                              PartNumberMarker=marker)
+            parts.extend(response.get('Parts', []))
+            if not response.get('IsTruncated'):
+                return parts
+            marker = response['NextPartNumberMarker']
+
+    def _abort_files(self, files: List[Dict[str, Any]]):
+        for file in files:
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=file["key"], UploadId=file["upload_id"])
+            except Exception as e:
+                logger.warning(f"[DIRECT UPLOAD] Could not abort upload of {file['key']}: {e}")
+
+    def finalize(self, user, job_id, upload_token: str) -> ValidationJob:
+        """
+        Complete every multipart upload of the job and dispatch its validation task.
+
+        Raises ValueError when the token is invalid or a file is incomplete (the
+        upload stays open, so missing parts can still be sent and finalize retried).
+        """
+        from .tasks import run_validation_task
+
+        job, manifest = self._load_token(user, job_id, upload_token)
+        part_size = self._part_size()
+
+        completed = []
+        for file in manifest["files"]:
+            parts = self._uploaded_parts(file)
+            expected = max(1, -(-file["size"] // part_size))
+            numbers = [part['PartNumber'] for part in parts]
+            received = sum(part.get('Size', 0) for part in parts)
+            if numbers != list(range(1, expected + 1)) or received != file["size"]:
+                raise ValueError(
+                    f"{file['filename']} is incomplete: {len(parts)}/{expected} parts, "
+                    f"{received}/{file['size']} bytes received"
+                )
+            completed.append((file, [{'ETag': part['ETag'], 'PartNumber': part['PartNumber']} for part in parts]))
+
+        for file, parts in completed:
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=file["key"], UploadId=file["upload_id"], MultipartUpload={'Parts': parts}
+            )
+
+        keys = [file["key"] for file in manifest["files"]]
+        if self.local is not None:
+            # Local stand-in: the worker reads the assembled files, and the job folder is its workspace
+            brochure_path = self.local.path(keys[0])
+            reference_paths = [self.local.path(key) for key in keys[1:]]
+            workspace_path = self.local.path(f"jobs/{job.id}")
+        else:
+            brochure_path, reference_paths = keys[0], keys[1:]
+            workspace_path = f"mlr_s3_{job.id.hex[:12]}"
+
+        job.status = 'uploaded'
+        job.save(update_fields=['status'])
+        run_validation_task.delay(
+            job_id=str(job.id),
+            brochure_path=brochure_path,
+            reference_paths=reference_paths,
+            workspace_path=workspace_path,
+            validation_type=job.pipeline_type
+        )
+        logger.info(f"[DIRECT UPLOAD] Job {job.id} finalized and dispatched")
+        return job
+
+    def abort(self, user, job_id, upload_token: str):
+        """Abort the job's open multipart uploads and delete the job."""
+        job, manifest = self._load_token(user, job_id, upload_token)
+        self._abort_files(manifest["files"])
+        job.delete()
+        logger.info(f"[DIRECT UPLOAD] Job {job_id} aborted")
+
+
+class ResultRowService:
+    """
+    Job results as ValidationResultRow records.
+
+    Rows are written with bulk_create in batches of RESULT_ROW_BATCH_SIZE
+    (default 500) and read by keyset ("cursor") pagination, so a page costs
+    O(page) whatever the report size. The remaining job output (brochure
+    name, extraction report, message) stays in ValidationJob.result_json.
+    """
+
+    FIELDS = (
+        "statement", "reference_no", "reference", "matched_paper", "matched_evidence",
+        "validation_result", "page_location", "confidence_score", "matching_method", "analysis_summary",
+    )
+    # order name -> keyset columns (the last one is unique within a job)
+    ORDERINGS = {
+        "position": ("position",),
+        "confidence": ("confidence_score", "position"),
+        "-confidence": ("-confidence_score", "-position"),
+    }
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 1000
+
+    @staticmethod
+    def _batch_size() -> int:
+        return int(os.getenv("RESULT_ROW_BATCH_SIZE", "500"))
+
+    @classmethod
+    def _to_row(cls, job, position: int, result: Dict[str, Any]) -> ValidationResultRow:
+        values = {field: result.get(field) for field in cls.FIELDS}
+        values["reference_no"] = "" if values["reference_no"] is None else str(values["reference_no"])
+        values["confidence_score"] = float(values["confidence_score"] or 0.0)
+        for field in cls.FIELDS:
+            if values[field] is None:
+                values[field] = ""
+        return ValidationResultRow(job=job, position=position, **values)
+
+    @classmethod
+    def append_rows(cls, job, entries) -> int:
+        """Insert (position, result dict) pairs in batches, leaving the job's other rows alone."""
+        batch_size = cls._batch_size()
+        written = 0
+        batch = []
+        for position, result in entries:
+            batch.append(cls._to_row(job, position, result))
+            if len(batch) >= batch_size:
+                ValidationResultRow.objects.bulk_create(batch, batch_size=batch_size)
+                written += len(batch)
+                batch = []
+        if batch:
+            ValidationResultRow.objects.bulk_create(batch, batch_size=batch_size)
+            written += len(batch)
+        return written
+
+    @classmethod
+    def write_rows(cls, job, results) -> int:
+        """
+        Replace the job's rows with `results` (dicts in report order), in batches.
+
+        Existing rows are deleted first, so a retried task does not duplicate them.
+        """
+        with transaction.atomic():
+            ValidationResultRow.objects.filter(job=job).delete()
+            written = cls.append_rows(job, enumerate(results))
+        logger.info(f"[RESULTS] Wrote {written} rows for job {job.id}")
+        return written
+
+    @classmethod
+    def iter_rows(cls, job, fields=None):
+        """Yield the job's rows as dicts in report order, fetched in chunks."""
+        fields = list(fields or cls.FIELDS)
+        queryset = ValidationResultRow.objects.filter(job=job).order_by("position").values(*fields)
+        yield from queryset.iterator(chunk_size=cls._batch_size())
+
+    @staticmethod
+    def _encode_cursor(order: str, values: list) -> str:
+        payload = json.dumps({"o": order, "v": values}, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, order: str) -> list:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        except ValueError:
+            raise ValueError("Invalid cursor")
+        if not isinstance(payload, dict) or payload.get("o") != order:
+            raise ValueError("Cursor does not match the requested ordering")
+        return payload["v"]
+
+    @classmethod
+    def page(cls, job, cursor: str = None, limit: int = None, fields=None, results=None,
+             min_confidence: float = None, order: str = "position") -> Dict[str, Any]:
+        """
+        One page of the job's rows.
+
+        Args:
+            cursor: next_cursor from the previous page (None for the first)
+            limit: Page size (default 100, max 1000)
+            fields: Columns to return (default all); "position" is always included
+            results: Only these validation_result values
+            min_confidence: Only rows with confidence_score >= this
+            order: "position" (report order), "confidence" or "-confidence"
+
+        Returns:
+            {"results": [...], "next_cursor": str or None, "has_more": bool}
+
+        Raises ValueError for unknown fields/orderings or a bad cursor.
+        """
+        if order not in cls.ORDERINGS:
+            raise ValueError(f"Unknown order '{order}'; use one of {', '.join(cls.ORDERINGS)}")
+        fields = list(fields or cls.FIELDS)
+        unknown = [field for field in fields if field not in cls.FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        limit = max(1, min(cls.MAX_LIMIT, limit or cls.DEFAULT_LIMIT))
+
+        columns = cls.ORDERINGS[order]
+        names = [column.lstrip("-") for column in columns]
+        queryset = ValidationResultRow.objects.filter(job=job)
+        if results:
+            queryset = queryset.filter(validation_result__in=results)
+        if min_confidence is not None:
+            queryset = queryset.filter(confidence_score__gte=min_confidence)
+
+        if cursor:
+            values = cls._decode_cursor(cursor, order)
+            if len(values) != len(names):
+                raise ValueError("Invalid cursor")
+            # Rows strictly after the cursor in (col1, col2, ...) order
+            after = Q()
+            for i, column in enumerate(columns):
+                op = "lt" if column.startswith("-") else "gt"
+                condition = Q(**{f"{names[i]}__{op}": values[i]})
+                for j in range(i):
+                    condition &= Q(**{names[j]: values[j]})
+                after |= condition
+            queryset = queryset.filter(after)
+
+        selected = list(dict.fromkeys(["position"] + fields + names))
+        rows = list(queryset.order_by(*columns).values(*selected)[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = cls._encode_cursor(order, [rows[-1][name] for name in names]) if has_more else None
+        returned = ["position"] + [field for field in fields if field != "position"]
+        return {
+            "results": [{field: row[field] for field in returned} for row in rows],
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+        }
+
+
+class ResultRowWriter:
+    """
+    Stores a job's verdict rows while the pipeline is still running.
+
+    Pass add() as PipelineService.run_validation's on_results. Rows are queued
+    and inserted by a background thread (with its own database connection) in
+    batches of RESULT_ROW_BATCH_SIZE, so pipeline threads never wait on the
+    database. Rows left by an earlier attempt of the job are deleted when the
+    writer is created.
+
+    finish(results) inserts the rows that were not streamed (all of them with
+    PIPELINE_STREAMING=0). If a streamed insert failed, it falls back to
+    ResultRowService.write_rows, which deletes and rewrites the job's rows.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.failed = False
+        self._written = set()
+        self._queue = queue.Queue()
+        ValidationResultRow.objects.filter(job=job).delete()
+        self._thread = threading.Thread(target=self._write_loop, name=f"result-rows-{job.id}", daemon=True)
+        self._thread.start()
+
+    def add(self, entries):
+        """Queue (position, result dict) pairs; never blocks."""
+        self._queue.put(list(entries))
+
+    def _write_loop(self):
+        from django.db import connection
+        batch_size = ResultRowService._batch_size()
+        try:
+            closed = False
+            while not closed:
+                batch = []
+                entries = self._queue.get()
+                while entries is not None:
+                    batch.extend(entries)
+                    if len(batch) >= batch_size:
+                        break
+                    try:
+                        entries = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                closed = entries is None
+                if not batch or self.failed:
+                    continue
+                try:
+                    ResultRowService.append_rows(self.job, batch)
+                    self._written.update(position for position, _ in batch)
+                except Exception as e:
+                    logger.warning(f"[RESULTS] Streaming rows for job {self.job.id} failed ({e}); rewriting at the end")
+                    self.failed = True
+        finally:
+            connection.close()
+
+    def close(self):
+        """Write what is queued and stop the thread (safe to call twice)."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def finish(self, results) -> int:
+        """Store the rows of `results` (report order) not written yet; returns the job's row count."""
+        self.close()
+        if self.failed:
+            return ResultRowService.write_rows(self.job, results)
+        streamed = len(self._written)
+        written = streamed + ResultRowService.append_rows(
+            self.job, ((position, result) for position, result in enumerate(results) if position not in self._written))
+        logger.info(f"[RESULTS] Wrote {written} rows for job {self.job.id} ({streamed} while the pipeline ran)")
+        return written
+
+
+class ExportService:
+    @staticmethod
+    def iter_job_results(job):
+        """Yield a completed job's result rows one by one."""
+        yield from ResultRowService.iter_rows(job)
+
+    @classmethod
+    def stream_job_results(cls, job, export_format: str) -> Tuple[Any, str, str]:
+        """
+        Prepare a streaming export of a job's results.
+
+        Raises ValueError for unknown formats and ExportUnavailable when the
+        format's optional dependency is missing, before anything is written.
+
+        Returns:
+            (chunk iterator, content type, download filename)
+        """
+        from core.result_export import EXPORT_FORMATS, export_rows
+
+        chunks = export_rows(cls.iter_job_results(job), export_format)
+        content_type, extension = EXPORT_FORMATS[export_format]
+        stem = os.path.splitext(os.path.basename(job.brochure_filename or "results"))[0]
+        stem = "".join(c if c.isalnum() or c in "-_." else "_" for c in stem) or "results"
+        return chunks, content_type, f"{stem}_validation.{extension}"
+
+
 class ManualReviewService:
     @staticmethod
-    def run_manual_review(statement: str, pdf_files_data: List[Tuple[str, bytes]], reference_no: str = None) -> Dict[str, Any]:
+    def receive_pdfs(files) -> List[Tuple[str, Any]]:
+        """
+        Stream Django UploadedFiles through the upload sink (core/upload_sink.py).
+
+        Small PDFs stay in memory, larger ones spill to temp files; each is
+        size-checked while it is read (raises UploadTooLarge). Release them
+        with discard_pdfs() once the review is done.
+        """
+        from core.upload_sink import MemoryDestination, receive_django_file
+
+        documents = []
+        try:
+            for f in files:
+                documents.append((f.name, receive_django_file(f, MemoryDestination())))
+        except Exception:
+            ManualReviewService.discard_pdfs(documents)
+            raise
+        return documents
+
+    @staticmethod
+    def discard_pdfs(pdf_files_data: List[Tuple[str, Any]]):
+        """Delete temp files left by receive_pdfs()."""
+        for _, document in pdf_files_data:
+            if hasattr(document, "delete"):
+                document.delete()
+
+    @staticmethod
+    def run_manual_review(statement: str, pdf_files_data: List[Tuple[str, Any]], reference_no: str = None) -> Dict[str, Any]:
         """
         Run a single statement validation against provided PDFs.
         """
-        from core.Gemini_version import GeminiClient
-        
-        client = GeminiClient()
-        if not client.client:
-            raise Exception("Gemini client failed to initialize")
-            
-        gemini_files = []
-        ref_labels = []
-        
+        from core.Manual_Review import get_review_client, review_statement
+
         try:
-            for filename, content in pdf_files_data:
-                logger.info(f"Uploading {filename} to Gemini for manual review")
-                gemini_file = client.upload_pdf_to_gemini(content, filename)
-                gemini_files.append(gemini_file)
-                
-                if reference_no and len(pdf_files_data) == 1:
-                    ref_labels.append(reference_no)
-                else:
-                    ref_labels.append(filename)
-            
-            if len(gemini_files) == 1:
-                result = validate_manual_review(statement, gemini_files[0], ref_labels[0])
-            else:
-                result = validate_manual_review_multi(statement, gemini_files, ref_labels)
-                
-            return result
+            client = get_review_client()
+        except Exception as e:
+            ManualReviewService.discard_pdfs(pdf_files_data)
+            raise Exception(f"Gemini client failed to initialize: {e}")
+
+        try:
+            # Every PDF is uploaded and validated in parallel; pacing is left to the shared rate limiter
+            return review_statement(statement, pdf_files_data, reference_no=reference_no, client=client)
         except Exception as e:
             logger.error(f"Manual review failed: {e}")
             raise
+        finally:
+            ManualReviewService.discard_pdfs(pdf_files_data)
+
+    @staticmethod
+    def stream_manual_review(statement: str, pdf_files_data: List[Tuple[str, Any]], reference_no: str = None):
+        """
+        Start a manual review in the background and return its EventChannel.
+
+        Events: "start" (PDFs to check), one "verdict" per PDF as it completes,
+        then "aggregate" (same body as the blocking endpoint) or "error".
+        """
+        from core.Manual_Review import get_review_client, review_statement
+        from .sse import run_in_background
+
+        try:
+            client = get_review_client()
+        except Exception as e:
+            ManualReviewService.discard_pdfs(pdf_files_data)
+            raise Exception(f"Gemini client failed to initialize: {e}")
+
+        def _review(channel):
+            channel.publish("start", {
+                "statement": statement,
+                "pdf_count": len(pdf_files_data),
+                "files": [filename for filename, _ in pdf_files_data],
+            })
+
+            def _on_result(index, reference, result):
+                channel.publish("verdict", {"index": index, "reference": reference, "result": result})
+
+            try:
+                result = review_statement(statement, pdf_files_data, reference_no=reference_no,
+                                          client=client, on_result=_on_result)
+            except Exception as e:
+                logger.error(f"Manual review failed: {e}")
+                raise
+            finally:
+                ManualReviewService.discard_pdfs(pdf_files_data)
+            channel.publish("aggregate", {"status": "success", "result": result})
+
+        return run_in_background(_review, name="manual-review-stream")
@@ -0,0 +1,125 @@
+"""
+Server-sent events for long-running requests.
+
+Work runs on a background thread and publishes events into an EventChannel;
+the response drains the channel as events arrive. Under WSGI (gunicorn
+gthread) the response iterates synchronously; under ASGI (config/asgi.py) it
+iterates asynchronously, because Django buffers synchronous iterators
+completely before sending them over ASGI. While waiting, a comment line is
+sent every SSE_HEARTBEAT_SECONDS (default 15) so proxies keep the connection
+open.
+
+If the client disconnects, the stream stops; the background work runs to
+completion and its remaining events are discarded. Producers that would
+otherwise run indefinitely (e.g. watching a job) check channel.abandoned.
+"""
+
+import asyncio
+import json
+import os
+import queue
+import threading
+from typing import Any, Callable, Iterator
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+_CLOSED = object()
+
+
+def format_event(event: str, data: Any, event_id: int = None) -> bytes:
+    """Encode one SSE message (data is JSON-serialized)."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    payload = json.dumps(data, default=str)
+    lines.extend(f"data: {line}" for line in payload.splitlines() or [""])
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+def _heartbeat_seconds() -> float:
+    return float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+
+class EventChannel:
+    """Thread-safe queue of events from a producer thread to one response."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.abandoned = False
+
+    def publish(self, event: str, data: Any, event_id=None):
+        """Queue an event; ids count up from 1 unless `event_id` is given (e.g. a resumable cursor)."""
+        with self._lock:
+            self._next_id += 1
+            self._queue.put(format_event(event, data, self._next_id if event_id is None else event_id))
+
+    def close(self):
+        self._queue.put(_CLOSED)
+
+    def _next(self, timeout: float):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def __iter__(self) -> Iterator[bytes]:
+        heartbeat = _heartbeat_seconds()
+        try:
+            while True:
+                message = self._next(heartbeat)
+                if message is _CLOSED:
+                    return
+                yield message if message is not None else b": keep-alive\n\n"
+        finally:
+            self.abandoned = True
+
+    async def __aiter__(self):
+        heartbeat = _heartbeat_seconds()
+        try:
+            while True:
+                message = await asyncio.to_thread(self._next, heartbeat)
+                if message is _CLOSED:
+                    return
+                yield message if message is not None else b": keep-alive\n\n"
+        finally:
+            self.abandoned = True
+
+
+def run_in_background(target: Callable[[EventChannel], None], name: str = "sse-producer") -> EventChannel:
+    """
+    Start `target(channel)` on a daemon thread and return the channel.
+
+    The channel is always closed when `target` returns or raises; an
+    unhandled exception is published as an "error" event first.
+    """
+    channel = EventChannel()
+
+    def _run():
+        try:
+            target(channel)
+        except Exception as e:
+            channel.publish("error", {"detail": str(e)})
+        finally:
+            channel.close()
+
+    threading.Thread(target=_run, name=name, daemon=True).start()
+    return channel
+
+
+def event_stream_response(request, channel: EventChannel) -> StreamingHttpResponse:
+    """Stream `channel` as text/event-stream, async under ASGI and sync under WSGI."""
+    django_request = getattr(request, "_request", request)
+    if isinstance(django_request, ASGIRequest):
+        content = channel.__aiter__()
+    else:
+        content = iter(channel)
+
+    response = StreamingHttpResponse(content, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -4,7 +4,9 @@ from celery import shared_task
 from celery.exceptions import SoftTimeLimitExceeded
 from django.utils import timezone
 from .models import ValidationJob
-from .services import PipelineService
+from .progress import ProgressReporter
+from .job_logs import current_job_id
+from .services import PipelineService, ResultRowWriter
 
 logger = logging.getLogger(__name__)
 
@@ -30,30 +32,48 @@ def run_validation_task(self, job_id, brochure_path, reference_paths, workspace_
       - soft_time_limit: Raises SoftTimeLimitExceeded at 8 min, giving us a chance
         to save partial results before the hard kill at 10 min.
       - max_retries=1: If the task fails unexpectedly, retry once after 30 seconds.
+
+    Progress events (stage, counts, ETA) are published for watchers of the job
+    through validator/progress.py, so clients do not have to poll the database.
+    Log lines are tagged with the job for its logs endpoint (validator/job_logs.py).
+    Verdict rows are stored as the pipeline finishes them (ResultRowWriter), so
+    a job that times out keeps the rows it already has.
     """
+    progress = ProgressReporter(job_id)
+    log_token = current_job_id.set(str(job_id))
+    row_writer = None
     try:
         # 1. Update status to processing
         job = ValidationJob.objects.get(id=job_id)
         job.status = 'processing'
         job.save()
+        progress.report("processing", force=True, status=job.status, attempt=self.request.retries + 1)
         
         logger.info(
             f"[Worker: {self.request.hostname}] Starting pipeline task for Job {job_id} "
             f"(type={validation_type}, attempt={self.request.retries + 1})"
         )
         
-        # 2. Run the pipeline service
+        # 2. Run the pipeline service; finished verdict rows are written while it runs
+        row_writer = ResultRowWriter(job)
         result = PipelineService.run_validation(
             brochure_path=brochure_path,
             reference_paths=reference_paths,
-            validation_type=validation_type
+            validation_type=validation_type,
+            on_progress=progress.report,
+            on_results=row_writer.add,
         )
         
         # 3. Save results and update status
+        progress.report("saving", force=True)
+        # Rows not streamed yet go to ValidationResultRow now; result_json keeps the rest of the report
+        rows = result.pop("results", [])
+        result["result_count"] = row_writer.finish(rows)
         job.status = 'completed'
         job.result_json = result
         job.completed_at = timezone.now()
         job.save()
+        progress.report("completed", force=True, status=job.status, result_count=result["result_count"])
         
         logger.info(f"Successfully completed Job {job_id} on worker {self.request.hostname}")
     
@@ -72,6 +92,7 @@ def run_validation_task(self, job_id, brochure_path, reference_paths, workspace_
             job.save()
         except Exception:
             pass
+        progress.report("failed", force=True, status="failed", error="Validation timed out")
     
     except Exception as e:
         logger.exception(f"Job {job_id} failed: {str(e)}")
@@ -86,6 +107,7 @@ def run_validation_task(self, job_id, brochure_path, reference_paths, workspace_
                 job.save()
             except Exception:
                 pass
+            progress.report("retrying", force=True, status="uploaded", error=str(e))
             raise self.retry(exc=e)
         
         # Final failure — no more retries
@@ -97,8 +119,12 @@ def run_validation_task(self, job_id, brochure_path, reference_paths, workspace_
             job.save()
         except Exception:
             pass
+        progress.report("failed", force=True, status="failed", error=str(e))
             
     finally:
+        if row_writer is not None:
+            row_writer.close()
         # 4. STRICT CLEANUP: Always remove the temporary workspace
         PipelineService.cleanup_workspace(workspace_path)
         logger.info(f"Cleaned up workspace for Job {job_id}")
+        current_job_id.reset(log_token)
@@ -1,3 +1,172 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from unittest import mock
+from urllib.parse import urlparse
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from .models import ValidationJob, ValidationResultRow
+from .services import ResultRowService, ResultRowWriter
+
+
+def _result(n, confidence=0.5, verdict="Supported"):
+    return {
+        "statement": f"Statement {n}",
+        "reference_no": n,
+        "reference": f"Reference {n}",
+        "matched_paper": f"{n}.pdf",
+        "matched_evidence": "",
+        "validation_result": verdict,
+        "page_location": "p. 1",
+        "confidence_score": confidence,
+        "matching_method": "Aggregated (Supported)",
+        "analysis_summary": "",
+    }
+
+
+def _job(email):
+    user = get_user_model().objects.create_user(email=email)
+    return ValidationJob.objects.create(user=user, brochure_filename="brochure.pdf")
+
+
+class ResultRowPageTests(TestCase):
+    def setUp(self):
+        self.job = _job("rows@example.com")
+        # Ties on confidence make the position tie-breaker part of the cursor
+        ResultRowService.write_rows(self.job, [_result(n, confidence=(n % 3) / 2) for n in range(7)])
+
+    def _all_pages(self, **kwargs):
+        positions, cursor = [], None
+        while True:
+            page = ResultRowService.page(self.job, cursor=cursor, limit=3, **kwargs)
+            positions.extend(row["position"] for row in page["results"])
+            if not page["has_more"]:
+                self.assertIsNone(page["next_cursor"])
+                return positions
+            cursor = page["next_cursor"]
+
+    def test_cursor_round_trip(self):
+        cursor = ResultRowService._encode_cursor("-confidence", [0.5, 4])
+        self.assertNotIn("=", cursor)
+        self.assertEqual(ResultRowService._decode_cursor(cursor, "-confidence"), [0.5, 4])
+
+    def test_cursor_rejects_other_order_and_garbage(self):
+        cursor = ResultRowService._encode_cursor("position", [3])
+        with self.assertRaises(ValueError):
+            ResultRowService._decode_cursor(cursor, "confidence")
+        with self.assertRaises(ValueError):
+            ResultRowService._decode_cursor("not-a-cursor", "position")
+
+    def test_pages_cover_every_row_once(self):
+        self.assertEqual(self._all_pages(), list(range(7)))
+        expected = sorted(range(7), key=lambda n: ((n % 3) / 2, n))
+        self.assertEqual(self._all_pages(order="confidence"), expected)
+        self.assertEqual(self._all_pages(order="-confidence"), expected[::-1])
+
+
+class ResultRowWriterTests(TransactionTestCase):
+    def setUp(self):
+        self.job = _job("writer@example.com")
+
+    def _positions(self):
+        return list(ValidationResultRow.objects.filter(job=self.job).values_list("position", flat=True))
+
+    def test_streamed_rows_are_kept_and_the_rest_written_at_the_end(self):
+        results = [_result(n) for n in range(5)]
+        writer = ResultRowWriter(self.job)
+        writer.add([(3, results[3]), (0, results[0])])
+        writer.close()
+        self.assertEqual(self._positions(), [0, 3])
+
+        self.assertEqual(writer.finish(results), 5)
+        self.assertEqual(self._positions(), list(range(5)))
+
+    def test_rows_of_an_earlier_attempt_are_replaced(self):
+        ResultRowService.write_rows(self.job, [_result(n, verdict="Error") for n in range(4)])
+        writer = ResultRowWriter(self.job)
+        self.assertEqual(writer.finish([_result(0), _result(1)]), 2)
+        self.assertEqual(
+            list(ValidationResultRow.objects.filter(job=self.job).values_list("validation_result", flat=True)),
+            ["Supported", "Supported"],
+        )
+
+    def test_failed_stream_falls_back_to_rewrite(self):
+        results = [_result(n) for n in range(3)]
+        writer = ResultRowWriter(self.job)
+        # The same position twice violates the (job, position) constraint
+        writer.add([(1, results[1]), (1, results[1])])
+        writer.close()
+        self.assertTrue(writer.failed)
+        self.assertEqual(writer.finish(results), 3)
+        self.assertEqual(self._positions(), [0, 1, 2])
+
+
+@override_settings(USE_S3_STORAGE=False)
+class DirectUploadLocalStoreTests(TestCase):
+    """initiate -> PUT parts to the local part endpoint -> finalize, with the Celery task mocked."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        env = mock.patch.dict("os.environ", {"DIRECT_UPLOAD_LOCAL_DIR": self.root})
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.api = APIClient()
+        self.api.force_authenticate(get_user_model().objects.create_user(email="upload@example.com"))
+        self.files = {"brochure.pdf": b"%PDF-1.4 brochure", "1. Smith.pdf": b"%PDF-1.4 first", "2. Jones.pdf": b"%PDF-1.4 second"}
+
+    def _initiate(self, references=("1. Smith.pdf", "2. Jones.pdf")):
+        return self.api.post("/api/validator/uploads/initiate/", {
+            "brochure": {"filename": "brochure.pdf", "size": len(self.files["brochure.pdf"])},
+            "references": [{"filename": name, "size": len(self.files.get(name, b"x"))} for name in references],
+        }, format="json")
+
+    def _upload_all(self, upload):
+        for file in upload["files"]:
+            for part in file["parts"]:
+                response = self.client.put(urlparse(part["url"]).path, data=self.files[file["filename"]],
+                                           content_type="application/pdf")
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response["ETag"])
+
+    def _finalize(self, upload):
+        return self.api.post(f"/api/validator/uploads/{upload['job_id']}/finalize/",
+                             {"upload_token": upload["upload_token"]}, format="json")
+
+    @mock.patch("validator.tasks.run_validation_task.delay")
+    def test_upload_and_finalize_dispatch_the_job(self, delay):
+        upload = self._initiate().json()
+        self._upload_all(upload)
+
+        response = self._finalize(upload)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ValidationJob.objects.get(id=upload["job_id"]).status, "uploaded")
+
+        kwargs = delay.call_args.kwargs
+        self.assertEqual(len(set(kwargs["reference_paths"])), 2)
+        for path in [kwargs["brochure_path"]] + kwargs["reference_paths"]:
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), self.files[path.rsplit("/", 1)[-1]])
+
+    @mock.patch("validator.tasks.run_validation_task.delay")
+    def test_second_finalize_is_a_conflict(self, delay):
+        upload = self._initiate().json()
+        self._upload_all(upload)
+        self.assertEqual(self._finalize(upload).status_code, 201)
+
+        response = self._finalize(upload)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(delay.call_count, 1)
+
+    @mock.patch("validator.tasks.run_validation_task.delay")
+    def test_finalize_before_all_parts_arrive_is_a_conflict(self, delay):
+        upload = self._initiate().json()
+        self.assertEqual(self._finalize(upload).status_code, 409)
+        delay.assert_not_called()
+
+    def test_duplicate_reference_filenames_are_rejected(self):
+        response = self._initiate(references=("1. Smith.pdf", "refs/1. Smith.pdf"))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ValidationJob.objects.exists())
@@ -2,19 +2,37 @@ from django.urls import path
 from .views import (
     RunPipelineView, 
     JobStatusView, 
+    JobProgressView,
+    JobProgressStreamView,
+    JobLogsView,
     ValidationResultsView, 
+    ValidationExportView,
     ValidationHistoryView,
-    ManualReviewView
+    ManualReviewView,
+    ManualReviewStreamView,
+    DirectUploadInitiateView,
+    DirectUploadFinalizeView,
+    DirectUploadAbortView,
+    local_upload_part
 )
 from .compatibility import health_check, mongodb_status, get_latest_logs
 
 urlpatterns = [
     # Standard DRF Endpoints
     path('run-pipeline/', RunPipelineView.as_view(), name='validator-run-pipeline'),
+    path('uploads/initiate/', DirectUploadInitiateView.as_view(), name='validator-direct-upload-initiate'),
+    path('uploads/<uuid:job_id>/finalize/', DirectUploadFinalizeView.as_view(), name='validator-direct-upload-finalize'),
+    path('uploads/<uuid:job_id>/abort/', DirectUploadAbortView.as_view(), name='validator-direct-upload-abort'),
+    path('uploads/parts/<str:token>/', local_upload_part, name='validator-direct-upload-part'),
     path('job-status/<uuid:job_id>/', JobStatusView.as_view(), name='validator-job-status'),
+    path('job-progress/<uuid:job_id>/', JobProgressView.as_view(), name='validator-job-progress'),
+    path('job-progress/<uuid:job_id>/stream/', JobProgressStreamView.as_view(), name='validator-job-progress-stream'),
+    path('logs/<uuid:job_id>/', JobLogsView.as_view(), name='validator-job-logs'),
     path('results/<uuid:job_id>/', ValidationResultsView.as_view(), name='validator-results'),
+    path('results/<uuid:job_id>/export/<str:export_format>/', ValidationExportView.as_view(), name='validator-results-export'),
     path('history/', ValidationHistoryView.as_view(), name='validator-history'),
     path('manual-review/', ManualReviewView.as_view(), name='validator-manual-review'),
+    path('manual-review/stream/', ManualReviewStreamView.as_view(), name='validator-manual-review-stream'),
 
     # Compatibility / Legacy Endpoints (Shims for Frontend)
     path('health/', health_check, name='legacy-health'),
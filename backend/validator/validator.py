@@ -22,10 +22,11 @@ if BASE_DIR_PATH not in sys.path:
 
 try:
     from Superscript import extract_footnotes, extract_drug_superscript_table_data
-    from conversion import build_validation_dataframe, build_validation_rows_special_case
+    from conversion import build_validation_dataframe, build_validation_dataframe_special_case
     from Gemini_version import StatementValidator
-    from mongo_db import validation_collection, validation_collection_v2
+    from mongo_db import get_validation_collection_v2
     from mongo_schema import StorageOptimizer, ConfidenceScoringOptimizer
+    from upload_sink import DiskDestination, receive_django_file
 except ImportError as e:
     import traceback
     # Fallback/Error logging if imports fail (during setup)
@@ -59,32 +60,19 @@ class ValidatorPipeline:
         Saves uploaded files (Django UploadedFile objects) to tempdir.
         Returns brochure_path, reference_paths, pdf_files_dict
         """
-        # Save brochure
-        brochure_path = os.path.join(self.tmpdir, "brochure.pdf")
-        with open(brochure_path, "wb") as f:
-            for chunk in brochure_file.chunks():
-                f.write(chunk)
-        
+        # Stream each upload to disk (hashed and size-checked on the way); no file is held in memory
+        brochure = receive_django_file(brochure_file, DiskDestination(self.tmpdir, "brochure.pdf"))
+        brochure_path = brochure.path
+
         reference_paths = []
         pdf_files_dict = {}
 
         for ref_file in reference_files:
-            ref_path = os.path.join(self.tmpdir, ref_file.name)
-            
-            # Read content for dictionary
-            ref_content = b""
-            with open(ref_path, "wb") as f:
-                for chunk in ref_file.chunks():
-                    ref_content += chunk
-                    f.write(chunk)
-
-            reference_paths.append(ref_path)
-            
-            # Use ORIGINAL filename as key
-            pdf_files_dict[ref_file.name] = {
-                "temp_path": ref_path,
-                "content": ref_content 
-            }
+            document = receive_django_file(ref_file, DiskDestination(self.tmpdir))
+            reference_paths.append(document.path)
+
+            # Use ORIGINAL filename as key; validators read the bytes from "path" when needed
+            pdf_files_dict[ref_file.name] = {"temp_path": document.path, **document.as_pdf_info()}
 
         return brochure_path, reference_paths, pdf_files_dict
 
@@ -99,7 +87,7 @@ class ValidatorPipeline:
             
             # Update MongoDB to processing
             try:
-                 validation_collection_v2.update_one(
+                 get_validation_collection_v2().update_one(
                     {"brochure_id": self.job_id},
                     {"$set": {"status": "processing"}}
                 )
@@ -128,9 +116,7 @@ class ValidatorPipeline:
             validation_df = None
             
             if validation_type == "drug":
-                validation_rows = build_validation_rows_special_case(extraction_result, {})
-                import pandas as pd
-                validation_df = pd.DataFrame(validation_rows)
+                validation_df = build_validation_dataframe_special_case(extraction_result, {})
                 validation_df['pdf_files_dict'] = [pdf_files_dict] * len(validation_df)
             else:
                 validation_df = build_validation_dataframe(
@@ -181,7 +167,7 @@ class ValidatorPipeline:
             # ==========================
             # STEP 5: SAVE RESULTS TO DB
             # ==========================
-            validation_collection_v2.update_one(
+            get_validation_collection_v2().update_one(
                 {"brochure_id": self.job_id},
                 {
                     "$set": {
@@ -216,7 +202,7 @@ class ValidatorPipeline:
         except Exception as e:
             logger.exception(f"[JOB FAILED] {self.job_id}")
             try:
-                validation_collection_v2.update_one(
+                get_validation_collection_v2().update_one(
                     {"brochure_id": self.job_id},
                     {"$set": {"status": "failed", "error_message": str(e), "failed_at": datetime.utcnow()}}
                 )
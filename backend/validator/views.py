@@ -1,12 +1,25 @@
+import os
 import logging
+from django.core import signing
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
 from rest_framework import views, status, generics, permissions, throttling
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 
 from .models import ValidationJob
-from .serializers import UploadSerializer, ValidationJobSerializer
+from .serializers import (
+    UploadSerializer, ValidationJobSerializer, DirectUploadInitiateSerializer, DirectUploadTokenSerializer
+)
 from .tasks import run_validation_task
-from .services import PipelineService, ManualReviewService
+from .services import (
+    PipelineService, ManualReviewService, ExportService, DirectUploadService, ResultRowService
+)
+from .sse import event_stream_response
+from .progress import TERMINAL_STAGES, read_progress, stream_job_progress
+from .job_logs import read_job_logs
+from core.upload_sink import UploadTooLarge
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +80,13 @@ class RunPipelineView(views.APIView):
                 "filename": brochure_file.name
             }, status=status.HTTP_201_CREATED)
 
+        except UploadTooLarge as e:
+            if workspace_path:
+                PipelineService.cleanup_workspace(workspace_path)
+            return Response({
+                "status": "error",
+                "message": str(e)
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
         except Exception as e:
             logger.error(f"Failed to initiate pipeline: {e}")
             if workspace_path:
@@ -76,6 +96,112 @@ class RunPipelineView(views.APIView):
                 "message": f"Failed to start validation job: {str(e)}"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class DirectUploadInitiateView(views.APIView):
+    """
+    Start a direct-to-storage upload: creates the job and returns presigned multipart part URLs.
+    The client PUTs the parts itself, then calls DirectUploadFinalizeView.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [PipelineThrottle]
+
+    def post(self, request, *args, **kwargs):
+        serializer = DirectUploadInitiateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            upload = DirectUploadService().initiate(
+                user=request.user,
+                brochure=serializer.validated_data['brochure'],
+                references=serializer.validated_data['references'],
+                validation_type=serializer.validated_data['validation_type']
+            )
+        except ValueError as e:
+            return Response({"status": "error", "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Failed to initiate direct upload: {e}")
+            return Response({
+                "status": "error",
+                "message": f"Failed to start upload: {str(e)}"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        # Part URLs from the local stand-in are paths on this API
+        for file in upload["files"]:
+            for part in file["parts"]:
+                if part["url"].startswith("/"):
+                    part["url"] = request.build_absolute_uri(part["url"])
+        return Response({"status": "success", **upload}, status=status.HTTP_201_CREATED)
+
+
+class DirectUploadFinalizeView(views.APIView):
+    """Complete a direct upload and start its validation job (same response as RunPipelineView)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, job_id, *args, **kwargs):
+        serializer = DirectUploadTokenSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            job = DirectUploadService().finalize(request.user, job_id, serializer.validated_data['upload_token'])
+        except ValidationJob.DoesNotExist:
+            return Response({"detail": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({"status": "error", "message": str(e)}, status=status.HTTP_409_CONFLICT)
+        except Exception as e:
+            logger.error(f"Failed to finalize direct upload {job_id}: {e}")
+            return Response({
+                "status": "error",
+                "message": f"Failed to start validation job: {str(e)}"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            "status": "success",
+            "message": "Validation job started",
+            "job_id": str(job.id),
+            "filename": job.brochure_filename
+        }, status=status.HTTP_201_CREATED)
+
+
+class DirectUploadAbortView(views.APIView):
+    """Cancel a direct upload that has not been finalized."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, job_id, *args, **kwargs):
+        serializer = DirectUploadTokenSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            DirectUploadService().abort(request.user, job_id, serializer.validated_data['upload_token'])
+        except ValidationJob.DoesNotExist:
+            return Response({"detail": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({"status": "error", "message": str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response({"status": "success", "message": "Upload aborted"})
+
+
+@csrf_exempt
+@require_http_methods(["PUT"])
+def local_upload_part(request, token):
+    """
+    Part endpoint of the local object store (the target of its "presigned" URLs).
+    Authorized by the signed token in the URL, like an S3 presigned URL; unused in S3 mode.
+    """
+    service = DirectUploadService()
+    if service.local is None:
+        return HttpResponse(status=404)
+    try:
+        etag = service.local.write_part_from_token(token, request)
+    except signing.BadSignature:
+        return HttpResponse("Invalid or expired part URL", status=403)
+    except ValueError as e:
+        return HttpResponse(str(e), status=404)
+    response = HttpResponse(status=200)
+    response["ETag"] = etag
+    return response
+
+
 class JobStatusView(views.APIView):
     """
     Check the status of a background validation job.
@@ -97,12 +223,95 @@ class JobStatusView(views.APIView):
         except ValidationJob.DoesNotExist:
             return Response({"detail": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
 
+class JobProgressView(views.APIView):
+    """
+    Long-poll a job's progress events (stage, pages/statements done, ETA).
+
+    Query params: since (cursor from the previous response), timeout (seconds
+    to wait for a new event, default 25, max PROGRESS_POLL_MAX_SECONDS).
+    Returns as soon as there are events after `since`; a finished job returns
+    immediately.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id, *args, **kwargs):
+        job_status = ValidationJob.objects.filter(id=job_id, user=request.user).values_list('status', flat=True).first()
+        if job_status is None:
+            return Response({"detail": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        since = request.query_params.get('since') or None
+        try:
+            timeout = float(request.query_params.get('timeout', 25))
+        except ValueError:
+            return Response({"detail": "timeout must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        timeout = max(0.0, min(timeout, float(os.getenv("PROGRESS_POLL_MAX_SECONDS", "30"))))
+
+        finished = job_status in TERMINAL_STAGES
+        events = read_progress(job_id, since, timeout=0 if finished else timeout)
+        if events:
+            job_status = events[-1].get("status") or job_status
+            finished = finished or events[-1]["stage"] in TERMINAL_STAGES
+        return Response({
+            "job_id": str(job_id),
+            "state": job_status,
+            "events": events,
+            "cursor": events[-1]["id"] if events else since,
+            "done": finished,
+        })
+
+
+class JobProgressStreamView(views.APIView):
+    """
+    Server-sent "progress" events for a job until it completes or fails.
+    Resumes after the Last-Event-ID header (or ?since=) on reconnect.
+
+    Authenticated like every other endpoint (Authorization: Bearer), so it is for
+    clients that can send headers on a streamed GET (fetch() readers, server-side
+    consumers). A browser EventSource cannot; the web UI long-polls JobProgressView.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id, *args, **kwargs):
+        job_status = ValidationJob.objects.filter(id=job_id, user=request.user).values_list('status', flat=True).first()
+        if job_status is None:
+            return Response({"detail": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        since = request.headers.get('Last-Event-ID') or request.query_params.get('since') or None
+        return event_stream_response(request, stream_job_progress(job_id, job_status, since))
+
+
+class JobLogsView(views.APIView):
+    """
+    Log lines of one of the caller's jobs, oldest first.
+    Query params: since (cursor from the previous response), limit (default 200, max 1000).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id, *args, **kwargs):
+        if not ValidationJob.objects.filter(id=job_id, user=request.user).exists():
+            return Response({"detail": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 200)), 1000))
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        logs, cursor = read_job_logs(job_id, request.query_params.get('since') or None, limit)
+        return Response({"job_id": str(job_id), "logs": logs, "cursor": cursor})
+
+
 class ValidationResultsView(views.APIView):
     """
     Fetch results for a specific validation job.
     Replaces FastAPI's /validation-results/{id}.
+
+    Without query parameters the full report is returned (the shape the
+    frontend expects). With any of cursor, limit, fields, result,
+    min_confidence or order, one page of rows is returned instead:
+      ?limit=100&fields=statement,validation_result&result=Supported,Contradicted
+      &min_confidence=0.8&order=-confidence&cursor=<next_cursor>
     """
     permission_classes = [permissions.IsAuthenticated]
+    PAGE_PARAMS = ("cursor", "limit", "fields", "result", "min_confidence", "order")
 
     def get(self, request, job_id, *args, **kwargs):
         try:
@@ -112,13 +321,61 @@ class ValidationResultsView(views.APIView):
                     "detail": "Results not ready", 
                     "status": job.status
                 }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # The result_json contains the exact shape expected by frontend
-            return Response(job.result_json)
+
+            params = request.query_params
+            if not any(name in params for name in self.PAGE_PARAMS):
+                # result_json plus the rows: the exact shape expected by frontend
+                return Response({**(job.result_json or {}), "results": list(ResultRowService.iter_rows(job))})
+
+            try:
+                page = ResultRowService.page(
+                    job,
+                    cursor=params.get("cursor") or None,
+                    limit=int(params["limit"]) if params.get("limit") else None,
+                    fields=[f for f in params.get("fields", "").split(",") if f] or None,
+                    results=[r for r in params.get("result", "").split(",") if r] or None,
+                    min_confidence=float(params["min_confidence"]) if params.get("min_confidence") else None,
+                    order=params.get("order", "position"),
+                )
+            except ValueError as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"job_id": str(job.id), "status": job.status, **page})
             
         except ValidationJob.DoesNotExist:
             return Response({"detail": "Results not found"}, status=status.HTTP_404_NOT_FOUND)
 
+class ValidationExportView(views.APIView):
+    """
+    Download a job's results as CSV, JSONL, XLSX or Parquet.
+    Rows are streamed with chunked transfer, so memory does not grow with job size.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id, export_format, *args, **kwargs):
+        from core.result_export import ExportUnavailable
+
+        try:
+            job = ValidationJob.objects.get(id=job_id, user=request.user)
+        except ValidationJob.DoesNotExist:
+            return Response({"detail": "Results not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if job.status != 'completed':
+            return Response({
+                "detail": "Results not ready",
+                "status": job.status
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            chunks, content_type, filename = ExportService.stream_job_results(job, export_format.lower())
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ExportUnavailable as e:
+            return Response({"detail": str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
 class ValidationHistoryView(generics.ListAPIView):
     """
     List past validation jobs for the user.
@@ -164,10 +421,7 @@ class ManualReviewView(views.APIView):
 
         try:
             # Prepare file data for service
-            pdf_files_data = []
-            for f in files:
-                pdf_files_data.append((f.name, f.read()))
-
+            pdf_files_data = ManualReviewService.receive_pdfs(files)
             result = ManualReviewService.run_manual_review(
                 statement=statement,
                 pdf_files_data=pdf_files_data,
@@ -179,8 +433,47 @@ class ManualReviewView(views.APIView):
                 "result": result
             })
 
+        except UploadTooLarge as e:
+            return Response({"detail": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
         except Exception as e:
             logger.error(f"Manual review error: {e}")
             return Response({
                 "detail": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ManualReviewStreamView(views.APIView):
+    """
+    Streaming variant of ManualReviewView (server-sent events).
+    Emits one "verdict" event per PDF as soon as it is checked, then an "aggregate" event.
+    """
+    parser_classes = (MultiPartParser, FormParser)
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [PipelineThrottle]
+
+    def post(self, request, *args, **kwargs):
+        statement = request.data.get('statement')
+        reference_no = request.data.get('reference_no')
+        files = request.FILES.getlist('reference_pdfs')
+
+        if not statement or not files:
+            return Response({
+                "detail": "Statement and at least one PDF are required."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Receive uploads here: the request is gone by the time the background review runs
+            pdf_files_data = ManualReviewService.receive_pdfs(files)
+            channel = ManualReviewService.stream_manual_review(
+                statement=statement,
+                pdf_files_data=pdf_files_data,
+                reference_no=reference_no
+            )
+        except UploadTooLarge as e:
+            return Response({"detail": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except Exception as e:
+            logger.error(f"Manual review error: {e}")
+            return Response({
+                "detail": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return event_stream_response(request, channel)